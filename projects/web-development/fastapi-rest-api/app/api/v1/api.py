@@ -3,7 +3,7 @@ API 路由汇总
 """
 
 from fastapi import APIRouter
-from app.api.v1.endpoints import tasks
+from app.api.v1.endpoints import admin, tasks
 
 api_router = APIRouter()
 
@@ -13,3 +13,8 @@ api_router.include_router(
     prefix="/tasks",
     tags=["任务管理"]
 )
+api_router.include_router(
+    admin.router,
+    prefix="/admin",
+    tags=["管理"]
+)
@@ -0,0 +1,54 @@
+"""
+管理 API 端点
+"""
+
+import asyncio
+import secrets
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from app.core.config import DEFAULT_SECRET_KEY, settings
+from app.core.profiling import SamplingProfiler, profile_store, render_collapsed
+
+router = APIRouter()
+
+
+def require_admin(x_admin_token: Optional[str] = Header(None, description="管理密钥（SECRET_KEY）")):
+    """校验管理密钥；未开启性能分析时端点不存在"""
+    if not settings.PROFILING_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if settings.SECRET_KEY == DEFAULT_SECRET_KEY:
+        raise HTTPException(status_code=403, detail="请先配置 SECRET_KEY")
+    if not x_admin_token or not secrets.compare_digest(x_admin_token, settings.SECRET_KEY):
+        raise HTTPException(status_code=401, detail="管理密钥无效")
+
+
+@router.post("/profile", response_class=PlainTextResponse, dependencies=[Depends(require_admin)], tags=["性能分析"])
+async def profile(
+    seconds: float = Query(5.0, gt=0, description="采样时长（秒）"),
+    interval_ms: float = Query(5.0, ge=1, le=1000, description="采样间隔（毫秒）")
+):
+    """
+    对线上流量采样分析 seconds 秒，返回折叠栈（每行 "线程;帧;...;帧 样本数"）
+
+    采样期间服务照常处理请求；同一时间只能运行一个分析，否则返回 409
+    """
+    if seconds > settings.PROFILING_MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"采样时长不能超过 {settings.PROFILING_MAX_SECONDS} 秒")
+    profiler = SamplingProfiler.try_start(interval_ms / 1000)
+    if profiler is None:
+        raise HTTPException(status_code=409, detail="已有性能分析正在运行")
+    try:
+        await asyncio.sleep(seconds)
+    finally:
+        samples = profiler.stop()
+    return render_collapsed(samples)
+
+
+@router.get("/profile/{profile_id}", response_class=PlainTextResponse, dependencies=[Depends(require_admin)], tags=["性能分析"])
+async def get_request_profile(profile_id: str):
+    """读取单请求分析结果（请求头 X-Profile 携带密钥的请求，其响应头 X-Profile-Id 为结果 ID）"""
+    collapsed = profile_store.get(profile_id)
+    if collapsed is None:
+        raise HTTPException(status_code=404, detail="分析结果不存在或已过期")
+    return collapsed
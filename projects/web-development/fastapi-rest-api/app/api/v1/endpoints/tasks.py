@@ -2,42 +2,435 @@
 任务 API 端点
 """
 
-from typing import List, Optional
-from fastapi import APIRouter, HTTPException, Query, Depends
-from app.models.task import Task, TaskCreate, TaskUpdate, TaskList, TaskStats, TaskStatus
+import json
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple, Type
+from fastapi import APIRouter, HTTPException, Query, Depends, Request, Response
+from fastapi.concurrency import iterate_in_threadpool, run_in_threadpool
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from app.models.task import (
+    Task, TaskAggregate, TaskCreate, TaskUpdate, TaskList, TaskFeed, TaskStats, TaskStatus, TaskChangeList,
+    TaskBatchUpdate, TaskBatchDelete, BatchItemResult, BatchResult, ExportFormat
+)
+from app.core.compression import negotiate
+from app.core.config import settings
+from app.core.etag import etag_matches, weak_etag
+from app.core.pagination import encode_cursor, decode_cursor
+from app.core.responses import dumps
+from app.services.export import csv_chunks, ndjson_chunks, parquet_available, parquet_chunks
 from app.services.task_service import task_service
+from app.storage.base import (
+    BUCKET_FIELDS, BUCKET_UNITS, GROUP_FIELDS, TASK_FIELDS, VersionConflictError, to_local_naive
+)
 
 router = APIRouter()
 
+_EXPORTERS = {
+    ExportFormat.NDJSON: (ndjson_chunks, "application/x-ndjson"),
+    ExportFormat.CSV: (csv_chunks, "text/csv; charset=utf-8"),
+    ExportFormat.PARQUET: (parquet_chunks, "application/vnd.apache.parquet"),
+}
+# SSE 每次从变更日志拉取的条数
+_STREAM_BATCH_SIZE = 500
+_NDJSON_TYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+_BATCH_ADAPTERS = {
+    TaskCreate: TypeAdapter(List[TaskCreate]),
+    TaskBatchUpdate: TypeAdapter(List[TaskBatchUpdate]),
+}
+
+
+async def _call(func, *args, **kwargs):
+    """
+    调用服务层方法
+
+    存储会阻塞（SQLite、分片、同步提交的持久化存储）时在线程池中执行，不占用事件循环；
+    纯内存存储的调用只需微秒级，直接执行省去线程切换
+    """
+    if task_service.blocking_io:
+        return await run_in_threadpool(func, *args, **kwargs)
+    return func(*args, **kwargs)
+
+
+def _require_changes() -> None:
+    """多个 worker 共享数据而存储后端没有变更日志时（分片存储），进程内日志不完整，拒绝变更同步"""
+    if not task_service.supports_changes:
+        raise HTTPException(status_code=501, detail="当前存储后端不支持变更同步")
+
+
+def _parse_fields(fields: Optional[str]) -> Optional[List[str]]:
+    """解析 fields 参数（逗号分隔），按任务字段顺序返回且总是包含 id；未指定或为空时返回 None"""
+    requested = {name.strip() for name in (fields or "").split(",") if name.strip()}
+    if not requested:
+        # fields= 为空（常见于表单或客户端拼接查询串）视为未指定，返回完整任务而不是只有 id
+        return None
+    unknown = requested - set(TASK_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"未知字段: {', '.join(sorted(unknown))}，可选 {', '.join(TASK_FIELDS)}"
+        )
+    requested.add("id")
+    return [field for field in TASK_FIELDS if field in requested]
+
+
+def _parse_group_by(group_by: Optional[str]) -> List[str]:
+    """解析 group_by 参数（逗号分隔），按分组字段顺序返回"""
+    requested = {name.strip() for name in (group_by or "").split(",") if name.strip()}
+    unknown = requested - set(GROUP_FIELDS)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"不支持的分组字段: {', '.join(sorted(unknown))}，可选 {', '.join(GROUP_FIELDS)}"
+        )
+    return [field for field in GROUP_FIELDS if field in requested]
+
+
+def _parse_bucket(bucket: Optional[str]) -> Optional[Tuple[str, str]]:
+    """解析 bucket 参数（字段:单位），未指定时返回 None"""
+    if bucket is None:
+        return None
+    field, _, unit = bucket.partition(":")
+    field, unit = field.strip(), (unit.strip() or "day")
+    if field not in BUCKET_FIELDS or unit not in BUCKET_UNITS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"bucket 格式为 字段:单位，字段可选 {', '.join(BUCKET_FIELDS)}，单位可选 {', '.join(BUCKET_UNITS)}"
+        )
+    return field, unit
+
+
+def _with_extra(fields: List[str], extra: str) -> List[str]:
+    """投影时额外读取内部需要的字段（如游标用的 created_at），输出前再去掉"""
+    return fields if extra in fields else [*fields, extra]
+
+
+def _format_errors(e: ValidationError) -> str:
+    """校验错误压缩为一行"""
+    messages = []
+    for err in e.errors():
+        loc = ".".join(str(part) for part in err["loc"])
+        messages.append(f"{loc}: {err['msg']}" if loc else err["msg"])
+    return "; ".join(messages)
+
+
+async def _read_batch(
+    request: Request,
+    model: Type[BaseModel]
+) -> Tuple[List[Optional[BaseModel]], Dict[int, str]]:
+    """
+    读取批量请求体（JSON 数组或 NDJSON）
+
+    先检查条数，超过 MAX_BATCH_SIZE 时不做任何模型校验直接返回 413；
+    再整体校验，只有存在非法条目时才逐条校验定位错误；
+    返回与输入一一对应的条目（非法为 None）和 {序号: 错误信息}
+    """
+    body = await request.body()
+    ndjson = request.headers.get("content-type", "").startswith(_NDJSON_TYPES)
+    if ndjson:
+        raw_items: list = [line for line in body.splitlines() if line.strip()]
+    else:
+        # JSON 数组只解析一次：先用于计数，再整体校验解析结果
+        try:
+            raw_items = json.loads(body)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="请求体不是合法的 JSON")
+        if not isinstance(raw_items, list):
+            raise HTTPException(status_code=400, detail="请求体必须是 JSON 数组")
+
+    if not raw_items:
+        raise HTTPException(status_code=400, detail="批量请求不能为空")
+    if len(raw_items) > settings.MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"单次批量操作最多 {settings.MAX_BATCH_SIZE} 条")
+
+    adapter = _BATCH_ADAPTERS[model]
+    try:
+        if ndjson:
+            return adapter.validate_json(b"[" + b",".join(raw_items) + b"]"), {}
+        return adapter.validate_python(raw_items), {}
+    except ValidationError:
+        pass
+    validate_one = model.model_validate_json if ndjson else model.model_validate
+    items: List[Optional[BaseModel]] = []
+    errors: Dict[int, str] = {}
+    for i, raw in enumerate(raw_items):
+        try:
+            items.append(validate_one(raw))
+        except ValidationError as e:
+            items.append(None)
+            errors[i] = _format_errors(e)
+    return items, errors
+
+
+def _batch_result(
+    total: int,
+    errors: Dict[int, str],
+    succeeded: Dict[int, int]
+) -> BatchResult:
+    """汇总批量结果：succeeded 为 {序号: 任务 ID}"""
+    results = [
+        BatchItemResult(index=i, id=succeeded[i]) if i in succeeded
+        else BatchItemResult(index=i, error=errors.get(i, "任务不存在"))
+        for i in range(total)
+    ]
+    return BatchResult(succeeded=len(succeeded), failed=total - len(succeeded), results=results)
+
 
 @router.post("/tasks", response_model=Task, status_code=201, tags=["任务管理"])
 async def create_task(task: TaskCreate):
     """创建新任务"""
     try:
-        created_task = task_service.create_task(task)
+        created_task = await _call(task_service.create_task, task)
         return created_task
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"创建任务失败: {str(e)}")
 
 
+@router.post("/tasks:batch", response_model=BatchResult, response_model_exclude_none=True, tags=["批量操作"])
+async def create_tasks_batch(request: Request):
+    """
+    批量创建任务
+
+    请求体为 TaskCreate 的 JSON 数组，或 Content-Type: application/x-ndjson 的逐行 JSON；
+    非法条目不影响其余条目
+    """
+    items, errors = await _read_batch(request, TaskCreate)
+    valid = [(i, item) for i, item in enumerate(items) if item is not None]
+    created = await _call(task_service.create_tasks, [item for _, item in valid])
+    return _batch_result(len(items), errors, {i: task.id for (i, _), task in zip(valid, created)})
+
+
+@router.patch("/tasks:batch", response_model=BatchResult, response_model_exclude_none=True, tags=["批量操作"])
+async def update_tasks_batch(request: Request):
+    """
+    批量更新任务
+
+    每个条目为带 id 的 TaskUpdate（可带 expected_version），格式同批量创建
+    """
+    items, errors = await _read_batch(request, TaskBatchUpdate)
+    valid = [(i, item) for i, item in enumerate(items) if item is not None]
+    updated = await _call(task_service.update_tasks, [(item.id, item) for _, item in valid])
+
+    succeeded = {}
+    for (i, _), result in zip(valid, updated):
+        if isinstance(result, VersionConflictError):
+            errors[i] = str(result)
+        elif result is not None:
+            succeeded[i] = result.id
+    return _batch_result(len(items), errors, succeeded)
+
+
+@router.post("/tasks:batchDelete", response_model=BatchResult, response_model_exclude_none=True, tags=["批量操作"])
+async def delete_tasks_batch(request: TaskBatchDelete):
+    """批量删除任务"""
+    if len(request.ids) > settings.MAX_BATCH_SIZE:
+        raise HTTPException(status_code=413, detail=f"单次批量操作最多 {settings.MAX_BATCH_SIZE} 条")
+    deleted = await _call(task_service.delete_tasks, request.ids)
+    return _batch_result(len(request.ids), {}, {
+        i: task_id for i, (task_id, ok) in enumerate(zip(request.ids, deleted)) if ok
+    })
+
+
 @router.get("/tasks", response_model=TaskList, tags=["任务管理"])
 async def get_tasks(
+    request: Request,
+    response: Response,
     page: int = Query(1, ge=1, description="页码"),
     page_size: int = Query(10, ge=1, le=100, description="每页数量"),
     status: Optional[TaskStatus] = Query(None, description="任务状态筛选"),
-    priority: Optional[str] = Query(None, description="优先级筛选")
+    priority: Optional[str] = Query(None, description="优先级筛选"),
+    due_after: Optional[datetime] = Query(None, description="截止日期不早于该时间"),
+    due_before: Optional[datetime] = Query(None, description="截止日期早于该时间"),
+    cursor: Optional[str] = Query(None, description="分页游标（上一页返回的 next_cursor），指定后忽略 page"),
+    fields: Optional[str] = Query(None, description="只返回指定字段，逗号分隔，如 id,title,status（总是包含 id）")
 ):
-    """获取任务列表"""
+    """
+    获取任务列表（支持 If-None-Match，数据未变化时返回 304）
+
+    指定 fields 时存储后端只读取这些列，不构建完整任务模型
+    """
+    projection = _parse_fields(fields)
+    etag = weak_etag(task_service.epoch, "list", await _call(task_service.get_data_version))
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag})
+    response.headers["ETag"] = etag
+
+    before = None
+    if cursor:
+        try:
+            before = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+
     try:
-        skip = (page - 1) * page_size
-        tasks = task_service.get_tasks(
-            skip=skip,
-            limit=page_size,
+        # 多取一条用于判断是否还有下一页
+        query = dict(
+            skip=0 if before else (page - 1) * page_size,
+            limit=page_size + 1,
+            status=status,
+            priority=priority,
+            before=before,
+            due_after=due_after,
+            due_before=due_before
+        )
+        if projection is None:
+            tasks = await _call(task_service.get_tasks, **query)
+        else:
+            tasks = await _call(task_service.get_tasks_projection, _with_extra(projection, "created_at"), **query)
+        next_cursor = None
+        if len(tasks) > page_size:
+            tasks = tasks[:page_size]
+            last = tasks[-1]
+            next_cursor = (
+                encode_cursor(last.created_at, last.id) if projection is None
+                else encode_cursor(last["created_at"], last["id"])
+            )
+        total = await _call(
+            task_service.count_tasks,
             status=status,
-            priority=priority
+            priority=priority,
+            due_after=due_after,
+            due_before=due_before
         )
-        total = len(task_service.get_tasks())
+        pages = (total + page_size - 1) // page_size
 
+        if projection is None:
+            return TaskList(
+                items=tasks,
+                total=total,
+                page=page,
+                page_size=page_size,
+                pages=pages,
+                next_cursor=next_cursor
+            )
+
+        if "created_at" not in projection:
+            for task in tasks:
+                del task["created_at"]
+        body = dumps({
+            "items": tasks,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            "pages": pages,
+            "next_cursor": next_cursor,
+        })
+        return Response(content=body, media_type="application/json", headers={"ETag": etag})
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取任务列表失败: {str(e)}")
+
+
+@router.get("/tasks/export", tags=["任务导出"])
+async def export_tasks(
+    format: ExportFormat = Query(ExportFormat.NDJSON, description="导出格式"),
+    status: Optional[TaskStatus] = Query(None, description="任务状态筛选"),
+    priority: Optional[str] = Query(None, description="优先级筛选")
+):
+    """流式导出任务（按创建时间倒序），边读边发送，内存占用恒定"""
+    if format == ExportFormat.PARQUET and not parquet_available():
+        raise HTTPException(status_code=400, detail="导出 Parquet 需要安装 pyarrow")
+
+    encoder, media_type = _EXPORTERS[format]
+    batches = task_service.iter_task_batches(
+        status=status,
+        priority=priority,
+        batch_size=settings.EXPORT_BATCH_SIZE
+    )
+
+    # 读取和编码都是同步的，每一块都在线程池中生成，不阻塞事件循环
+    return StreamingResponse(
+        iterate_in_threadpool(encoder(batches)),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="tasks.{format.value}"'}
+    )
+
+
+# 固定路径需注册在 /tasks/{task_id} 之前，否则会被当作 task_id 匹配
+@router.get("/tasks/stats", response_model=TaskStats, tags=["任务统计"])
+async def get_task_stats():
+    """获取任务统计"""
+    try:
+        stats = await _call(task_service.get_task_stats)
+        return stats
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取统计信息失败: {str(e)}")
+
+
+@router.get("/tasks/aggregate", response_model=TaskAggregate, response_model_exclude_none=True, tags=["任务统计"])
+async def aggregate_tasks(
+    group_by: Optional[str] = Query(None, description="分组字段，逗号分隔：status、priority"),
+    bucket: Optional[str] = Query(None, description="时间分桶，如 created_at:day、updated_at:week、due_date:month"),
+    status: Optional[TaskStatus] = Query(None, description="任务状态筛选"),
+    priority: Optional[str] = Query(None, description="优先级筛选"),
+    since: Optional[date] = Query(None, description="分桶字段的起始日期（含）"),
+    until: Optional[date] = Query(None, description="分桶字段的结束日期（不含）")
+):
+    """
+    分组聚合统计
+
+    由存储维护的计数和按天直方图计算，耗时与任务总数无关；
+    例如每日完成数：bucket=updated_at:day&status=completed
+    """
+    fields = _parse_group_by(group_by)
+    parsed_bucket = _parse_bucket(bucket)
+    if parsed_bucket is None and (since is not None or until is not None):
+        raise HTTPException(status_code=400, detail="since/until 需要配合 bucket 使用")
+    try:
+        return await _call(task_service.aggregate_tasks, fields, parsed_bucket, status, priority, since, until)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"聚合统计失败: {str(e)}")
+
+
+@router.get("/tasks/upcoming", response_model=TaskFeed, tags=["任务管理"])
+async def get_upcoming_tasks(
+    due_after: Optional[datetime] = Query(None, description="时间窗口起点（含），默认当前时间"),
+    due_before: Optional[datetime] = Query(None, description="时间窗口终点（不含），默认起点后 24 小时"),
+    status: Optional[TaskStatus] = Query(None, description="任务状态筛选，默认只含待处理和进行中的任务"),
+    priority: Optional[str] = Query(None, description="优先级筛选"),
+    limit: int = Query(100, ge=1, le=1000, description="返回数量"),
+    cursor: Optional[str] = Query(None, description="分页游标（上一页返回的 next_cursor）")
+):
+    """即将到期的任务，按截止日期升序，只读取截止日期索引中时间窗口内的部分"""
+    after = None
+    if cursor:
+        try:
+            after = decode_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    if due_after is None:
+        due_after = datetime.now()
+    if due_before is None:
+        due_before = due_after + timedelta(hours=24)
+
+    try:
+        statuses = (status,) if status else (TaskStatus.PENDING, TaskStatus.IN_PROGRESS)
+        tasks = await _call(
+            task_service.get_upcoming_tasks,
+            due_after=due_after,
+            due_before=due_before,
+            statuses=statuses,
+            priority=priority,
+            limit=limit + 1,
+            after=after
+        )
+        next_cursor = None
+        if len(tasks) > limit:
+            tasks = tasks[:limit]
+            next_cursor = encode_cursor(to_local_naive(tasks[-1].due_date), tasks[-1].id)
+        return TaskFeed(items=tasks, next_cursor=next_cursor)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"获取即将到期任务失败: {str(e)}")
+
+
+@router.get("/tasks/search", response_model=TaskList, tags=["任务管理"])
+async def search_tasks(
+    q: str = Query(..., min_length=1, max_length=200, description="搜索词，多个词之间为 AND，英文单词后加 * 为前缀查询"),
+    page: int = Query(1, ge=1, description="页码"),
+    page_size: int = Query(10, ge=1, le=100, description="每页数量")
+):
+    """全文搜索任务标题和描述（中文按二元组、英文按单词匹配），按 BM25 相关度排序"""
+    try:
+        total, tasks = await _call(task_service.search_tasks, q, skip=(page - 1) * page_size, limit=page_size)
         return TaskList(
             items=tasks,
             total=total,
@@ -46,22 +439,140 @@ async def get_tasks(
             pages=(total + page_size - 1) // page_size
         )
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取任务列表失败: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"搜索任务失败: {str(e)}")
+
+
+@router.get("/tasks/changes", response_model=TaskChangeList, tags=["变更同步"])
+async def get_changes(
+    since: Optional[int] = Query(None, ge=0, description="上次返回的 last_seq；不指定时只返回当前最新序号"),
+    epoch: Optional[str] = Query(None, description="上次返回的 epoch，与当前不一致时返回 410"),
+    limit: int = Query(1000, ge=1, le=10000, description="返回数量")
+):
+    """
+    增量获取任务变更（按序号升序）
+
+    首次同步：先不带 since 调用记下 last_seq，再全量拉取 GET /tasks，之后用 since 增量拉取。
+    since 之后的变更已过期（超出保留条数）或服务已重启时返回 410，需重新全量同步
+    """
+    _require_changes()
+    current_epoch = task_service.change_epoch
+    if since is None:
+        last_seq = await _call(task_service.get_last_change_seq)
+        return TaskChangeList(epoch=current_epoch, changes=[], last_seq=last_seq)
+
+    changes = await _call(task_service.get_changes, since, limit) if epoch in (None, current_epoch) else None
+    if changes is None:
+        raise HTTPException(status_code=410, detail="变更记录已过期，请重新全量同步")
+    return TaskChangeList(
+        epoch=current_epoch,
+        changes=changes,
+        last_seq=changes[-1].seq if changes else since
+    )
+
+
+@router.get("/tasks/changes/stream", tags=["变更同步"])
+async def stream_changes(
+    request: Request,
+    since: Optional[int] = Query(None, ge=0, description="从该序号之后开始推送，不指定时只推送新变更")
+):
+    """
+    以 Server-Sent Events 推送任务变更
+
+    事件类型为 created / updated / deleted，事件 ID 为 "epoch:seq"，断线重连时浏览器自动携带
+    Last-Event-ID 续传；无法续传时推送 reset 事件并关闭连接，客户端需重新全量同步
+    """
+    _require_changes()
+    epoch = task_service.change_epoch
+    cursor = since if since is not None else await _call(task_service.get_last_change_seq)
+    last_event_id = request.headers.get("last-event-id")
+    if last_event_id:
+        last_epoch, _, last_seq = last_event_id.partition(":")
+        cursor = int(last_seq) if last_epoch == epoch and last_seq.isdigit() else -1
+
+    async def events():
+        position = cursor
+        while True:
+            # 按发送进度拉取：上一批写入连接（受 TCP 流控约束）后才读取下一批，
+            # 慢客户端只会落后而不会在服务端堆积数据
+            changes = await _call(task_service.get_changes, position, _STREAM_BATCH_SIZE)
+            if changes is None:
+                reset = {"epoch": epoch, "last_seq": await _call(task_service.get_last_change_seq)}
+                yield f"event: reset\ndata: {json.dumps(reset)}\n\n"
+                return
+            if changes:
+                position = changes[-1].seq
+                yield "".join(
+                    f"id: {epoch}:{change.seq}\nevent: {change.type.value}\ndata: {change.model_dump_json()}\n\n"
+                    for change in changes
+                )
+            elif not await task_service.wait_for_changes(position, settings.CHANGE_STREAM_HEARTBEAT):
+                # 心跳注释，防止代理因空闲断开连接
+                yield ": keepalive\n\n"
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
 
 
 @router.get("/tasks/{task_id}", response_model=Task, tags=["任务管理"])
-async def get_task(task_id: int):
-    """获取单个任务"""
-    task = task_service.get_task(task_id)
-    if not task:
+async def get_task(
+    task_id: int,
+    request: Request,
+    fields: Optional[str] = Query(None, description="只返回指定字段，逗号分隔，如 id,title,status（总是包含 id）")
+):
+    """
+    获取单个任务
+
+    直接返回缓存的 JSON 字节（客户端接受压缩时返回缓存的压缩字节）；
+    指定 fields 时只读取这些列，不经过缓存。
+    支持 If-None-Match，任务未变化时返回 304
+    """
+    projection = _parse_fields(fields)
+    if projection is not None:
+        # 版本号与字段一起读取，ETag 与内容对应同一版本
+        task = await _call(task_service.get_task_projection, task_id, _with_extra(projection, "version"))
+        if task is None:
+            raise HTTPException(status_code=404, detail="任务不存在")
+        etag = weak_etag(task_service.epoch, task_id, task["version"])
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers={"ETag": etag})
+        if "version" not in projection:
+            del task["version"]
+        return Response(content=dumps(task), media_type="application/json", headers={"ETag": etag})
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # 条件请求先只比较版本号，命中时不读取缓存、不序列化也不压缩
+        version = await _call(task_service.get_task_version, task_id)
+        if version is None:
+            raise HTTPException(status_code=404, detail="任务不存在")
+        etag = weak_etag(task_service.epoch, task_id, version)
+        if etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag})
+
+    encoding = negotiate(request.headers.get("accept-encoding")) if settings.COMPRESSION_ENABLED else None
+    cached = await _call(task_service.get_task_json, task_id, encoding)
+    if cached is None:
         raise HTTPException(status_code=404, detail="任务不存在")
-    return task
+
+    # ETag 取自与字节对应的版本号（两次读取之间任务可能已被更新）
+    version, body, content_encoding = cached
+    headers = {"ETag": weak_etag(task_service.epoch, task_id, version)}
+    if content_encoding is not None:
+        headers["Content-Encoding"] = content_encoding
+        headers["Vary"] = "Accept-Encoding"
+    return Response(content=body, media_type="application/json", headers=headers)
 
 
 @router.put("/tasks/{task_id}", response_model=Task, tags=["任务管理"])
 async def update_task(task_id: int, task_update: TaskUpdate):
-    """更新任务"""
-    task = task_service.update_task(task_id, task_update)
+    """更新任务（带 expected_version 时版本不一致返回 409）"""
+    try:
+        task = await _call(task_service.update_task, task_id, task_update)
+    except VersionConflictError as e:
+        raise HTTPException(status_code=409, detail=str(e))
     if not task:
         raise HTTPException(status_code=404, detail="任务不存在")
     return task
@@ -70,41 +581,31 @@ async def update_task(task_id: int, task_update: TaskUpdate):
 @router.delete("/tasks/{task_id}", status_code=204, tags=["任务管理"])
 async def delete_task(task_id: int):
     """删除任务"""
-    success = task_service.delete_task(task_id)
+    success = await _call(task_service.delete_task, task_id)
     if not success:
         raise HTTPException(status_code=404, detail="任务不存在")
     return {"message": "任务删除成功"}
 
 
-@router.get("/tasks/stats", response_model=TaskStats, tags=["任务统计"])
-async def get_task_stats():
-    """获取任务统计"""
-    try:
-        stats = task_service.get_task_stats()
-        return stats
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"获取统计信息失败: {str(e)}")
-
-
 @router.post("/tasks/{task_id}/complete", response_model=Task, tags=["任务管理"])
 async def complete_task(task_id: int):
     """完成任务"""
-    task = task_service.get_task(task_id)
+    task = await _call(task_service.get_task, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="任务不存在")
 
     update_data = TaskUpdate(status=TaskStatus.COMPLETED)
-    updated_task = task_service.update_task(task_id, update_data)
+    updated_task = await _call(task_service.update_task, task_id, update_data)
     return updated_task
 
 
 @router.post("/tasks/{task_id}/start", response_model=Task, tags=["任务管理"])
 async def start_task(task_id: int):
     """开始任务"""
-    task = task_service.get_task(task_id)
+    task = await _call(task_service.get_task, task_id)
     if not task:
         raise HTTPException(status_code=404, detail="任务不存在")
 
     update_data = TaskUpdate(status=TaskStatus.IN_PROGRESS)
-    updated_task = task_service.update_task(task_id, update_data)
+    updated_task = await _call(task_service.update_task, task_id, update_data)
     return updated_task
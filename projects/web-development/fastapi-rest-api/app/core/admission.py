@@ -0,0 +1,246 @@
+"""
+准入控制
+按路由类别限制并发数，超出的请求在有界队列中等待，队列满或等待超时时立即拒绝（503），
+并按客户端进行令牌桶限流（429），避免流量突增时请求在事件循环中无限堆积拖垮所有请求的延迟
+"""
+
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict, deque
+from typing import Any, Deque, Dict, Optional
+
+# 不参与并发限制的路径后缀：SSE 长连接和采样分析会长时间占用并发数，分别由连接数和管理员密钥约束
+_UNLIMITED_SUFFIXES = ("/changes/stream", "/admin/profile")
+
+
+def route_class(method: str, path: str) -> str:
+    """
+    请求所属的路由类别（在路由匹配之前按路径判断）：read / write / search / export
+
+    导出和搜索开销大、耗时长，与普通读写分开限制，避免占满并发挤占单任务读取
+    """
+    if path.endswith("/tasks/export"):
+        return "export"
+    if path.endswith("/tasks/search"):
+        return "search"
+    if method in ("GET", "HEAD"):
+        return "read"
+    return "write"
+
+
+class ConcurrencyLimiter:
+    """
+    单个路由类别的并发限制
+
+    释放时把并发数直接转交给队首的等待者，先到先得，新请求不会插队
+    """
+
+    def __init__(self, limit: int, queue_size: int, timeout: float):
+        self.limit = limit
+        self.queue_size = queue_size
+        self.timeout = timeout
+        self.active = 0
+        self._waiters: Deque[asyncio.Future] = deque()
+        self.admitted = 0
+        self.queued = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    async def acquire(self) -> Optional[str]:
+        """获得执行许可返回 None，被拒绝时返回原因（queue_full / timeout）"""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return None
+        if len(self._waiters) >= self.queue_size:
+            self.rejected += 1
+            return "queue_full"
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(future, self.timeout)
+            return None
+        except asyncio.TimeoutError:
+            # 超时的同时恰好被转交了许可，照常执行
+            if not future.cancelled():
+                return None
+            self._discard(future)
+            self.timed_out += 1
+            return "timeout"
+        except asyncio.CancelledError:
+            # 客户端断开：已转交的许可要还回去
+            if future.done() and not future.cancelled():
+                self.release()
+            else:
+                self._discard(future)
+            raise
+
+    def release(self) -> None:
+        while self._waiters:
+            future = self._waiters.popleft()
+            if not future.done():
+                future.set_result(None)
+                self.admitted += 1
+                return
+        self.active -= 1
+
+    def _discard(self, future: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(future)
+        except ValueError:
+            pass
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "waiting": len(self._waiters),
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+class TokenBucketLimiter:
+    """
+    按客户端的令牌桶限流
+
+    每个客户端以 rate 个/秒的速度补充令牌，最多积累 burst 个；
+    只保留最近访问的 max_clients 个客户端，被淘汰的客户端下次访问时按满桶计
+    """
+
+    def __init__(self, rate: float, burst: int, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        # 客户端 -> (剩余令牌数, 上次补充时间)
+        self._buckets: OrderedDict = OrderedDict()
+        self.limited = 0
+
+    def acquire(self, key: str) -> float:
+        """取一个令牌，成功返回 0，否则返回需要等待的秒数"""
+        now = time.monotonic()
+        tokens, last = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / self.rate
+            self.limited += 1
+        self._buckets[key] = (tokens, now)
+        if len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return wait
+
+    def stats(self) -> Dict[str, int]:
+        return {"clients": len(self._buckets), "limited": self.limited}
+
+
+def client_address(scope) -> str:
+    """请求的客户端地址，未知时为空字符串"""
+    client = scope.get("client")
+    return client[0] if client else ""
+
+
+class AdmissionController:
+    """各路由类别的并发限制和客户端限流，limit 为 0 的类别不限制，rate 为 0 时不限流"""
+
+    def __init__(
+        self,
+        limits: Dict[str, int],
+        queue_size: int = 128,
+        queue_timeout: float = 1.0,
+        rate: float = 0.0,
+        burst: int = 100,
+        key_header: Optional[str] = None
+    ):
+        self.limiters = {
+            name: ConcurrencyLimiter(limit, queue_size, queue_timeout)
+            for name, limit in limits.items() if limit > 0
+        }
+        self.rate_limiter = TokenBucketLimiter(rate, burst) if rate > 0 else None
+        self.key_header = key_header.lower().encode("latin-1") if key_header else None
+        self.retry_after = max(1, math.ceil(queue_timeout))
+
+    def client_key(self, scope) -> str:
+        """
+        限流的客户端标识：配置了 key_header 时取该请求头（应由可信的网关设置），否则取客户端地址
+
+        客户端可以任意设置请求头，直接暴露在公网时不要按请求头限流
+        """
+        if self.key_header:
+            for name, value in scope["headers"]:
+                if name == self.key_header:
+                    return value.decode("latin-1")
+        return client_address(scope)
+
+    def stats(self) -> Dict[str, Any]:
+        stats: Dict[str, Any] = {name: limiter.stats() for name, limiter in self.limiters.items()}
+        if self.rate_limiter is not None:
+            stats["rate_limit"] = self.rate_limiter.stats()
+        return stats
+
+
+async def _reject(send, status: int, message: str, retry_after: float) -> None:
+    body = json.dumps(
+        {"error": {"code": status, "message": message, "type": "HTTPException"}},
+        ensure_ascii=False
+    ).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+class AdmissionMiddleware:
+    """
+    准入控制中间件（纯 ASGI 实现）
+
+    只处理 prefix 下的 API 请求，先限流再按路由类别获取并发许可，
+    许可在响应（包括流式响应）发送完毕后释放
+    """
+
+    def __init__(self, app, controller: AdmissionController, prefix: str = ""):
+        self.app = app
+        self.controller = controller
+        self.prefix = prefix
+
+    async def __call__(self, scope, receive, send):
+        path = scope.get("path", "")
+        if scope["type"] != "http" or scope["method"] == "OPTIONS" or not path.startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+
+        rate_limiter = self.controller.rate_limiter
+        if rate_limiter is not None:
+            wait = rate_limiter.acquire(self.controller.client_key(scope))
+            if wait:
+                await _reject(send, 429, "请求过于频繁，请稍后重试", wait)
+                return
+
+        limiter = None
+        if not path.endswith(_UNLIMITED_SUFFIXES):
+            limiter = self.controller.limiters.get(route_class(scope["method"], path))
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        if await limiter.acquire() is not None:
+            await _reject(send, 503, "服务繁忙，请稍后重试", self.controller.retry_after)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release()
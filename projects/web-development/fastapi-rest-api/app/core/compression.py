@@ -0,0 +1,195 @@
+"""
+响应压缩
+按 Accept-Encoding 协商 br / gzip，小响应不压缩，流式响应逐块压缩并立即发送
+"""
+
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli 为可选依赖
+    try:
+        import brotlicffi as brotli
+    except ImportError:
+        brotli = None
+
+# 动态内容的压缩级别：gzip 6 与 brotli 4 的压缩率接近，brotli 更快
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+# 按优先级排列，q 值相同时优先 br
+SUPPORTED_ENCODINGS: Tuple[str, ...] = ("br", "gzip") if brotli is not None else ("gzip",)
+
+# 只压缩文本类响应；Parquet 已经压缩，SSE 需要逐条送达，均不处理
+COMPRESSIBLE_TYPES = ("application/json", "application/x-ndjson", "text/csv", "text/plain")
+
+
+def negotiate(accept_encoding: Optional[str]) -> Optional[str]:
+    """根据 Accept-Encoding 选择编码，客户端不接受任何支持的编码时返回 None"""
+    if not accept_encoding:
+        return None
+    weights: Dict[str, float] = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        weights[name.strip().lower()] = quality
+
+    best, best_quality = None, 0.0
+    for encoding in SUPPORTED_ENCODINGS:
+        quality = weights.get(encoding, weights.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    """一次性压缩完整响应体"""
+    if encoding == "br":
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return zlib.compress(body, GZIP_LEVEL, wbits=31)
+
+
+class StreamCompressor:
+    """
+    流式压缩器
+
+    每块数据压缩后立即 flush，客户端可以边下载边解压，
+    服务端不需要缓冲完整响应
+    """
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._compressor = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, chunk: bytes) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.process(chunk) + self._compressor.flush()
+        return self._compressor.compress(chunk) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self._compressor.finish()
+        return self._compressor.flush(zlib.Z_FINISH)
+
+
+def _is_compressible(headers: List[Tuple[bytes, bytes]]) -> bool:
+    for name, value in headers:
+        if name == b"content-type":
+            return value.decode("latin-1").split(";")[0].strip() in COMPRESSIBLE_TYPES
+    return False
+
+
+def _add_vary(headers: List[Tuple[bytes, bytes]]) -> List[Tuple[bytes, bytes]]:
+    for index, (name, value) in enumerate(headers):
+        if name == b"vary":
+            if b"accept-encoding" in value.lower():
+                return headers
+            headers[index] = (name, value + b", Accept-Encoding")
+            return headers
+    headers.append((b"vary", b"Accept-Encoding"))
+    return headers
+
+
+class CompressionMiddleware:
+    """
+    响应压缩中间件（纯 ASGI 实现）
+
+    - 已设置 Content-Encoding 的响应（如缓存的预压缩字节）原样发送
+    - 一次性发送的响应体小于 minimum_size 时不压缩，压缩收益抵不过 CPU 开销
+    - 流式响应（如导出）逐块压缩，去掉 Content-Length 改为分块传输
+    """
+
+    def __init__(self, app, minimum_size: int = 500):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        accept_encoding = None
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept_encoding = value.decode("latin-1")
+                break
+        encoding = negotiate(accept_encoding)
+
+        start_message = None
+        compressor: Optional[StreamCompressor] = None
+        passthrough = False
+
+        async def send_compressed(message):
+            nonlocal start_message, compressor, passthrough
+            if passthrough:
+                await send(message)
+                return
+
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                if (
+                    not _is_compressible(headers)
+                    or any(name == b"content-encoding" for name, _ in headers)
+                    or message["status"] in (204, 304)
+                ):
+                    passthrough = True
+                    await send(message)
+                    return
+                # 可压缩的响应无论本次是否压缩都要声明 Vary，避免缓存把压缩版本发给不支持的客户端
+                message["headers"] = _add_vary(headers)
+                if encoding is None:
+                    passthrough = True
+                    await send(message)
+                    return
+                # 等第一块响应体到达后才能决定是否压缩
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if compressor is None:
+                headers = [
+                    (name, value) for name, value in start_message["headers"]
+                    if name != b"content-length"
+                ]
+                if not more_body:
+                    if len(body) < self.minimum_size:
+                        passthrough = True
+                        await send(start_message)
+                        await send(message)
+                        return
+                    body = compress(body, encoding)
+                    headers.append((b"content-encoding", encoding.encode()))
+                    headers.append((b"content-length", str(len(body)).encode()))
+                    start_message["headers"] = headers
+                    await send(start_message)
+                    await send({"type": "http.response.body", "body": body})
+                    return
+                compressor = StreamCompressor(encoding)
+                headers.append((b"content-encoding", encoding.encode()))
+                start_message["headers"] = headers
+                await send(start_message)
+
+            data = compressor.compress(body) if body else b""
+            if not more_body:
+                data += compressor.finish()
+            if data or not more_body:
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
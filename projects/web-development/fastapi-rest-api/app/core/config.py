@@ -4,7 +4,9 @@
 
 import os
 from typing import List, Optional
-from pydantic import BaseSettings
+from pydantic_settings import BaseSettings
+
+DEFAULT_SECRET_KEY = "your-secret-key-change-in-production"
 
 
 class Settings(BaseSettings):
@@ -17,19 +19,82 @@ class Settings(BaseSettings):
     HOST: str = "0.0.0.0"
     PORT: int = 8000
 
+    # 默认 JSON 响应类：fast（orjson，未安装时回退标准库）或 default（Starlette JSONResponse）
+    JSON_RESPONSE_CLASS: str = "fast"
+
     # CORS 配置
     ALLOWED_HOSTS: List[str] = ["*"]
 
     # 数据库配置（可选）
+    # 未配置时使用内存存储；memory:///data 为持久化到 data 目录的内存存储；
+    # sqlite:///tasks.db 使用 SQLite 持久化存储
     DATABASE_URL: Optional[str] = None
+    DATABASE_POOL_SIZE: int = 5
+
+    # 内存存储持久化配置（日志 fsync 间隔秒数、写入是否等待 fsync、快照间隔秒数和触发快照的日志字节数）
+    WAL_FSYNC_INTERVAL: float = 0.01
+    WAL_SYNC_COMMIT: bool = False
+    SNAPSHOT_INTERVAL: float = 300.0
+    SNAPSHOT_WAL_BYTES: int = 64 * 1024 * 1024
 
     # 密钥配置
-    SECRET_KEY: str = os.getenv("SECRET_KEY", "your-secret-key-change-in-production")
+    SECRET_KEY: str = os.getenv("SECRET_KEY", DEFAULT_SECRET_KEY)
 
     # 分页配置
     DEFAULT_PAGE_SIZE: int = 10
     MAX_PAGE_SIZE: int = 100
 
+    # 批量操作配置
+    MAX_BATCH_SIZE: int = 10000
+
+    # 响应缓存配置（单个任务的 JSON 字节，0 表示关闭）
+    RESPONSE_CACHE_MAX_ENTRIES: int = 10000
+    RESPONSE_CACHE_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # 响应压缩配置（按 Accept-Encoding 协商 br / gzip，小于阈值的响应不压缩）
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MINIMUM_SIZE: int = 500
+
+    # 准入控制配置：各路由类别的最大并发数（0 表示不限制），超出时排队，
+    # 每个类别的等待队列长度和最长等待秒数，队列满或超时返回 503
+    ADMISSION_ENABLED: bool = True
+    ADMISSION_READ_LIMIT: int = 64
+    ADMISSION_WRITE_LIMIT: int = 32
+    ADMISSION_SEARCH_LIMIT: int = 8
+    ADMISSION_EXPORT_LIMIT: int = 2
+    ADMISSION_QUEUE_SIZE: int = 256
+    ADMISSION_QUEUE_TIMEOUT: float = 1.0
+
+    # 限流配置：每个客户端每秒的请求数（0 表示不限流）和突发上限，超出返回 429；
+    # 客户端默认按地址区分，RATE_LIMIT_KEY_HEADER 指定由可信网关设置的请求头（如 X-API-Key）
+    RATE_LIMIT_PER_SECOND: float = 0.0
+    RATE_LIMIT_BURST: int = 100
+    RATE_LIMIT_KEY_HEADER: Optional[str] = None
+
+    # 幂等键配置：带 Idempotency-Key 的 POST 请求缓存首次响应（5xx 除外）的有效秒数、条数和字节上限，
+    # 单个响应超过 IDEMPOTENCY_MAX_RESPONSE_BYTES 字节时不缓存
+    IDEMPOTENCY_ENABLED: bool = True
+    IDEMPOTENCY_TTL: float = 24 * 3600.0
+    IDEMPOTENCY_MAX_ENTRIES: int = 100000
+    IDEMPOTENCY_MAX_BYTES: int = 64 * 1024 * 1024
+    IDEMPOTENCY_MAX_RESPONSE_BYTES: int = 64 * 1024
+
+    # 导出配置（每批从存储读取的任务数）
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # 监控指标配置（/metrics，Prometheus 文本格式）
+    METRICS_ENABLED: bool = True
+
+    # 性能分析配置（默认关闭；开启后需配置 SECRET_KEY，请求头 X-Admin-Token 携带密钥访问）
+    PROFILING_ENABLED: bool = False
+    PROFILING_MAX_SECONDS: int = 60
+
+    # 变更日志配置（保留最近的条数，SSE 心跳间隔秒数，
+    # 日志保存在数据库中时 SSE 轮询其他 worker 写入的间隔秒数）
+    CHANGE_LOG_MAX_ENTRIES: int = 10000
+    CHANGE_STREAM_HEARTBEAT: float = 15.0
+    CHANGE_POLL_INTERVAL: float = 0.5
+
     class Config:
         env_file = ".env"
 
@@ -0,0 +1,21 @@
+"""
+ETag 工具
+生成弱 ETag 并处理 If-None-Match 条件请求
+"""
+
+from typing import Optional
+
+
+def weak_etag(*parts) -> str:
+    """由版本信息拼接弱 ETag"""
+    return 'W/"' + "-".join(str(part) for part in parts) + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match 是否命中（弱比较，忽略 W/ 前缀）"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    target = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == target for tag in if_none_match.split(","))
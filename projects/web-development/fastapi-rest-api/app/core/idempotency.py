@@ -0,0 +1,228 @@
+"""
+幂等键
+POST 请求携带 Idempotency-Key 时缓存首次响应，客户端超时重试直接返回缓存的字节，
+不再解析、校验请求体，也不再执行业务逻辑；同一个键的并发请求只执行一次（single-flight）
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+from app.core.admission import client_address
+
+IDEMPOTENCY_HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+# 请求超时与限流属于暂时性失败，即使来自处理函数也不缓存
+_TRANSIENT_STATUSES = frozenset({408, 429})
+
+# 缓存键：(客户端标识, 请求路径, 幂等键)，不同客户端或不同端点使用同一个键时互不影响
+CacheKey = Tuple[str, str, str]
+
+
+class StoredResponse(NamedTuple):
+    """首次请求的响应，fingerprint 为请求体的摘要"""
+    expires_at: float
+    fingerprint: bytes
+    status: int
+    headers: List[Tuple[bytes, bytes]]
+    body: bytes
+
+
+class IdempotencyCache:
+    """
+    幂等键 → 首次响应的有界缓存（只在事件循环中使用，无需加锁）
+
+    所有条目的有效期相同，插入顺序即过期顺序，过期条目从头部淘汰；
+    超出条数或字节上限时同样从最早的条目开始淘汰
+    """
+
+    def __init__(self, ttl: float = 86400.0, max_entries: int = 100000, max_bytes: int = 64 * 1024 * 1024):
+        self._ttl = ttl
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries: "OrderedDict[CacheKey, StoredResponse]" = OrderedDict()
+        self._bytes = 0
+        # 正在执行的首个请求，重复请求等待其完成
+        self.inflight: Dict[CacheKey, asyncio.Future] = {}
+        self.executed = 0
+        self.replayed = 0
+        self.waited = 0
+        self.mismatched = 0
+
+    def get(self, key: CacheKey) -> Optional[StoredResponse]:
+        now = time.monotonic()
+        self._expire(now)
+        entry = self._entries.get(key)
+        if entry is None or entry.expires_at <= now:
+            return None
+        return entry
+
+    def put(self, key: CacheKey, fingerprint: bytes, status: int, headers: List[Tuple[bytes, bytes]], body: bytes) -> None:
+        if self._max_entries <= 0 or len(body) > self._max_bytes:
+            return
+        now = time.monotonic()
+        self._expire(now)
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous.body)
+        self._entries[key] = StoredResponse(now + self._ttl, fingerprint, status, headers, body)
+        self._bytes += len(body)
+        while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted.body)
+
+    def _expire(self, now: float) -> None:
+        while self._entries:
+            key, entry = next(iter(self._entries.items()))
+            if entry.expires_at > now:
+                return
+            del self._entries[key]
+            self._bytes -= len(entry.body)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "inflight": len(self.inflight),
+            "executed": self.executed,
+            "replayed": self.replayed,
+            "waited": self.waited,
+            "mismatched": self.mismatched,
+        }
+
+
+async def _error(send, status: int, message: str) -> None:
+    body = json.dumps(
+        {"error": {"code": status, "message": message, "type": "HTTPException"}},
+        ensure_ascii=False
+    ).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+def _storable(scope, status: int) -> bool:
+    """路由匹配后才会写入 scope["route"]，借此区分处理函数的响应与准入控制等外层的拒绝"""
+    return "route" in scope and status < 500 and status not in _TRANSIENT_STATUSES
+
+
+class IdempotencyMiddleware:
+    """
+    幂等键中间件（纯 ASGI 实现）
+
+    - prefix 下带 Idempotency-Key 的 POST 请求：首次执行并缓存处理函数给出的 2xx/4xx 响应，
+      重复请求返回缓存的状态码、响应头和字节，并带 Idempotent-Replayed: true
+    - 不缓存 5xx、408/429 以及未到达路由的响应（准入控制的 503/429、未匹配的路径），
+      这些都是暂时性的，客户端重试时应重新执行
+    - 同一个键的请求正在执行时，重复请求等待其完成后直接返回其响应
+    - 同一个键对应的请求体不同时返回 422，避免误把不同的请求当作重试
+    - 响应体超过 max_response_bytes 时不缓存
+    - 键按客户端隔离：client_key 给出客户端标识（默认为客户端地址，应用中与限流使用同一标识），
+      不同客户端用了相同的键互不影响，也不能凭猜到的键取回其他客户端的响应
+    """
+
+    def __init__(
+        self,
+        app,
+        cache: IdempotencyCache,
+        prefix: str = "",
+        max_response_bytes: int = 64 * 1024,
+        client_key: Callable[[Any], str] = client_address
+    ):
+        self.app = app
+        self.cache = cache
+        self.prefix = prefix
+        self.max_response_bytes = max_response_bytes
+        self.client_key = client_key
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or not scope["path"].startswith(self.prefix):
+            await self.app(scope, receive, send)
+            return
+        key = None
+        for name, value in scope["headers"]:
+            if name == IDEMPOTENCY_HEADER:
+                key = value.decode("latin-1").strip()
+                break
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not key or len(key) > MAX_KEY_LENGTH:
+            await _error(send, 400, f"Idempotency-Key 长度需为 1 ~ {MAX_KEY_LENGTH} 个字符")
+            return
+
+        # 读完请求体用于比较，之后原样交给应用
+        chunks: List[bytes] = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+        fingerprint = hashlib.sha256(body).digest()
+        cache_key = (self.client_key(scope), scope["path"], key)
+
+        while True:
+            stored = self.cache.get(cache_key)
+            if stored is not None:
+                if stored.fingerprint != fingerprint:
+                    self.cache.mismatched += 1
+                    await _error(send, 422, "Idempotency-Key 已用于不同的请求")
+                    return
+                self.cache.replayed += 1
+                await send({
+                    "type": "http.response.start",
+                    "status": stored.status,
+                    "headers": [*stored.headers, (b"idempotent-replayed", b"true")],
+                })
+                await send({"type": "http.response.body", "body": stored.body})
+                return
+            pending = self.cache.inflight.get(cache_key)
+            if pending is None:
+                break
+            # 首个请求失败（未缓存）时，等待者中的一个会重新执行
+            self.cache.waited += 1
+            await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self.cache.inflight[cache_key] = future
+        self.cache.executed += 1
+        body_sent = False
+        response: Dict[str, Any] = {"status": 500, "headers": [], "chunks": [], "size": 0}
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = list(message.get("headers", []))
+            elif message["type"] == "http.response.body" and response["chunks"] is not None:
+                chunk = message.get("body", b"")
+                response["size"] += len(chunk)
+                if response["size"] > self.max_response_bytes:
+                    response["chunks"] = None
+                else:
+                    response["chunks"].append(chunk)
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+            if _storable(scope, response["status"]) and response["chunks"] is not None:
+                self.cache.put(
+                    cache_key, fingerprint, response["status"], response["headers"], b"".join(response["chunks"])
+                )
+        finally:
+            del self.cache.inflight[cache_key]
+            future.set_result(None)
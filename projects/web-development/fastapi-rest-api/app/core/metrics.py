@@ -0,0 +1,169 @@
+"""
+请求指标
+按路由统计请求数、状态码和延迟直方图，以 Prometheus 文本格式输出
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Any, Dict, List, Tuple
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 对数-线性分桶：100µs ~ 10s，每个数量级 9 个等宽桶（1, 2, ..., 9 × 10^k 秒），
+# 相对误差不超过一个桶宽，分桶只需一次二分查找
+LATENCY_BUCKETS: Tuple[float, ...] = tuple(
+    round(m * 10.0 ** e, 6) for e in range(-4, 1) for m in range(1, 10)
+) + (10.0,)
+
+# 未匹配任何路由的请求（如 404）统一归为一个标签，避免任意路径导致标签基数爆炸
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class Histogram:
+    """固定分桶的延迟直方图"""
+
+    __slots__ = ("counts", "total")
+
+    def __init__(self):
+        # 最后一个桶为 +Inf
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+
+
+def route_template(scope) -> str:
+    """
+    请求匹配的路由模板，如 /api/v1/tasks/tasks/{task_id}
+
+    嵌套路由的 path_format 可能只是相对所属路由器的后缀；模板的每一段对应请求路径的一段，
+    因此用请求路径去掉相同段数的部分作为前缀补全
+    """
+    route = scope.get("route")
+    template = getattr(route, "path_format", None)
+    if not template:
+        return UNMATCHED_ROUTE
+    if ":path}" in getattr(route, "path", ""):
+        # path 转换器可匹配多段，无法按段数对齐
+        return template
+    prefix = scope["path"].rsplit("/", template.count("/"))[0]
+    return prefix + template
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    """请求指标汇总，每次请求只做一次字典查找和一次二分查找"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._requests: Dict[Tuple[str, str, int], int] = {}
+        self._latency: Dict[Tuple[str, str], Histogram] = {}
+        self.in_flight = 0
+
+    def observe(self, method: str, route: str, status: int, seconds: float) -> None:
+        """记录一次请求"""
+        with self._lock:
+            key = (method, route, status)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            histogram = self._latency.get((method, route))
+            if histogram is None:
+                histogram = self._latency[(method, route)] = Histogram()
+            histogram.observe(seconds)
+
+    def render(self) -> str:
+        """Prometheus 文本格式"""
+        with self._lock:
+            requests = sorted(self._requests.items())
+            latency = [(key, list(h.counts), h.total) for key, h in sorted(self._latency.items())]
+            in_flight = self.in_flight
+
+        lines = [
+            "# HELP http_requests_total 按路由和状态码统计的请求数",
+            "# TYPE http_requests_total counter",
+        ]
+        for (method, route, status), count in requests:
+            lines.append(
+                f'http_requests_total{{method="{method}",route="{_escape(route)}",status="{status}"}} {count}'
+            )
+
+        lines += [
+            "# HELP http_request_duration_seconds 按路由统计的请求延迟（含流式响应的完整发送时间）",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        for (method, route), counts, total in latency:
+            labels = f'method="{method}",route="{_escape(route)}"'
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, counts):
+                cumulative += count
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound:g}"}} {cumulative}')
+            cumulative += counts[-1]
+            lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {cumulative}')
+            lines.append(f"http_request_duration_seconds_sum{{{labels}}} {total:.6f}")
+            lines.append(f"http_request_duration_seconds_count{{{labels}}} {cumulative}")
+
+        lines += [
+            "# HELP http_requests_in_flight 正在处理的请求数",
+            "# TYPE http_requests_in_flight gauge",
+            f"http_requests_in_flight {in_flight}",
+        ]
+        return "\n".join(lines) + "\n"
+
+
+def render_gauges(prefix: str, stats: Dict[str, Any]) -> str:
+    """将嵌套的统计字典展开为 gauge，如 {"cache": {"hits": 1}} -> prefix_cache_hits 1"""
+    lines: List[str] = []
+
+    def walk(name: str, value: Any) -> None:
+        if isinstance(value, dict):
+            for key, child in value.items():
+                walk(f"{name}_{key}", child)
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f"# TYPE {name} gauge")
+            lines.append(f"{name} {value}")
+
+    walk(prefix, stats)
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+class MetricsMiddleware:
+    """
+    请求指标中间件（纯 ASGI 实现，不包装请求和响应对象）
+
+    路由模板在路由匹配后由 scope["route"] 得到，未匹配的请求归为 <unmatched>
+    """
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        # 未发出响应头就抛出异常时按 500 统计
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        self.registry.in_flight += 1
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            self.registry.in_flight -= 1
+            self.registry.observe(scope["method"], route_template(scope), status, time.perf_counter() - start)
+
+
+# 全局指标实例
+metrics_registry = MetricsRegistry()
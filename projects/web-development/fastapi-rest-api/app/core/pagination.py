@@ -0,0 +1,24 @@
+"""
+分页工具
+游标（keyset）分页的编码与解码
+"""
+
+import base64
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(created_at: datetime, task_id: int) -> str:
+    """将 (created_at, id) 编码为不透明游标（也用于按截止日期排序的 (due_date, id)）"""
+    raw = f"{created_at.isoformat()}|{task_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """解码游标，格式非法时抛出 ValueError"""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, task_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), int(task_id)
+    except (TypeError, UnicodeDecodeError, ValueError) as e:
+        raise ValueError(f"无效的游标: {cursor}") from e
@@ -0,0 +1,152 @@
+"""
+采样分析器
+按固定间隔采样所有线程的调用栈，输出可直接生成火焰图的折叠栈（collapsed stack）格式
+"""
+
+import os
+import secrets
+import sys
+import threading
+import uuid
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from typing import List, Optional
+
+# 同一时间只允许一个采样器运行，避免叠加开销
+_active = threading.Lock()
+
+
+@lru_cache(maxsize=4096)
+def _short_path(filename: str) -> str:
+    """缩短文件路径：第三方库从包名开始，项目代码从 app/ 开始"""
+    for marker in ("site-packages" + os.sep, "dist-packages" + os.sep):
+        index = filename.rfind(marker)
+        if index >= 0:
+            return filename[index + len(marker):]
+    index = filename.rfind(os.sep + "app" + os.sep)
+    if index >= 0:
+        return filename[index + 1:]
+    return os.path.basename(filename)
+
+
+def _frame_label(code) -> str:
+    return f"{code.co_name} ({_short_path(code.co_filename)}:{code.co_firstlineno})"
+
+
+class SamplingProfiler:
+    """
+    后台线程按 interval 秒采样 sys._current_frames()
+
+    只在 try_start() 与 stop() 之间运行；每个样本为 "线程名;根帧;...;叶帧"，
+    相同调用栈合并计数
+    """
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.samples: Counter = Counter()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def try_start(cls, interval: float = 0.005) -> Optional["SamplingProfiler"]:
+        """启动采样，已有采样在运行时返回 None"""
+        if not _active.acquire(blocking=False):
+            return None
+        profiler = cls(interval)
+        profiler._thread = threading.Thread(target=profiler._run, name="sampling-profiler", daemon=True)
+        profiler._thread.start()
+        return profiler
+
+    def stop(self) -> Counter:
+        """停止采样并返回 {折叠栈: 样本数}"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+            _active.release()
+        return self.samples
+
+    def _run(self) -> None:
+        own = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own:
+                    continue
+                stack: List[str] = []
+                while frame is not None:
+                    stack.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                self.samples[";".join(reversed(stack))] += 1
+
+
+def render_collapsed(samples: Counter) -> str:
+    """折叠栈文本，每行 "栈 样本数"，可直接交给 flamegraph.pl / speedscope"""
+    return "".join(f"{stack} {count}\n" for stack, count in samples.most_common())
+
+
+class ProfileStore:
+    """最近的单请求分析结果，按 ID 读取"""
+
+    def __init__(self, max_entries: int = 32):
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._max_entries = max_entries
+
+    def put(self, profile_id: str, collapsed: str) -> None:
+        with self._lock:
+            self._entries[profile_id] = collapsed
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[str]:
+        with self._lock:
+            return self._entries.get(profile_id)
+
+
+class RequestProfilingMiddleware:
+    """
+    单请求分析中间件
+
+    请求头 X-Profile 与密钥一致时，在处理该请求期间以高频率采样，
+    响应头 X-Profile-Id 返回分析结果 ID（已有采样在运行时为 busy）。
+    同一事件循环上并发处理的其他请求也会出现在采样中
+    """
+
+    HEADER = b"x-profile"
+
+    def __init__(self, app, secret_key: str, store: ProfileStore, interval: float = 0.001):
+        self.app = app
+        self.secret_key = secret_key.encode()
+        self.store = store
+        self.interval = interval
+
+    def _requested(self, scope) -> bool:
+        for name, value in scope["headers"]:
+            if name == self.HEADER:
+                return secrets.compare_digest(value, self.secret_key)
+        return False
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self._requested(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profiler = SamplingProfiler.try_start(self.interval)
+        profile_id = uuid.uuid4().hex[:12] if profiler is not None else "busy"
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            if profiler is not None:
+                self.store.put(profile_id, render_collapsed(profiler.stop()))
+
+
+# 全局单请求分析结果
+profile_store = ProfileStore()
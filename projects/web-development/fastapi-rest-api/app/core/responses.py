@@ -0,0 +1,64 @@
+"""
+响应类
+基于 orjson 的快速 JSON 响应，未安装 orjson 时回退到标准库 json
+"""
+
+import json
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Type
+from fastapi.responses import JSONResponse
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson 为可选依赖
+    orjson = None
+
+
+def _default(obj: Any) -> Any:
+    """序列化 json / orjson 不直接支持的类型"""
+    if isinstance(obj, BaseModel):
+        return obj.model_dump()
+    if isinstance(obj, Enum):
+        return obj.value
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    raise TypeError(f"无法序列化类型: {type(obj).__name__}")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    编码为 UTF-8 JSON 字节
+
+    支持 datetime、TaskStatus / TaskPriority 等枚举和 Pydantic 模型，中文不转义
+    """
+    if orjson is not None:
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(
+        content,
+        ensure_ascii=False,
+        separators=(",", ":"),
+        default=_default
+    ).encode("utf-8")
+
+
+class FastJSONResponse(JSONResponse):
+    """快速 JSON 响应"""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+RESPONSE_CLASSES = {
+    "fast": FastJSONResponse,
+    "default": JSONResponse,
+}
+
+
+def get_response_class(name: str) -> Type[JSONResponse]:
+    """按配置名称获取默认响应类"""
+    try:
+        return RESPONSE_CLASSES[name]
+    except KeyError:
+        raise ValueError(f"未知的响应类: {name}，可选 {', '.join(RESPONSE_CLASSES)}")
@@ -5,21 +5,30 @@ FastAPI REST API 主应用
 
 from fastapi import FastAPI, HTTPException, Depends, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response
 from contextlib import asynccontextmanager
 import uvicorn
 
 from app.api.v1.api import api_router
-from app.core.config import settings
+from app.core.admission import AdmissionController, AdmissionMiddleware
+from app.core.compression import CompressionMiddleware
+from app.core.config import DEFAULT_SECRET_KEY, settings
+from app.core.idempotency import IdempotencyCache, IdempotencyMiddleware
+from app.core.metrics import PROMETHEUS_CONTENT_TYPE, MetricsMiddleware, metrics_registry, render_gauges
+from app.core.profiling import RequestProfilingMiddleware, profile_store
+from app.core.responses import get_response_class
+from app.services.task_service import task_service
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
-    # 启动时执行
+    # 启动时执行：加载持久化数据（内存存储为快照 + 预写日志重放）
     print("🚀 任务管理 API 启动中...")
+    task_service.open()
     yield
     # 关闭时执行
+    task_service.close()
     print("👋 任务管理 API 关闭")
 
 
@@ -30,9 +39,42 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=get_response_class(settings.JSON_RESPONSE_CLASS),
     lifespan=lifespan
 )
 
+# 准入控制（在 CORS 之内，拒绝的响应同样带有跨域头；在指标之内，拒绝的请求计入指标）
+admission_controller = AdmissionController(
+    limits={
+        "read": settings.ADMISSION_READ_LIMIT,
+        "write": settings.ADMISSION_WRITE_LIMIT,
+        "search": settings.ADMISSION_SEARCH_LIMIT,
+        "export": settings.ADMISSION_EXPORT_LIMIT,
+    },
+    queue_size=settings.ADMISSION_QUEUE_SIZE,
+    queue_timeout=settings.ADMISSION_QUEUE_TIMEOUT,
+    rate=settings.RATE_LIMIT_PER_SECOND,
+    burst=settings.RATE_LIMIT_BURST,
+    key_header=settings.RATE_LIMIT_KEY_HEADER
+)
+if settings.ADMISSION_ENABLED:
+    app.add_middleware(AdmissionMiddleware, controller=admission_controller, prefix=settings.API_V1_STR)
+
+# 幂等键（在准入控制之外，重试命中缓存时不占用并发数）
+idempotency_cache = IdempotencyCache(
+    ttl=settings.IDEMPOTENCY_TTL,
+    max_entries=settings.IDEMPOTENCY_MAX_ENTRIES,
+    max_bytes=settings.IDEMPOTENCY_MAX_BYTES
+)
+if settings.IDEMPOTENCY_ENABLED:
+    app.add_middleware(
+        IdempotencyMiddleware,
+        cache=idempotency_cache,
+        prefix=settings.API_V1_STR,
+        max_response_bytes=settings.IDEMPOTENCY_MAX_RESPONSE_BYTES,
+        client_key=admission_controller.client_key
+    )
+
 # 配置 CORS
 app.add_middleware(
     CORSMiddleware,
@@ -42,6 +84,18 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 响应压缩（在 CORS 之外，处理所有响应）
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware, minimum_size=settings.COMPRESSION_MINIMUM_SIZE)
+
+# 单请求性能分析（请求头 X-Profile 携带 SECRET_KEY 时生效，未配置密钥时不启用）
+if settings.PROFILING_ENABLED and settings.SECRET_KEY != DEFAULT_SECRET_KEY:
+    app.add_middleware(RequestProfilingMiddleware, secret_key=settings.SECRET_KEY, store=profile_store)
+
+# 请求指标（最后添加的中间件在最外层，统计包含 CORS 处理在内的完整耗时）
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware, registry=metrics_registry)
+
 
 # 根路径
 @app.get("/", tags=["根路径"])
@@ -65,6 +119,20 @@ async def health_check():
     }
 
 
+# 监控指标
+if settings.METRICS_ENABLED:
+    @app.get("/metrics", tags=["健康检查"])
+    async def metrics():
+        """Prometheus 文本格式的请求指标和服务状态"""
+        body = (
+            metrics_registry.render()
+            + render_gauges("taskapi", task_service.get_metrics())
+            + render_gauges("taskapi_admission", admission_controller.stats())
+            + render_gauges("taskapi_idempotency", idempotency_cache.stats())
+        )
+        return Response(content=body, media_type=PROMETHEUS_CONTENT_TYPE)
+
+
 # 注册 API 路由
 app.include_router(api_router, prefix=settings.API_V1_STR)
 
@@ -102,8 +170,8 @@ async def general_exception_handler(request, exc):
 
 if __name__ == "__main__":
     uvicorn.run(
-app",
-        host        "main:="0.0.0.0",
+        "main:app",
+        host="0.0.0.0",
         port=8000,
         reload=True,
         log_level="info"
@@ -3,7 +3,7 @@
 """
 
 from typing import Optional, List
-from datetime import datetime
+from datetime import date, datetime
 from enum import Enum
 from pydantic import BaseModel, Field
 
@@ -24,6 +24,20 @@ class TaskPriority(str, Enum):
     URGENT = "urgent"
 
 
+class ExportFormat(str, Enum):
+    """导出格式枚举"""
+    NDJSON = "ndjson"
+    CSV = "csv"
+    PARQUET = "parquet"
+
+
+class ChangeType(str, Enum):
+    """任务变更类型"""
+    CREATED = "created"
+    UPDATED = "updated"
+    DELETED = "deleted"
+
+
 class TaskBase(BaseModel):
     """任务基础模型"""
     title: str = Field(..., min_length=1, max_length=200, description="任务标题")
@@ -45,6 +59,17 @@ class TaskUpdate(BaseModel):
     status: Optional[TaskStatus] = None
     priority: Optional[TaskPriority] = None
     due_date: Optional[datetime] = None
+    expected_version: Optional[int] = Field(None, description="期望的当前版本号，不一致时返回 409")
+
+
+class TaskBatchUpdate(TaskUpdate):
+    """批量更新条目"""
+    id: int
+
+
+class TaskBatchDelete(BaseModel):
+    """批量删除请求"""
+    ids: List[int] = Field(..., min_length=1)
 
 
 class Task(TaskBase):
@@ -52,6 +77,7 @@ class Task(TaskBase):
     id: int
     created_at: datetime
     updated_at: datetime
+    version: int = Field(1, description="版本号，每次更新递增")
 
     class Config:
         from_attributes = True
@@ -64,6 +90,43 @@ class TaskList(BaseModel):
     page: int
     page_size: int
     pages: int
+    next_cursor: Optional[str] = Field(None, description="下一页游标，为空表示没有更多数据")
+
+
+class TaskFeed(BaseModel):
+    """按截止日期排序的任务流响应模型"""
+    items: List[Task]
+    next_cursor: Optional[str] = Field(None, description="下一页游标，为空表示没有更多数据")
+
+
+class TaskChange(BaseModel):
+    """任务变更事件"""
+    seq: int = Field(..., description="变更序号，单调递增")
+    type: ChangeType
+    task_id: int
+    task: Optional[Task] = Field(None, description="变更后的任务，删除事件为空")
+    timestamp: datetime
+
+
+class TaskChangeList(BaseModel):
+    """任务变更列表响应模型"""
+    epoch: str = Field(..., description="变更日志标识，服务重启后变化，此时需全量同步")
+    changes: List[TaskChange]
+    last_seq: int = Field(..., description="已返回的最大序号，作为下次请求的 since")
+
+
+class BatchItemResult(BaseModel):
+    """批量操作单条结果，成功时有 id，失败时有 error"""
+    index: int
+    id: Optional[int] = None
+    error: Optional[str] = None
+
+
+class BatchResult(BaseModel):
+    """批量操作响应模型"""
+    succeeded: int
+    failed: int
+    results: List[BatchItemResult]
 
 
 class TaskStats(BaseModel):
@@ -74,3 +137,19 @@ class TaskStats(BaseModel):
     completed: int
     cancelled: int
     overdue: int
+
+
+class AggregateGroup(BaseModel):
+    """聚合分组，未参与分组的维度为空"""
+    status: Optional[TaskStatus] = None
+    priority: Optional[TaskPriority] = None
+    bucket: Optional[date] = Field(None, description="时间桶的起始日期")
+    count: int
+
+
+class TaskAggregate(BaseModel):
+    """分组聚合结果"""
+    group_by: List[str]
+    bucket: Optional[str] = Field(None, description="时间分桶，如 created_at:day")
+    total: int
+    groups: List[AggregateGroup]
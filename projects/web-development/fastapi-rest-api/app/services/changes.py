@@ -0,0 +1,203 @@
+"""
+任务变更日志
+只追加的有界环形日志，供增量同步接口和 SSE 推送读取；
+存储后端自带变更日志时（多个 worker 共享的 SQLite）改为读取后端的日志
+"""
+
+import asyncio
+import itertools
+import threading
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Deque, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+from app.models.task import ChangeType, Task, TaskChange
+
+if TYPE_CHECKING:
+    from app.storage.base import TaskStorage
+
+
+class _Subscribers:
+    """
+    等待新变更的订阅方：(事件循环, 事件)
+
+    写入可能来自线程池，通过 call_soon_threadsafe 唤醒；
+    订阅方先登记再检查序号，检查之后到达的变更一定会唤醒它
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._waiters: Set[Tuple[asyncio.AbstractEventLoop, asyncio.Event]] = set()
+
+    def __len__(self) -> int:
+        return len(self._waiters)
+
+    @contextmanager
+    def subscribe(self) -> Iterator[asyncio.Event]:
+        waiter = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._waiters.add(waiter)
+        try:
+            yield waiter[1]
+        finally:
+            with self._lock:
+                self._waiters.discard(waiter)
+
+    def notify(self) -> None:
+        with self._lock:
+            waiters = list(self._waiters)
+        for loop, event in waiters:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # 事件循环已关闭
+                pass
+
+
+class ChangeLog:
+    """
+    有界变更日志
+
+    每次写入分配单调递增的序号，只保留最近 max_entries 条；
+    读取方按序号增量拉取，请求的序号已被淘汰时需全量同步。
+    订阅方不持有独立缓冲区，只记录读取位置并等待新变更通知，
+    由各自的发送速度决定拉取节奏，慢订阅者不会拖慢写入或占用额外内存
+    """
+
+    def __init__(self, max_entries: int = 10000):
+        self._lock = threading.Lock()
+        self._entries: Deque[TaskChange] = deque(maxlen=max(max_entries, 1))
+        self._seq = 0
+        self._epoch = uuid.uuid4().hex[:16]
+        self._subscribers = _Subscribers()
+
+    @property
+    def epoch(self) -> str:
+        """日志标识，进程重启后变化，旧序号随之失效"""
+        return self._epoch
+
+    @property
+    def last_seq(self) -> int:
+        """最新变更序号"""
+        return self._seq
+
+    def append(self, change_type: ChangeType, task_id: int, task: Optional[Task] = None) -> None:
+        """记录一条变更"""
+        self.extend([(change_type, task_id, task)])
+
+    def extend(self, changes: Iterable[Tuple[ChangeType, int, Optional[Task]]]) -> None:
+        """批量记录变更，只通知订阅方一次"""
+        now = datetime.now()
+        with self._lock:
+            appended = False
+            for change_type, task_id, task in changes:
+                self._seq += 1
+                self._entries.append(TaskChange(
+                    seq=self._seq,
+                    type=change_type,
+                    task_id=task_id,
+                    task=task,
+                    timestamp=now
+                ))
+                appended = True
+        if appended:
+            self._subscribers.notify()
+
+    def since(self, seq: int, limit: int = 1000) -> Optional[List[TaskChange]]:
+        """
+        读取序号大于 seq 的变更（最多 limit 条）
+
+        seq 之后的变更已被淘汰、或 seq 超出当前序号（如服务重启）时返回 None
+        """
+        with self._lock:
+            if seq > self._seq or seq < 0:
+                return None
+            first = self._entries[0].seq if self._entries else self._seq + 1
+            if seq < first - 1:
+                return None
+            start = seq - first + 1
+            return list(itertools.islice(self._entries, start, start + limit))
+
+    async def wait(self, seq: int, timeout: float) -> bool:
+        """等待序号大于 seq 的变更出现，超时返回 False"""
+        if self._seq > seq:
+            return True
+        with self._subscribers.subscribe() as event:
+            if self._seq > seq:
+                return True
+            try:
+                await asyncio.wait_for(event.wait(), timeout)
+                return True
+            except asyncio.TimeoutError:
+                return False
+
+    def stats(self) -> Dict[str, Any]:
+        """日志统计（条数、最新序号、正在等待新变更的订阅方数）"""
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "last_seq": self._seq,
+                "subscribers": len(self._subscribers),
+            }
+
+
+class StorageChangeLog:
+    """
+    存储后端维护的变更日志
+
+    变更由后端在写入的同一事务中记录，序号和 epoch 由后端分配并持久化，
+    共享同一存储的所有 worker 读到同一份日志，服务重启后序号仍然有效。
+    本进程的写入完成后立即唤醒订阅方，其他 worker 的写入由订阅方每 poll_interval 秒轮询发现
+    """
+
+    def __init__(self, storage: "TaskStorage", poll_interval: float = 0.5):
+        self._storage = storage
+        self._poll_interval = poll_interval
+        self._subscribers = _Subscribers()
+
+    @property
+    def epoch(self) -> str:
+        """日志标识，取存储的 epoch，数据库重建后变化"""
+        return self._storage.epoch
+
+    @property
+    def last_seq(self) -> int:
+        """最新变更序号"""
+        return self._storage.last_change_seq()
+
+    def append(self, change_type: ChangeType, task_id: int, task: Optional[Task] = None) -> None:
+        """变更已由存储记录，只通知订阅方"""
+        self._subscribers.notify()
+
+    def extend(self, changes: Iterable[Tuple[ChangeType, int, Optional[Task]]]) -> None:
+        """变更已由存储记录，只通知订阅方"""
+        self._subscribers.notify()
+
+    def since(self, seq: int, limit: int = 1000) -> Optional[List[TaskChange]]:
+        """读取序号大于 seq 的变更，语义同 ChangeLog.since"""
+        return self._storage.changes_since(seq, limit)
+
+    async def wait(self, seq: int, timeout: float) -> bool:
+        """等待序号大于 seq 的变更出现，超时返回 False；查询存储在线程池中执行"""
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        with self._subscribers.subscribe() as event:
+            while True:
+                if await loop.run_in_executor(None, self._storage.last_change_seq) > seq:
+                    return True
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    return False
+                try:
+                    await asyncio.wait_for(event.wait(), min(self._poll_interval, remaining))
+                except asyncio.TimeoutError:
+                    pass
+                event.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """日志统计（最新序号、正在等待新变更的订阅方数）"""
+        return {
+            "last_seq": self._storage.last_change_seq(),
+            "subscribers": len(self._subscribers),
+        }
@@ -0,0 +1,116 @@
+"""
+任务导出
+将分批读取的任务编码为 NDJSON / CSV / Parquet 字节流，内存占用与任务总数无关
+"""
+
+import csv
+import io
+from datetime import datetime
+from enum import Enum
+from typing import Any, Iterable, Iterator, List
+from app.models.task import Task
+from app.storage.base import to_local_naive
+
+EXPORT_FIELDS = ("id", "title", "description", "status", "priority", "due_date", "created_at", "updated_at")
+
+
+def parquet_available() -> bool:
+    """Parquet 导出依赖可选的 pyarrow"""
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def ndjson_chunks(batches: Iterable[List[Task]]) -> Iterator[bytes]:
+    """每批任务编码为 NDJSON，每行一个任务"""
+    for batch in batches:
+        yield b"".join(task.model_dump_json().encode() + b"\n" for task in batch)
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return "" if value is None else value
+
+
+def csv_chunks(batches: Iterable[List[Task]]) -> Iterator[bytes]:
+    """每批任务编码为 CSV，首块为表头"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for batch in batches:
+        for task in batch:
+            writer.writerow([_csv_value(getattr(task, field)) for field in EXPORT_FIELDS])
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode()
+
+
+class _ChunkSink:
+    """收集 ParquetWriter 写出的字节，每写完一个行组取走一次"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def parquet_chunks(batches: Iterable[List[Task]]) -> Iterator[bytes]:
+    """每批任务写成一个 Parquet 行组"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("title", pa.string()),
+        ("description", pa.string()),
+        ("status", pa.string()),
+        ("priority", pa.string()),
+        ("due_date", pa.timestamp("us")),
+        ("created_at", pa.timestamp("us")),
+        ("updated_at", pa.timestamp("us")),
+    ])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(pa.PythonFile(sink, mode="w"), schema)
+    try:
+        for batch in batches:
+            columns = {
+                "id": [task.id for task in batch],
+                "title": [task.title for task in batch],
+                "description": [task.description for task in batch],
+                "status": [task.status.value for task in batch],
+                "priority": [task.priority.value for task in batch],
+                "due_date": [to_local_naive(task.due_date) for task in batch],
+                "created_at": [task.created_at for task in batch],
+                "updated_at": [task.updated_at for task in batch],
+            }
+            writer.write_table(pa.table(columns, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
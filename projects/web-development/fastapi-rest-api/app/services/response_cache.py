@@ -0,0 +1,87 @@
+"""
+序列化响应缓存
+缓存任务的 JSON 编码结果（及其压缩版本），命中时直接返回字节，跳过模型构建、序列化和压缩
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+
+class ResponseCache:
+    """
+    有界 LRU 缓存
+
+    每个任务只保留当前版本：以 task_id 为键保存 (version, body)，
+    读取时版本不一致视为未命中，效果等同于以 (task_id, version) 为键，
+    同时失效只需一次字典删除。
+
+    同一版本可保存多种编码（identity 为原始 JSON，另有 gzip / br 等压缩结果），
+    共用一个 LRU 位置，随版本变化一起失效
+    """
+
+    def __init__(self, max_entries: int = 10000, max_bytes: int = 32 * 1024 * 1024):
+        self._lock = threading.Lock()
+        # task_id -> (版本号, {编码: 字节})
+        self._entries: OrderedDict = OrderedDict()
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+
+    def get(self, task_id: int, version: int, encoding: str = "identity") -> Optional[bytes]:
+        """读取缓存，版本不一致或没有该编码时视为未命中"""
+        with self._lock:
+            entry = self._entries.get(task_id)
+            body = entry[1].get(encoding) if entry is not None and entry[0] == version else None
+            if body is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(task_id)
+            self._hits += 1
+            return body
+
+    def put(self, task_id: int, version: int, body: bytes, encoding: str = "identity") -> None:
+        """写入缓存，超出条数或字节上限时淘汰最久未使用的条目"""
+        if self._max_entries <= 0 or len(body) > self._max_bytes:
+            return
+        with self._lock:
+            entry = self._entries.get(task_id)
+            if entry is not None and entry[0] == version:
+                # 同一版本追加编码
+                previous = entry[1].get(encoding)
+                if previous is not None:
+                    self._bytes -= len(previous)
+                entry[1][encoding] = body
+                self._entries.move_to_end(task_id)
+            else:
+                self._discard(task_id)
+                self._entries[task_id] = (version, {encoding: body})
+            self._bytes += len(body)
+            while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= sum(map(len, evicted.values()))
+
+    def invalidate(self, task_id: int) -> None:
+        """移除任务的缓存"""
+        with self._lock:
+            self._discard(task_id)
+
+    def _discard(self, task_id: int) -> None:
+        entry = self._entries.pop(task_id, None)
+        if entry is not None:
+            self._bytes -= sum(map(len, entry[1].values()))
+
+    def stats(self) -> Dict[str, Any]:
+        """命中率与内存占用"""
+        lookups = self._hits + self._misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self._max_entries,
+            "max_bytes": self._max_bytes,
+            "hits": self._hits,
+            "misses": self._misses,
+            "hit_rate": self._hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,266 @@
+"""
+全文搜索索引
+对任务标题和描述建立倒排索引，BM25 排序，支持前缀查询
+"""
+
+import math
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from heapq import nlargest
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.models.task import Task
+
+# 中文按单字和相邻二元组切分，其他文字按单词切分（小写）
+_CJK = "㐀-䶿一-鿿豈-﫿"
+_TOKEN_RE = re.compile(rf"([{_CJK}]+)|([^\W_{_CJK}]+)")
+
+# BM25 参数
+_K1 = 1.2
+_B = 0.75
+# 标题中的词按两次计入词频，标题命中排在描述命中之前
+_TITLE_WEIGHT = 2
+
+
+def _cjk_bigrams(run: str) -> List[str]:
+    """中文字符串切分为二元组，单个字保留为单字"""
+    if len(run) == 1:
+        return [run]
+    return [run[i:i + 2] for i in range(len(run) - 1)]
+
+
+def _cjk_terms(run: str) -> List[str]:
+    """中文字符串的索引词：二元组用于多字查询，单字用于单字查询（可匹配任意位置）"""
+    if len(run) == 1:
+        return [run]
+    return _cjk_bigrams(run) + list(run)
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """文本切分为索引词"""
+    if not text:
+        return []
+    terms = []
+    for cjk, word in _TOKEN_RE.findall(text.lower()):
+        terms.extend(_cjk_terms(cjk) if cjk else [word])
+    return terms
+
+
+def parse_query(query: str) -> List[Tuple[str, bool]]:
+    """
+    查询切分为 (词, 是否前缀) 列表
+
+    英文单词后加 * 为前缀查询（如 deploy*）；中文连续多字按二元组匹配，单个汉字按单字匹配
+    """
+    terms = []
+    text = query.lower()
+    for match in _TOKEN_RE.finditer(text):
+        cjk, word = match.groups()
+        if word:
+            terms.append((word, text[match.end():match.end() + 1] == "*"))
+        else:
+            terms.extend((term, False) for term in _cjk_bigrams(cjk))
+    return terms
+
+
+class SearchIndex:
+    """
+    增量维护的倒排索引
+
+    每次索引文档（新建或修改）分配一个递增的内部编号，倒排表只追加内部编号，
+    因此天然有序，可二分查找；文档修改或删除时旧编号标记为失效，查询时跳过，
+    失效编号过多时压缩重建倒排表。
+    多词查询为 AND 语义：从最短的倒排表出发，其余词二分查找求交集
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        # 词 -> (内部编号数组, 词频数组)
+        self._postings: Dict[str, Tuple[array, array]] = {}
+        # 内部编号 -> 任务 ID（0 表示失效）、文档长度
+        self._doc_ids = array("q")
+        self._doc_lengths = array("I")
+        # 任务 ID -> (内部编号, 已索引的任务版本)
+        self._docs: Dict[int, Tuple[int, int]] = {}
+        self._total_length = 0
+        self._stale = 0
+        self._posting_count = 0
+        # 前缀查询用的有序词表，新增词后惰性重建
+        self._sorted_terms: Optional[List[str]] = None
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def add(self, task: Task) -> None:
+        """索引任务；已索引更新版本时忽略（并发写入乱序到达）"""
+        indexed = self._docs.get(task.id)
+        if indexed is not None and indexed[1] >= task.version:
+            return
+        counts = Counter(tokenize(task.description))
+        for term in tokenize(task.title):
+            counts[term] += _TITLE_WEIGHT
+
+        with self._lock:
+            indexed = self._docs.get(task.id)
+            if indexed is not None:
+                if indexed[1] >= task.version:
+                    return
+                self._retire(indexed[0])
+
+            doc = len(self._doc_ids)
+            length = sum(counts.values())
+            self._doc_ids.append(task.id)
+            self._doc_lengths.append(length)
+            self._docs[task.id] = (doc, task.version)
+            self._total_length += length
+            for term, tf in counts.items():
+                posting = self._postings.get(term)
+                if posting is None:
+                    posting = self._postings[term] = (array("I"), array("H"))
+                    self._sorted_terms = None
+                posting[0].append(doc)
+                posting[1].append(min(tf, 0xFFFF))
+            self._posting_count += len(counts)
+
+    def add_many(self, tasks: Iterable[Task]) -> None:
+        """批量索引任务"""
+        for task in tasks:
+            self.add(task)
+
+    def remove(self, task_id: int) -> None:
+        """移除任务"""
+        with self._lock:
+            indexed = self._docs.pop(task_id, None)
+            if indexed is not None:
+                self._retire(indexed[0])
+
+    def indexed_version(self, task_id: int) -> Optional[int]:
+        """已索引的任务版本"""
+        indexed = self._docs.get(task_id)
+        return indexed[1] if indexed is not None else None
+
+    def stats(self) -> Dict[str, Any]:
+        """索引统计（文档数、词数、倒排条目数、待压缩的失效版本数）"""
+        with self._lock:
+            return {
+                "documents": len(self._docs),
+                "terms": len(self._postings),
+                "postings": self._posting_count,
+                "stale": self._stale,
+            }
+
+    def _retire(self, doc: int) -> None:
+        """标记内部编号失效，失效数超过有效文档数时压缩"""
+        self._doc_ids[doc] = 0
+        self._total_length -= self._doc_lengths[doc]
+        self._stale += 1
+        if self._stale > max(len(self._docs), 1024):
+            self._compact()
+
+    def _compact(self) -> None:
+        """删除失效编号并重新编号（保持相对顺序，倒排表仍然有序）"""
+        remap = array("q", [-1]) * len(self._doc_ids)
+        doc_ids, doc_lengths = array("q"), array("I")
+        for old, task_id in enumerate(self._doc_ids):
+            if task_id:
+                remap[old] = len(doc_ids)
+                doc_ids.append(task_id)
+                doc_lengths.append(self._doc_lengths[old])
+
+        postings = {}
+        for term, (docs, tfs) in self._postings.items():
+            new_docs, new_tfs = array("I"), array("H")
+            for doc, tf in zip(docs, tfs):
+                if remap[doc] >= 0:
+                    new_docs.append(remap[doc])
+                    new_tfs.append(tf)
+            if new_docs:
+                postings[term] = (new_docs, new_tfs)
+        self._posting_count = sum(len(docs) for docs, _ in postings.values())
+
+        self._doc_ids, self._doc_lengths = doc_ids, doc_lengths
+        self._postings = postings
+        self._docs = {task_id: (remap[doc], version) for task_id, (doc, version) in self._docs.items()}
+        self._stale = 0
+        self._sorted_terms = None
+
+    def _expand(self, term: str, prefix: bool) -> List[str]:
+        """前缀查询展开为词表中所有以该前缀开头的词"""
+        if not prefix:
+            return [term] if term in self._postings else []
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        terms = self._sorted_terms
+        expanded = []
+        for i in range(bisect_left(terms, term), len(terms)):
+            if not terms[i].startswith(term):
+                break
+            expanded.append(terms[i])
+        return expanded
+
+    def _score(self, tf: int, doc: int, idf: float, avg_length: float) -> float:
+        norm = _K1 * (1 - _B + _B * self._doc_lengths[doc] / avg_length)
+        return idf * tf * (_K1 + 1) / (tf + norm)
+
+    def _group_scores(
+        self,
+        terms: List[str],
+        candidates: Optional[Dict[int, float]],
+        avg_length: float
+    ) -> Dict[int, float]:
+        """
+        一个查询词（前缀查询含多个展开词）对各文档的得分
+
+        candidates 不为空时只计算候选文档：候选较少时在倒排表中二分查找，否则顺序扫描
+        """
+        n = len(self._docs)
+        scores: Dict[int, float] = {}
+        for term in terms:
+            docs, tfs = self._postings[term]
+            # 倒排表长度包含少量失效编号，作为文档频率的近似值
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            if candidates is not None and len(candidates) * 16 < len(docs):
+                for doc in candidates:
+                    i = bisect_left(docs, doc)
+                    if i < len(docs) and docs[i] == doc:
+                        scores[doc] = scores.get(doc, 0.0) + self._score(tfs[i], doc, idf, avg_length)
+                continue
+            # 热点循环：BM25 公式内联，避免逐条方法调用
+            doc_ids, lengths = self._doc_ids, self._doc_lengths
+            weight, norm, ratio = idf * (_K1 + 1), _K1 * (1 - _B), _K1 * _B / avg_length
+            get = scores.get
+            for doc, tf in zip(docs, tfs):
+                if doc_ids[doc] and (candidates is None or doc in candidates):
+                    scores[doc] = get(doc, 0.0) + weight * tf / (tf + norm + ratio * lengths[doc])
+        return scores
+
+    def search(self, query: str, skip: int = 0, limit: int = 10) -> Tuple[int, List[Tuple[int, float]]]:
+        """
+        搜索任务
+
+        返回 (匹配总数, [(任务 ID, 得分)])，按得分降序，得分相同时新任务在前
+        """
+        with self._lock:
+            if not self._docs:
+                return 0, []
+            groups = [self._expand(term, prefix) for term, prefix in parse_query(query)]
+            if not groups or not all(groups):
+                return 0, []
+
+            # 从文档数最少的词开始求交集
+            groups.sort(key=lambda terms: sum(len(self._postings[t][0]) for t in terms))
+            avg_length = max(self._total_length / len(self._docs), 1.0)
+            scores: Optional[Dict[int, float]] = None
+            for terms in groups:
+                group = self._group_scores(terms, scores, avg_length)
+                if scores is not None:
+                    group = {doc: scores[doc] + score for doc, score in group.items()}
+                scores = group
+                if not scores:
+                    return 0, []
+
+            doc_ids = self._doc_ids
+            top = nlargest(skip + limit, scores.items(), key=lambda item: (item[1], doc_ids[item[0]]))
+            return len(scores), [(doc_ids[doc], score) for doc, score in top[skip:]]
@@ -3,107 +3,459 @@
 处理业务逻辑
 """
 
-from typing import List, Optional, Dict, Any
-from datetime import datetime
-from app.models.task import Task, TaskCreate, TaskUpdate, TaskStatus, TaskStats
+import threading
+from contextlib import nullcontext
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from datetime import date, datetime
+from app.models.task import (
+    ChangeType, Task, TaskAggregate, TaskChange, TaskCreate, TaskPriority, TaskUpdate, TaskStatus, TaskStats
+)
+from app.core.compression import compress
+from app.core.config import settings
+from app.services.changes import ChangeLog, StorageChangeLog
+from app.services.response_cache import ResponseCache
+from app.services.search import SearchIndex
+from app.storage.base import TaskStorage, SortKey, VersionConflictError
+from app.storage.factory import create_storage
+from app.storage.memory import MemoryTaskStorage
 
 
 class TaskService:
     """任务服务类"""
 
-    def __init__(self):
-        # 内存存储（生产环境应使用数据库）
-        self._tasks: Dict[int, Task] = {}
-        self._counter = 0
+    def __init__(
+        self,
+        storage: Optional[TaskStorage] = None,
+        cache: Optional[ResponseCache] = None,
+        changes: Optional[ChangeLog] = None
+    ):
+        # 默认使用内存存储，可通过 DATABASE_URL 切换为持久化存储
+        self._storage = storage if storage is not None else MemoryTaskStorage()
+        # 单个任务的 JSON 响应缓存
+        self._cache = cache if cache is not None else ResponseCache()
+        # 变更日志，供增量同步和 SSE 推送：后端自带日志时读取后端的日志（所有 worker 共享）；
+        # 否则在进程内记录每次写入，多个进程共享数据（分片）时进程内日志不完整，不提供变更同步
+        self._changes: Optional[Union[ChangeLog, StorageChangeLog]]
+        if self._storage.supports_changes:
+            self._changes = StorageChangeLog(self._storage, settings.CHANGE_POLL_INTERVAL)
+        elif self._storage.shared:
+            self._changes = None
+        else:
+            self._changes = changes if changes is not None else ChangeLog()
+        # 进程内日志的序号在写入完成后分配，写入与记录须在同一临界区内，
+        # 否则并发写入同一任务时日志中的顺序可能与实际写入顺序相反；
+        # 同步提交的持久化存储在释放该锁之后才等待落盘（deferred_sync），等待期间其他写入照常进行
+        self._write_lock = threading.Lock() if isinstance(self._changes, ChangeLog) else nullcontext()
+        # 全文搜索索引：随写入增量维护，首次搜索时补建存储中已有的任务；
+        # 存储后端自带搜索时（分片、SQLite）由后端维护，服务层不建索引
+        self._search = SearchIndex() if not self._storage.supports_search else None
+        self._search_lock = threading.Lock()
+        self._search_ready = self._search is None or self._storage.count() == 0
 
     def create_task(self, task_data: TaskCreate) -> Task:
         """创建任务"""
-        self._counter += 1
         now = datetime.now()
-
-        task = Task(
-            id=self._counter,
-            created_at=now,
-            updated_at=now,
-            **task_data.dict()
-        )
-
-        self._tasks[self._counter] = task
+        with self._storage.deferred_sync(), self._write_lock:
+            task = self._storage.insert({
+                **task_data.dict(),
+                "created_at": now,
+                "updated_at": now,
+            })
+            if self._changes is not None:
+                self._changes.append(ChangeType.CREATED, task.id, task)
+        if self._search is not None:
+            self._search.add(task)
         return task
 
+    def create_tasks(self, items: Sequence[TaskCreate]) -> List[Task]:
+        """批量创建任务"""
+        now = datetime.now()
+        with self._storage.deferred_sync(), self._write_lock:
+            tasks = self._storage.insert_many([
+                {**task_data.dict(), "created_at": now, "updated_at": now}
+                for task_data in items
+            ])
+            if self._changes is not None:
+                self._changes.extend((ChangeType.CREATED, task.id, task) for task in tasks)
+        if self._search is not None:
+            self._search.add_many(tasks)
+        return tasks
+
     def get_task(self, task_id: int) -> Optional[Task]:
         """获取单个任务"""
-        return self._tasks.get(task_id)
+        return self._storage.get(task_id)
+
+    def get_task_json(
+        self,
+        task_id: int,
+        encoding: Optional[str] = None
+    ) -> Optional[Tuple[int, bytes, Optional[str]]]:
+        """
+        获取单个任务的 JSON 字节及版本号，返回 (版本号, 字节, 实际使用的压缩编码)
+
+        先只查版本号，缓存命中时不构建任务模型也不重新序列化；
+        指定 encoding 且 JSON 不小于 COMPRESSION_MINIMUM_SIZE 时返回压缩后的字节，
+        压缩结果同样缓存，同一版本只压缩一次
+        """
+        version = self._storage.get_version(task_id)
+        if version is None:
+            return None
+        body = self._cache.get(task_id, version)
+        if body is None:
+            task = self._storage.get(task_id)
+            if task is None:
+                return None
+            version, body = task.version, task.model_dump_json().encode()
+            self._cache.put(task_id, version, body)
+
+        if encoding is None or len(body) < settings.COMPRESSION_MINIMUM_SIZE:
+            return version, body, None
+        compressed = self._cache.get(task_id, version, encoding)
+        if compressed is None:
+            compressed = compress(body, encoding)
+            self._cache.put(task_id, version, compressed, encoding)
+        return version, compressed, encoding
+
+    def get_cache_stats(self) -> Dict[str, Any]:
+        """响应缓存统计（命中率、条数、字节数）"""
+        return self._cache.stats()
+
+    def get_task_version(self, task_id: int) -> Optional[int]:
+        """获取任务版本号，不构建任务模型"""
+        return self._storage.get_version(task_id)
+
+    @property
+    def blocking_io(self) -> bool:
+        """存储调用是否会阻塞在 I/O 上"""
+        return self._storage.blocking_io
+
+    @property
+    def epoch(self) -> str:
+        """存储实例标识"""
+        return self._storage.epoch
+
+    def get_data_version(self) -> int:
+        """全局数据版本，任何写入都会递增"""
+        return self._storage.data_version()
 
     def get_tasks(
         self,
         skip: int = 0,
         limit: int = 10,
         status: Optional[TaskStatus] = None,
-        priority: Optional[str] = None
+        priority: Optional[str] = None,
+        before: Optional[SortKey] = None,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None
     ) -> List[Task]:
-        """获取任务列表"""
-        tasks = list(self._tasks.values())
+        """
+        获取任务列表（按创建时间倒序）
 
-        # 状态筛选
-        if status:
-            tasks = [t for t in tasks if t.status == status]
+        before 为游标位置 (created_at, id)，只返回排在它之后（更早创建）的任务；
+        due_after / due_before 筛选截止日期在 [due_after, due_before) 内的任务
+        """
+        return self._storage.list(
+            skip=skip,
+            limit=limit,
+            status=status,
+            priority=priority,
+            before=before,
+            due_after=due_after,
+            due_before=due_before
+        )
 
-        # 优先级筛选
-        if priority:
-            tasks = [t for t in tasks if t.priority == priority]
+    def get_tasks_projection(
+        self,
+        fields: Sequence[str],
+        skip: int = 0,
+        limit: int = 10,
+        status: Optional[TaskStatus] = None,
+        priority: Optional[str] = None,
+        before: Optional[SortKey] = None,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """获取任务列表的部分字段（筛选和排序与 get_tasks 相同），不构建完整任务模型"""
+        return self._storage.list_projection(
+            fields,
+            skip=skip,
+            limit=limit,
+            status=status,
+            priority=priority,
+            before=before,
+            due_after=due_after,
+            due_before=due_before
+        )
 
-        # 排序（按创建时间倒序）
-        tasks.sort(key=lambda x: x.created_at, reverse=True)
+    def get_task_projection(self, task_id: int, fields: Sequence[str]) -> Optional[Dict[str, Any]]:
+        """获取单个任务的部分字段"""
+        return self._storage.get_projection(task_id, fields)
 
-        # 分页
-        return tasks[skip:skip + limit]
+    def get_upcoming_tasks(
+        self,
+        due_after: datetime,
+        due_before: datetime,
+        statuses: Sequence[TaskStatus] = (TaskStatus.PENDING, TaskStatus.IN_PROGRESS),
+        priority: Optional[str] = None,
+        limit: int = 100,
+        after: Optional[SortKey] = None
+    ) -> List[Task]:
+        """
+        获取截止日期在 [due_after, due_before) 内的任务（按截止日期升序），默认只含未完成任务
 
-    def update_task(self, task_id: int, task_data: TaskUpdate) -> Optional[Task]:
-        """更新任务"""
-        task = self._tasks.get(task_id)
-        if not task:
-            return None
+        after 为游标位置 (due_date, id)，只返回排在它之后的任务
+        """
+        return self._storage.list_due(
+            due_after=due_after,
+            due_before=due_before,
+            statuses=statuses,
+            priority=priority,
+            limit=limit,
+            after=after
+        )
+
+    def iter_task_batches(
+        self,
+        status: Optional[TaskStatus] = None,
+        priority: Optional[str] = None,
+        batch_size: int = 1000
+    ) -> Iterator[List[Task]]:
+        """按创建时间倒序分批遍历任务（游标分页，内存占用与任务总数无关）"""
+        before = None
+        while True:
+            batch = self._storage.list(limit=batch_size, status=status, priority=priority, before=before)
+            if batch:
+                yield batch
+            if len(batch) < batch_size:
+                return
+            before = (batch[-1].created_at, batch[-1].id)
 
-        update_data = task_data.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(task, field, value)
+    def count_tasks(
+        self,
+        status: Optional[TaskStatus] = None,
+        priority: Optional[str] = None,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None
+    ) -> int:
+        """统计符合筛选条件的任务数"""
+        return self._storage.count(
+            status=status,
+            priority=priority,
+            due_after=due_after,
+            due_before=due_before
+        )
+
+    def aggregate_tasks(
+        self,
+        group_by: Sequence[str],
+        bucket: Optional[Tuple[str, str]] = None,
+        status: Optional[TaskStatus] = None,
+        priority: Optional[str] = None,
+        since: Optional[date] = None,
+        until: Optional[date] = None
+    ) -> TaskAggregate:
+        """按状态/优先级分组、按时间分桶统计任务数，分组按时间桶、状态、优先级的声明顺序排列"""
+        rows = self._storage.aggregate(group_by, bucket, status, priority, since, until)
+        statuses, priorities = list(TaskStatus), list(TaskPriority)
+        rows.sort(key=lambda row: (
+            row.get("bucket") or date.min,
+            statuses.index(row["status"]) if "status" in row else 0,
+            priorities.index(row["priority"]) if "priority" in row else 0,
+        ))
+        return TaskAggregate(
+            group_by=list(group_by),
+            bucket=":".join(bucket) if bucket else None,
+            total=sum(row["count"] for row in rows),
+            groups=rows
+        )
 
-        task.updated_at = datetime.now()
-        self._tasks[task_id] = task
+    def update_task(self, task_id: int, task_data: TaskUpdate) -> Optional[Task]:
+        """
+        更新任务
+
+        指定 expected_version 时进行乐观并发控制，版本不一致抛出 VersionConflictError
+        """
+        update_data = task_data.dict(exclude_unset=True, exclude={"expected_version"})
+        update_data["updated_at"] = datetime.now()
+        self._cache.invalidate(task_id)
+        with self._storage.deferred_sync(), self._write_lock:
+            task = self._storage.update(task_id, update_data, task_data.expected_version)
+            if task is not None and self._changes is not None:
+                self._changes.append(ChangeType.UPDATED, task.id, task)
+        if task is not None and self._search is not None:
+            self._search.add(task)
         return task
 
+    def update_tasks(
+        self,
+        updates: Sequence[Tuple[int, TaskUpdate]]
+    ) -> List[Union[Task, None, VersionConflictError]]:
+        """
+        批量更新任务
+
+        结果与输入一一对应：成功为任务，不存在为 None，版本冲突为 VersionConflictError 实例
+        """
+        now = datetime.now()
+        for task_id, _ in updates:
+            self._cache.invalidate(task_id)
+        # 批量条目（TaskBatchUpdate）携带的 id 不属于更新字段
+        with self._storage.deferred_sync(), self._write_lock:
+            results = self._storage.update_many([
+                (
+                    task_id,
+                    {**task_data.dict(exclude_unset=True, exclude={"id", "expected_version"}), "updated_at": now},
+                    task_data.expected_version
+                )
+                for task_id, task_data in updates
+            ])
+            updated = [result for result in results if isinstance(result, Task)]
+            if self._changes is not None:
+                self._changes.extend((ChangeType.UPDATED, task.id, task) for task in updated)
+        if self._search is not None:
+            self._search.add_many(updated)
+        return results
+
     def delete_task(self, task_id: int) -> bool:
         """删除任务"""
-        if task_id in self._tasks:
-            del self._tasks[task_id]
-            return True
-        return False
+        self._cache.invalidate(task_id)
+        if self._search is not None:
+            self._search.remove(task_id)
+        with self._storage.deferred_sync(), self._write_lock:
+            deleted = self._storage.delete(task_id)
+            if deleted and self._changes is not None:
+                self._changes.append(ChangeType.DELETED, task_id)
+        return deleted
 
-    def get_task_stats(self) -> TaskStats:
-        """获取任务统计"""
-        tasks = list(self._tasks.values())
-        now = datetime.now()
+    def delete_tasks(self, task_ids: Sequence[int]) -> List[bool]:
+        """批量删除任务，结果与输入一一对应"""
+        for task_id in task_ids:
+            self._cache.invalidate(task_id)
+            if self._search is not None:
+                self._search.remove(task_id)
+        with self._storage.deferred_sync(), self._write_lock:
+            results = self._storage.delete_many(task_ids)
+            if self._changes is not None:
+                self._changes.extend(
+                    (ChangeType.DELETED, task_id, None) for task_id, deleted in zip(task_ids, results) if deleted
+                )
+        return results
 
+    @property
+    def supports_changes(self) -> bool:
+        """是否提供变更同步（多个进程共享数据而后端没有变更日志时为 False）"""
+        return self._changes is not None
+
+    @property
+    def change_epoch(self) -> str:
+        """变更日志标识，日志重建（进程内日志为服务重启）后变化"""
+        return self._changes.epoch
+
+    def get_last_change_seq(self) -> int:
+        """最新变更序号"""
+        return self._changes.last_seq
+
+    def get_changes(self, since: int, limit: int = 1000) -> Optional[List[TaskChange]]:
+        """
+        获取序号大于 since 的变更（按序号升序）
+
+        返回 None 表示 since 之后的变更已不完整（已被淘汰或服务已重启），调用方需全量同步
+        """
+        return self._changes.since(since, limit)
+
+    async def wait_for_changes(self, since: int, timeout: float) -> bool:
+        """等待序号大于 since 的变更，超时返回 False"""
+        return await self._changes.wait(since, timeout)
+
+    def get_change_stats(self) -> Dict[str, Any]:
+        """变更日志统计"""
+        return self._changes.stats()
+
+    def _ensure_search_index(self) -> None:
+        """首次搜索时索引存储中已有的任务（如 SQLite 数据库中的历史数据）"""
+        if self._search_ready:
+            return
+        with self._search_lock:
+            if self._search_ready:
+                return
+            # 补建期间的并发写入也会更新索引，按版本号保留较新的一份
+            for batch in self.iter_task_batches():
+                self._search.add_many(batch)
+            self._search_ready = True
+
+    def search_tasks(self, query: str, skip: int = 0, limit: int = 10) -> Tuple[int, List[Task]]:
+        """
+        全文搜索任务标题和描述，按相关度排序
+
+        返回 (匹配总数, 任务列表)。索引为进程内数据，结果回表读取：
+        已被其他进程删除的任务会被跳过并移出索引，已被修改的任务重新索引；
+        存储后端自带搜索时直接由后端搜索
+        """
+        if self._search is None:
+            result = self._storage.search(query, skip, limit)
+            if result is not None:
+                return result
+            # 后端未提供搜索（返回 None）时退回进程内索引，由 _ensure_search_index 补建
+            with self._search_lock:
+                if self._search is None:
+                    self._search = SearchIndex()
+                    self._search_ready = False
+        self._ensure_search_index()
+        total, hits = self._search.search(query, skip, limit)
+        tasks = []
+        for task_id, _ in hits:
+            task = self._storage.get(task_id)
+            if task is None:
+                self._search.remove(task_id)
+                total -= 1
+                continue
+            if task.version != self._search.indexed_version(task_id):
+                self._search.add(task)
+            tasks.append(task)
+        return total, tasks
+
+    def get_task_stats(self) -> TaskStats:
+        """获取任务统计（计数均由存储后端的索引维护，不扫描全部任务）"""
         stats = {
-            "total": len(tasks),
-            "pending": 0,
-            "in_progress": 0,
-            "completed": 0,
-            "cancelled": 0,
-            "overdue": 0
+            "total": self.count_tasks(),
+            "overdue": self._storage.count_overdue(datetime.now())
         }
+        for status in TaskStatus:
+            stats[status.value] = self.count_tasks(status=status)
 
-        for task in tasks:
-            # 按状态统计
-            stats[task.status.value] += 1
+        return TaskStats(**stats)
 
-            # 逾期统计
-            if task.due_date and task.due_date < now and task.status != TaskStatus.COMPLETED:
-                stats["overdue"] += 1
+    def get_metrics(self) -> Dict[str, Dict[str, Any]]:
+        """服务内部状态（任务数、索引大小、缓存命中率等），用于监控指标"""
+        return {
+            "tasks": self.get_task_stats().model_dump(),
+            "storage": {"data_version": self.get_data_version(), **self._storage.stats()},
+            "search_index": self._search.stats() if self._search is not None else {},
+            "response_cache": self._cache.stats(),
+            "change_log": self._changes.stats() if self._changes is not None else {},
+        }
 
-        return TaskStats(**stats)
+    def open(self) -> None:
+        """加载存储后端的持久化数据，已有任务在首次搜索时补建索引"""
+        self._storage.open()
+        with self._search_lock:
+            self._search_ready = self._search is None or self._storage.count() == 0
+
+    def close(self) -> None:
+        """关闭存储后端"""
+        self._storage.close()
 
 
 # 创建全局服务实例
-task_service = TaskService()
+task_service = TaskService(
+    create_storage(
+        settings.DATABASE_URL,
+        settings.DATABASE_POOL_SIZE,
+        fsync_interval=settings.WAL_FSYNC_INTERVAL,
+        sync_commit=settings.WAL_SYNC_COMMIT,
+        snapshot_interval=settings.SNAPSHOT_INTERVAL,
+        snapshot_wal_bytes=settings.SNAPSHOT_WAL_BYTES,
+        change_log_max_entries=settings.CHANGE_LOG_MAX_ENTRIES
+    ),
+    ResponseCache(settings.RESPONSE_CACHE_MAX_ENTRIES, settings.RESPONSE_CACHE_MAX_BYTES),
+    ChangeLog(settings.CHANGE_LOG_MAX_ENTRIES)
+)
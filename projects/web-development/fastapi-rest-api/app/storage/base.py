@@ -0,0 +1,259 @@
+"""
+任务存储接口
+定义 TaskService 依赖的存储后端抽象
+"""
+
+from abc import ABC, abstractmethod
+from contextlib import nullcontext
+from datetime import date, datetime, timedelta
+from typing import Any, ContextManager, Dict, List, Optional, Sequence, Tuple, Union
+from app.models.task import Task, TaskChange, TaskStatus
+
+# 排序键：(创建时间, 任务 ID)
+SortKey = Tuple[datetime, int]
+
+# 可投影的任务字段（按 Task 模型的字段顺序）
+TASK_FIELDS: Tuple[str, ...] = tuple(Task.model_fields)
+
+# 聚合：可分组的字段、可分桶的时间字段（按本地日期）和桶宽度
+GROUP_FIELDS: Tuple[str, ...] = ("status", "priority")
+BUCKET_FIELDS: Tuple[str, ...] = ("created_at", "updated_at", "due_date")
+BUCKET_UNITS: Tuple[str, ...] = ("day", "week", "month")
+
+
+def bucket_start(day: date, unit: str) -> date:
+    """日期所在时间桶的起始日期，周从周一开始"""
+    if unit == "week":
+        return day - timedelta(days=day.weekday())
+    if unit == "month":
+        return day.replace(day=1)
+    return day
+
+
+def to_local_naive(dt: Optional[datetime]) -> Optional[datetime]:
+    """带时区的时间转换为本地时间（无时区），以便与 datetime.now() 比较"""
+    if dt is not None and dt.tzinfo is not None:
+        return dt.astimezone().replace(tzinfo=None)
+    return dt
+
+
+class VersionConflictError(Exception):
+    """乐观并发控制：期望版本与任务当前版本不一致"""
+
+    def __init__(self, task_id: int, expected: int, actual: int):
+        super().__init__(f"任务 {task_id} 版本冲突: 期望版本 {expected}，当前版本 {actual}")
+        self.task_id = task_id
+        self.expected = expected
+        self.actual = actual
+
+    def __reduce__(self):
+        # 按构造参数序列化，可在进程间传递（如分片存储）
+        return type(self), (self.task_id, self.expected, self.actual)
+
+
+class TaskStorage(ABC):
+    """
+    任务存储后端
+
+    列表统一按 (created_at, id) 倒序返回；筛选参数为 None 表示不限。
+    截止日期范围为左闭右开区间 [due_after, due_before)，指定任一端时不含无截止日期的任务
+    """
+
+    # 后端自带全文搜索时为 True（如分片存储由各分片维护索引），服务层不再维护进程内索引
+    supports_search = False
+    # 调用会阻塞在磁盘或网络 I/O 上时为 True，接口层改在线程池中调用，避免阻塞事件循环
+    blocking_io = False
+    # 多个进程（worker）可同时读写同一份数据时为 True（SQLite 文件、分片），
+    # 此时进程内的变更日志只包含本进程的写入，不能用于变更同步
+    shared = False
+    # 后端在写入的同一事务中记录变更日志时为 True，所有进程共享，服务层改为读取后端的日志
+    supports_changes = False
+
+    @abstractmethod
+    def insert(self, data: Dict[str, Any]) -> Task:
+        """插入任务并分配 ID，data 包含除 id 外的全部字段"""
+
+    @abstractmethod
+    def get(self, task_id: int) -> Optional[Task]:
+        """按 ID 获取任务"""
+
+    @abstractmethod
+    def get_version(self, task_id: int) -> Optional[int]:
+        """获取任务版本号（无需构建任务模型），任务不存在时返回 None"""
+
+    @abstractmethod
+    def update(
+        self,
+        task_id: int,
+        changes: Dict[str, Any],
+        expected_version: Optional[int] = None
+    ) -> Optional[Task]:
+        """
+        更新部分字段并递增版本号，任务不存在时返回 None
+
+        指定 expected_version 且与当前版本不一致时抛出 VersionConflictError（比较与写入是原子的）
+        """
+
+    @abstractmethod
+    def delete(self, task_id: int) -> bool:
+        """删除任务，返回是否存在"""
+
+    def insert_many(self, items: Sequence[Dict[str, Any]]) -> List[Task]:
+        """批量插入，后端可覆盖以合并索引维护和事务提交"""
+        return [self.insert(data) for data in items]
+
+    def update_many(
+        self,
+        updates: Sequence[Tuple[int, Dict[str, Any], Optional[int]]]
+    ) -> List[Union[Task, None, VersionConflictError]]:
+        """
+        批量更新，updates 为 (task_id, changes, expected_version)
+
+        结果与输入一一对应：成功为任务，不存在为 None，版本冲突为 VersionConflictError 实例
+        """
+        results: List[Union[Task, None, VersionConflictError]] = []
+        for task_id, changes, expected_version in updates:
+            try:
+                results.append(self.update(task_id, changes, expected_version))
+            except VersionConflictError as e:
+                results.append(e)
+        return results
+
+    def delete_many(self, task_ids: Sequence[int]) -> List[bool]:
+        """批量删除，结果与输入一一对应"""
+        return [self.delete(task_id) for task_id in task_ids]
+
+    @abstractmethod
+    def list(
+        self,
+        skip: int = 0,
+        limit: int = 10,
+        status: Optional[TaskStatus] = None,
+        priority: Optional[str] = None,
+        before: Optional[SortKey] = None,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None
+    ) -> List[Task]:
+        """分页查询任务，before 为游标位置，只返回更早创建的任务"""
+
+    def list_projection(
+        self,
+        fields: Sequence[str],
+        skip: int = 0,
+        limit: int = 10,
+        status: Optional[TaskStatus] = None,
+        priority: Optional[str] = None,
+        before: Optional[SortKey] = None,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        分页查询任务的部分字段，返回 {字段: 值} 字典，筛选和排序与 list 相同
+
+        默认由完整任务模型取值，后端可覆盖为只读取所需的列、不构建任务模型
+        """
+        tasks = self.list(skip, limit, status, priority, before, due_after, due_before)
+        return [{field: getattr(task, field) for field in fields} for task in tasks]
+
+    def get_projection(self, task_id: int, fields: Sequence[str]) -> Optional[Dict[str, Any]]:
+        """按 ID 获取任务的部分字段，任务不存在时返回 None"""
+        task = self.get(task_id)
+        return {field: getattr(task, field) for field in fields} if task is not None else None
+
+    @abstractmethod
+    def count(
+        self,
+        status: Optional[TaskStatus] = None,
+        priority: Optional[str] = None,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None
+    ) -> int:
+        """统计符合筛选条件的任务数"""
+
+    @abstractmethod
+    def list_due(
+        self,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None,
+        statuses: Optional[Sequence[TaskStatus]] = None,
+        priority: Optional[str] = None,
+        limit: int = 100,
+        after: Optional[SortKey] = None
+    ) -> List[Task]:
+        """
+        按 (截止日期, id) 升序查询有截止日期的任务
+
+        statuses 为允许的状态集合；after 为游标位置 (截止日期, id)，只返回排在它之后的任务
+        """
+
+    @abstractmethod
+    def aggregate(
+        self,
+        group_by: Sequence[str],
+        bucket: Optional[Tuple[str, str]] = None,
+        status: Optional[TaskStatus] = None,
+        priority: Optional[str] = None,
+        since: Optional[date] = None,
+        until: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        分组计数，返回 [{分组字段: 值, ..., "count": 任务数}]，不保证顺序，不含计数为 0 的分组
+
+        group_by 取自 GROUP_FIELDS；bucket 为 (时间字段, 桶宽度)，按本地日期分桶，
+        分组值中的 "bucket" 为桶的起始日期，没有该时间（如无截止日期）的任务不计入；
+        since / until 限定该时间字段的日期范围 [since, until)
+        """
+
+    @property
+    @abstractmethod
+    def epoch(self) -> str:
+        """存储实例标识，数据被整体替换（如内存存储重启）后会变化，用于区分同号版本"""
+
+    @abstractmethod
+    def data_version(self) -> int:
+        """全局数据版本，任何写入都会递增"""
+
+    @abstractmethod
+    def count_overdue(self, now: datetime) -> int:
+        """统计截止日期早于 now 且未完成的任务数"""
+
+    def search(self, query: str, skip: int = 0, limit: int = 10) -> Optional[Tuple[int, List[Task]]]:
+        """
+        全文搜索，返回 (匹配总数, 按相关度排序的任务)
+
+        默认返回 None 表示后端不提供搜索，由服务层的进程内索引处理；
+        自带搜索的后端覆盖此方法并将 supports_search 设为 True
+        """
+        return None
+
+    def last_change_seq(self) -> int:
+        """最新变更序号（supports_changes 为 True 的后端覆盖）"""
+        return 0
+
+    def changes_since(self, seq: int, limit: int = 1000) -> Optional[List[TaskChange]]:
+        """
+        读取序号大于 seq 的变更（最多 limit 条，按序号升序）
+
+        seq 之后的变更已被淘汰或 seq 超出当前序号时返回 None；
+        supports_changes 为 True 的后端覆盖
+        """
+        return None
+
+    def deferred_sync(self) -> ContextManager[None]:
+        """
+        上下文内的写入返回前不等待落盘，退出上下文时才等待
+
+        调用方在持有自己的锁时写入，释放锁之后再等待，等待期间不阻塞其他写入；
+        写入本身不等待落盘的后端默认无操作
+        """
+        return nullcontext()
+
+    def stats(self) -> Dict[str, Any]:
+        """后端内部统计（如索引大小），用于监控指标"""
+        return {}
+
+    def open(self) -> None:
+        """加载持久化数据（应用启动时调用），默认无操作"""
+
+    def close(self) -> None:
+        """释放资源"""
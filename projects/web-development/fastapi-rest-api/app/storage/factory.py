@@ -0,0 +1,52 @@
+"""
+存储后端工厂
+根据 DATABASE_URL 选择存储实现
+"""
+
+from typing import Optional
+from app.storage.base import TaskStorage
+from app.storage.memory import MemoryTaskStorage
+from app.storage.persistent import PersistentMemoryTaskStorage
+from app.storage.sharded import ShardedTaskStorage
+from app.storage.sqlite import SQLiteTaskStorage
+
+
+def create_storage(
+    database_url: Optional[str] = None,
+    pool_size: int = 5,
+    fsync_interval: float = 0.01,
+    sync_commit: bool = False,
+    snapshot_interval: float = 300.0,
+    snapshot_wal_bytes: int = 64 * 1024 * 1024,
+    change_log_max_entries: int = 10000
+) -> TaskStorage:
+    """
+    创建存储后端
+
+    - 未配置或 memory://：内存存储
+    - memory:///data（相对路径）、memory:////var/lib/tasks（绝对路径）：
+      持久化到该目录的内存存储（预写日志 + 快照），其余参数为日志与快照配置
+    - sqlite:///tasks.db（相对路径）、sqlite:////data/tasks.db（绝对路径）、
+      sqlite:///:memory:：SQLite 存储，变更日志保存在数据库中，最多保留 change_log_max_entries 条
+    - sharded:///run/tasks（相对路径）、sharded:////run/tasks（绝对路径）：
+      连接该目录下已启动的分片进程（python -m app.storage.sharded），pool_size 为每个分片的连接数
+    """
+    if not database_url or database_url == "memory://":
+        return MemoryTaskStorage()
+    if database_url.startswith("memory:///"):
+        return PersistentMemoryTaskStorage(
+            database_url[len("memory:///"):],
+            fsync_interval=fsync_interval,
+            sync_commit=sync_commit,
+            snapshot_interval=snapshot_interval,
+            snapshot_wal_bytes=snapshot_wal_bytes
+        )
+    if database_url.startswith("sqlite:///"):
+        return SQLiteTaskStorage(
+            database_url[len("sqlite:///"):],
+            pool_size=pool_size,
+            change_log_max_entries=change_log_max_entries
+        )
+    if database_url.startswith("sharded:///"):
+        return ShardedTaskStorage(database_url[len("sharded:///"):], pool_size=pool_size)
+    raise ValueError(f"不支持的 DATABASE_URL: {database_url}")
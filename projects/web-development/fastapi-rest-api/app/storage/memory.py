@@ -0,0 +1,693 @@
+"""
+内存存储后端
+列式数组保存任务，分块有序索引和堆维护二级索引
+"""
+
+import sys
+import threading
+import uuid
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from heapq import heapify, heappop, heappush
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple, Union
+from app.models.task import Task, TaskStatus, TaskPriority
+from app.storage.base import BUCKET_FIELDS, TaskStorage, SortKey, VersionConflictError, bucket_start, to_local_naive
+from app.storage.sorted_index import SortedIndex
+
+# 索引键：(状态, 优先级)，None 表示不限
+IndexKey = Tuple[Optional[TaskStatus], Optional[TaskPriority]]
+
+# 状态和优先级以 uint8 编码保存
+_STATUSES = tuple(TaskStatus)
+_STATUS_CODES = {status: code for code, status in enumerate(_STATUSES)}
+_PRIORITIES = tuple(TaskPriority)
+_PRIORITY_CODES = {priority: code for code, priority in enumerate(_PRIORITIES)}
+_COMPLETED = _STATUS_CODES[TaskStatus.COMPLETED]
+# 已删除槽位的状态编码
+DELETED = 255
+
+# 时间以 int64 微秒保存（相对无时区的 1970-01-01，不做时区换算）
+_EPOCH = datetime(1970, 1, 1)
+_MICROSECOND = timedelta(microseconds=1)
+# 没有截止日期
+NO_DUE = -(2 ** 63)
+_DAY = 86_400_000_000
+
+# 时间直方图每天一行，保存各 (状态, 优先级) 组合的任务数，下标为 状态编码 * 优先级数 + 优先级编码
+_COMBOS = len(_STATUSES) * len(_PRIORITIES)
+
+
+def to_us(dt: datetime) -> int:
+    """时间转换为 int64 微秒（有时区的时间先换算为本地时间）"""
+    return (to_local_naive(dt) - _EPOCH) // _MICROSECOND
+
+
+def from_us(us: int) -> datetime:
+    """int64 微秒转换为无时区时间"""
+    return _EPOCH + timedelta(microseconds=us)
+
+
+def intern_text(value: Optional[str]) -> Optional[str]:
+    """标题驻留，重复标题（如批量导入）共享同一个字符串对象"""
+    return sys.intern(value) if value is not None else None
+
+
+class MemoryTaskStorage(TaskStorage):
+    """
+    内存存储，进程重启后数据丢失
+
+    列式存储：ID 单调分配且不复用，ID 为 n 的任务保存在各数组的第 n - 1 个槽位，
+    删除后槽位标记为空；时间为 int64 微秒，状态和优先级为 uint8 编码，
+    Task 模型只在返回给调用方时构建，每个任务约占 120 字节（不含文本）。
+
+    线程安全：所有读写持有同一把锁。
+    每个进程各自持有一份数据，多进程部署请使用 SQLite 共享存储
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._titles: List[Optional[str]] = []
+        self._descriptions: List[Optional[str]] = []
+        self._statuses = array("B")
+        self._priorities = array("B")
+        self._due = array("q")
+        self._created = array("q")
+        self._updated = array("q")
+        self._versions = array("q")
+        # 带时区的截止日期原值（少见），返回时原样输出
+        self._due_aware: Dict[int, datetime] = {}
+        self._live = 0
+        # 创建时间保证随 ID 单调不减，按 ID 排序即按 (created_at, id) 排序
+        self._last_created = NO_DUE
+        # 二级索引：每种筛选组合对应一个升序的任务 ID 分块有序索引，
+        # 列表查询只需在对应索引尾部切片，无需扫描和排序全部任务
+        self._indexes: Dict[IndexKey, SortedIndex] = defaultdict(SortedIndex)
+        # 截止日期索引：有截止日期的任务按 (截止时间, ID) 升序排列，范围查询二分定位区间端点
+        self._due_index = SortedIndex(keyed=True)
+        # 时间直方图：BUCKET_FIELDS 中每个时间字段一个 {天序号: 各组合的任务数}，
+        # 随写入增减，分组聚合只需遍历天数而不是任务数
+        self._histograms: Tuple[Dict[int, array], ...] = tuple({} for _ in BUCKET_FIELDS)
+        # 逾期统计：未完成任务的截止日期最小堆（惰性删除），到期后移入逾期集合
+        self._due_heap: List[Tuple[int, int]] = []
+        self._overdue: Set[int] = set()
+        # 版本：任务版本保存在版本数组中，全局版本随每次写入递增
+        self._epoch = uuid.uuid4().hex[:16]
+        self._version = 0
+
+    def _slot(self, task_id: int) -> Optional[int]:
+        """任务 ID 对应的槽位，不存在或已删除时返回 None"""
+        i = task_id - 1
+        if 0 <= i < len(self._statuses) and self._statuses[i] != DELETED:
+            return i
+        return None
+
+    def _build(self, i: int) -> Task:
+        """由槽位构建任务模型（数据写入时已校验，跳过校验）"""
+        return Task.model_construct(
+            id=i + 1,
+            title=self._titles[i],
+            description=self._descriptions[i],
+            status=_STATUSES[self._statuses[i]],
+            priority=_PRIORITIES[self._priorities[i]],
+            due_date=self._due_date(i),
+            created_at=from_us(self._created[i]),
+            updated_at=from_us(self._updated[i]),
+            version=self._versions[i],
+        )
+
+    def _slot_days(self, i: int) -> Tuple[Optional[int], ...]:
+        """槽位在各时间直方图中的天序号（与 BUCKET_FIELDS 对应），无截止日期时为 None"""
+        due = self._due[i]
+        return self._created[i] // _DAY, self._updated[i] // _DAY, None if due == NO_DUE else due // _DAY
+
+    def _histogram_add(self, status: int, priority: int, days: Tuple[Optional[int], ...], delta: int) -> None:
+        combo = status * len(_PRIORITIES) + priority
+        for histogram, day in zip(self._histograms, days):
+            if day is None:
+                continue
+            row = histogram.get(day)
+            if row is None:
+                row = histogram[day] = array("q", bytes(8 * _COMBOS))
+            row[combo] += delta
+
+    def _due_date(self, i: int) -> Optional[datetime]:
+        due = self._due[i]
+        return self._due_aware.get(i + 1) or (None if due == NO_DUE else from_us(due))
+
+    def _projector(self, fields: Sequence[str]) -> Callable[[int], Dict[str, Any]]:
+        """只读取指定列的取值函数，由槽位生成 {字段: 值}"""
+        columns: Dict[str, Callable[[int], Any]] = {
+            "id": lambda i: i + 1,
+            "title": self._titles.__getitem__,
+            "description": self._descriptions.__getitem__,
+            "status": lambda i: _STATUSES[self._statuses[i]],
+            "priority": lambda i: _PRIORITIES[self._priorities[i]],
+            "due_date": self._due_date,
+            "created_at": lambda i: from_us(self._created[i]),
+            "updated_at": lambda i: from_us(self._updated[i]),
+            "version": self._versions.__getitem__,
+        }
+        getters = [(field, columns[field]) for field in fields]
+        return lambda i: {field: getter(i) for field, getter in getters}
+
+    def _set_due(self, i: int, due_date: Optional[datetime]) -> None:
+        task_id = i + 1
+        self._due_aware.pop(task_id, None)
+        if due_date is None:
+            self._due[i] = NO_DUE
+            return
+        if due_date.tzinfo is not None:
+            self._due_aware[task_id] = due_date
+        self._due[i] = to_us(due_date)
+
+    def _write(self, i: int, changes: Dict[str, Any]) -> None:
+        """写入部分字段"""
+        for field, value in changes.items():
+            if field == "title":
+                self._titles[i] = intern_text(value)
+            elif field == "description":
+                self._descriptions[i] = value
+            elif field == "status":
+                self._statuses[i] = _STATUS_CODES[TaskStatus(value)]
+            elif field == "priority":
+                self._priorities[i] = _PRIORITY_CODES[TaskPriority(value)]
+            elif field == "due_date":
+                self._set_due(i, value)
+            elif field == "updated_at":
+                self._updated[i] = to_us(value)
+
+    def _append(self, data: Dict[str, Any]) -> int:
+        """追加新任务，返回槽位"""
+        created = max(to_us(data["created_at"]), self._last_created)
+        self._last_created = created
+        updated_at = data.get("updated_at")
+        self._titles.append(intern_text(data.get("title")))
+        self._descriptions.append(data.get("description"))
+        self._statuses.append(_STATUS_CODES[TaskStatus(data.get("status", TaskStatus.PENDING))])
+        self._priorities.append(_PRIORITY_CODES[TaskPriority(data.get("priority", TaskPriority.MEDIUM))])
+        self._due.append(NO_DUE)
+        self._created.append(created)
+        self._updated.append(created if updated_at is None else to_us(updated_at))
+        self._versions.append(data.get("version", 1))
+        i = len(self._statuses) - 1
+        self._set_due(i, data.get("due_date"))
+        self._histogram_add(self._statuses[i], self._priorities[i], self._slot_days(i), 1)
+        self._live += 1
+        self._version += 1
+        return i
+
+    @staticmethod
+    def _index_keys(status: int, priority: int) -> Tuple[IndexKey, ...]:
+        """任务所属的全部索引键"""
+        status, priority = _STATUSES[status], _PRIORITIES[priority]
+        return (
+            (None, None),
+            (status, None),
+            (None, priority),
+            (status, priority),
+        )
+
+    def _add_to_indexes(self, i: int) -> None:
+        """将任务加入索引"""
+        for key in self._index_keys(self._statuses[i], self._priorities[i]):
+            self._indexes[key].add(i + 1)
+
+    def _remove_from_indexes(self, task_id: int, status: int, priority: int) -> None:
+        """将任务移出索引"""
+        for key in self._index_keys(status, priority):
+            self._indexes[key].discard(task_id)
+
+    def _bulk_reindex(
+        self,
+        removed: Iterable[Tuple[IndexKey, int]],
+        added: Iterable[Tuple[IndexKey, int]]
+    ) -> None:
+        """批量维护索引：按索引分组后整批处理（新任务 ID 总是最大，直接追加到末尾）"""
+        removals: Dict[IndexKey, List[int]] = defaultdict(list)
+        for key, task_id in removed:
+            removals[key].append(task_id)
+        additions: Dict[IndexKey, List[int]] = defaultdict(list)
+        for key, task_id in added:
+            additions[key].append(task_id)
+
+        for key, task_ids in removals.items():
+            self._indexes[key].discard_many(task_ids)
+        for key, task_ids in additions.items():
+            self._indexes[key].add_many(task_ids)
+
+    def _reindex_due(
+        self,
+        removed: Sequence[Tuple[int, int]],
+        added: Sequence[Tuple[int, int]]
+    ) -> None:
+        """维护截止日期索引，条目为 (截止时间, ID)，无截止日期的条目忽略"""
+        self._due_index.discard_many(entry for entry in removed if entry[0] != NO_DUE)
+        self._due_index.add_many([entry for entry in added if entry[0] != NO_DUE])
+
+    def _track_due(self, i: int) -> None:
+        """截止日期或状态变化后重新登记逾期跟踪"""
+        task_id = i + 1
+        self._overdue.discard(task_id)
+        due = self._due[i]
+        if due != NO_DUE and self._statuses[i] != _COMPLETED:
+            heappush(self._due_heap, (due, task_id))
+
+        # 过期堆条目过多时重建，避免频繁修改截止日期导致堆无限增长
+        if len(self._due_heap) > 2 * self._live + 64:
+            self._due_heap = [
+                (due, j + 1) for j, due in enumerate(self._due)
+                if due != NO_DUE
+                and self._statuses[j] not in (_COMPLETED, DELETED)
+                and j + 1 not in self._overdue
+            ]
+            heapify(self._due_heap)
+
+    def _rebuild_indexes(self) -> None:
+        """由列数据一次性重建全部索引和计数（整体加载数据后调用），按槽位顺序追加即为有序"""
+        columns: Dict[IndexKey, array] = defaultdict(lambda: array("q"))
+        self._histograms = tuple({} for _ in BUCKET_FIELDS)
+        appenders: Dict[Tuple[int, int], Tuple[Any, ...]] = {}
+        due_entries: List[Tuple[int, int]] = []
+        heap: List[Tuple[int, int]] = []
+        live = 0
+        for i, (status, priority) in enumerate(zip(self._statuses, self._priorities)):
+            if status == DELETED:
+                continue
+            live += 1
+            task_id = i + 1
+            targets = appenders.get((status, priority))
+            if targets is None:
+                targets = appenders[(status, priority)] = tuple(
+                    columns[key].append for key in self._index_keys(status, priority)
+                )
+            for append in targets:
+                append(task_id)
+            self._histogram_add(status, priority, self._slot_days(i), 1)
+            due = self._due[i]
+            if due != NO_DUE:
+                due_entries.append((due, task_id))
+                if status != _COMPLETED:
+                    heap.append((due, task_id))
+
+        self._indexes = defaultdict(SortedIndex, ((key, SortedIndex(ids)) for key, ids in columns.items()))
+        due_entries.sort()
+        self._due_index = SortedIndex(due_entries, keyed=True)
+        heapify(heap)
+        self._due_heap = heap
+        self._overdue = set()
+        self._live = live
+        self._last_created = self._created[-1] if self._created else NO_DUE
+        self._version += 1
+
+    def insert(self, data: Dict[str, Any]) -> Task:
+        with self._lock:
+            i = self._append(data)
+            self._add_to_indexes(i)
+            self._reindex_due((), ((self._due[i], i + 1),))
+            self._track_due(i)
+            return self._build(i)
+
+    def insert_many(self, items: Sequence[Dict[str, Any]]) -> List[Task]:
+        with self._lock:
+            slots = [self._append(data) for data in items]
+            added = []
+            for i in slots:
+                added.extend(
+                    (key, i + 1) for key in self._index_keys(self._statuses[i], self._priorities[i])
+                )
+                self._track_due(i)
+            self._bulk_reindex((), added)
+            self._reindex_due((), [(self._due[i], i + 1) for i in slots])
+            return [self._build(i) for i in slots]
+
+    def get(self, task_id: int) -> Optional[Task]:
+        with self._lock:
+            i = self._slot(task_id)
+            return self._build(i) if i is not None else None
+
+    def get_version(self, task_id: int) -> Optional[int]:
+        with self._lock:
+            i = self._slot(task_id)
+            return self._versions[i] if i is not None else None
+
+    def _update(
+        self,
+        i: int,
+        changes: Dict[str, Any],
+        expected_version: Optional[int]
+    ) -> None:
+        """校验版本并写入，不维护二级索引"""
+        if expected_version is not None and self._versions[i] != expected_version:
+            raise VersionConflictError(i + 1, expected_version, self._versions[i])
+        before = (self._statuses[i], self._priorities[i], self._slot_days(i))
+        self._write(i, changes)
+        after = (self._statuses[i], self._priorities[i], self._slot_days(i))
+        if after != before:
+            self._histogram_add(*before, -1)
+            self._histogram_add(*after, 1)
+        self._versions[i] += 1
+        self._version += 1
+        if "due_date" in changes or "status" in changes:
+            self._track_due(i)
+
+    def update(
+        self,
+        task_id: int,
+        changes: Dict[str, Any],
+        expected_version: Optional[int] = None
+    ) -> Optional[Task]:
+        with self._lock:
+            i = self._slot(task_id)
+            if i is None:
+                return None
+
+            status, priority, due = self._statuses[i], self._priorities[i], self._due[i]
+            self._update(i, changes, expected_version)
+            if self._statuses[i] != status or self._priorities[i] != priority:
+                self._remove_from_indexes(task_id, status, priority)
+                self._add_to_indexes(i)
+            if self._due[i] != due:
+                self._reindex_due(((due, task_id),), ((self._due[i], task_id),))
+            return self._build(i)
+
+    def update_many(
+        self,
+        updates: Sequence[Tuple[int, Dict[str, Any], Optional[int]]]
+    ) -> List[Union[Task, None, VersionConflictError]]:
+        with self._lock:
+            results: List[Union[Task, None, VersionConflictError]] = []
+            # 批次内首次修改前的 (状态, 优先级, 截止时间)，最后与当前值对比，统一维护索引
+            originals: Dict[int, Tuple[int, int, int]] = {}
+            for task_id, changes, expected_version in updates:
+                i = self._slot(task_id)
+                if i is None:
+                    results.append(None)
+                    continue
+
+                original = (self._statuses[i], self._priorities[i], self._due[i])
+                try:
+                    self._update(i, changes, expected_version)
+                except VersionConflictError as e:
+                    results.append(e)
+                    continue
+                originals.setdefault(i, original)
+                results.append(self._build(i))
+
+            removed: List[Tuple[IndexKey, int]] = []
+            added: List[Tuple[IndexKey, int]] = []
+            due_removed: List[Tuple[int, int]] = []
+            due_added: List[Tuple[int, int]] = []
+            for i, (status, priority, due) in originals.items():
+                if self._statuses[i] != status or self._priorities[i] != priority:
+                    removed.extend((key, i + 1) for key in self._index_keys(status, priority))
+                    added.extend(
+                        (key, i + 1) for key in self._index_keys(self._statuses[i], self._priorities[i])
+                    )
+                if self._due[i] != due:
+                    due_removed.append((due, i + 1))
+                    due_added.append((self._due[i], i + 1))
+            self._bulk_reindex(removed, added)
+            self._reindex_due(due_removed, due_added)
+            return results
+
+    def _free(self, i: int) -> None:
+        """清空槽位"""
+        task_id = i + 1
+        self._histogram_add(self._statuses[i], self._priorities[i], self._slot_days(i), -1)
+        self._statuses[i] = DELETED
+        self._titles[i] = None
+        self._descriptions[i] = None
+        self._due_aware.pop(task_id, None)
+        self._overdue.discard(task_id)
+        self._live -= 1
+        self._version += 1
+
+    def delete(self, task_id: int) -> bool:
+        with self._lock:
+            i = self._slot(task_id)
+            if i is None:
+                return False
+            self._remove_from_indexes(task_id, self._statuses[i], self._priorities[i])
+            self._reindex_due(((self._due[i], task_id),), ())
+            self._free(i)
+            return True
+
+    def delete_many(self, task_ids: Sequence[int]) -> List[bool]:
+        with self._lock:
+            results = []
+            removed: List[Tuple[IndexKey, int]] = []
+            due_removed: List[Tuple[int, int]] = []
+            for task_id in task_ids:
+                i = self._slot(task_id)
+                results.append(i is not None)
+                if i is not None:
+                    removed.extend(
+                        (key, task_id) for key in self._index_keys(self._statuses[i], self._priorities[i])
+                    )
+                    due_removed.append((self._due[i], task_id))
+                    self._free(i)
+            self._bulk_reindex(removed, ())
+            self._reindex_due(due_removed, ())
+            return results
+
+    def _id_bound(self, before: SortKey) -> int:
+        """
+        游标 (created_at, id) 对应的 ID 上界：(创建时间, ID) 小于游标的任务恰为 ID 小于返回值的任务
+
+        创建时间随 ID 单调不减，创建时间早于游标的任务都在前面，与游标同一时间的任务再按 ID 比较；
+        游标来自本存储时结果即游标 ID，来自其他排序来源（如分片存储的全局 ID）时同样正确
+        """
+        created = to_us(before[0])
+        lo = bisect_left(self._created, created)
+        hi = bisect_right(self._created, created, lo)
+        return min(max(before[1], lo + 1), hi + 1)
+
+    def _page_ids(
+        self,
+        skip: int,
+        limit: int,
+        status: Optional[TaskStatus],
+        priority: Optional[str],
+        before: Optional[SortKey],
+        due_after: Optional[datetime],
+        due_before: Optional[datetime]
+    ) -> Sequence[int]:
+        """一页任务的 ID（按创建时间倒序），调用方需持有锁"""
+        index: Optional[SortedIndex]
+        if due_after is not None or due_before is not None:
+            index = SortedIndex(sorted(self._due_matches(due_after, due_before, status, priority)))
+        else:
+            index = self._indexes.get((status or None, priority or None))
+        if not index:
+            return ()
+
+        # 索引为升序，倒序分页即从索引尾部（或游标位置）向前切片
+        end = index.position(self._id_bound(before)) if before else len(index)
+        end -= skip
+        if end <= 0:
+            return ()
+        start = max(end - limit, 0)
+        return index.ids(start, end)[::-1]
+
+    def list(
+        self,
+        skip: int = 0,
+        limit: int = 10,
+        status: Optional[TaskStatus] = None,
+        priority: Optional[str] = None,
+        before: Optional[SortKey] = None,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None
+    ) -> List[Task]:
+        with self._lock:
+            task_ids = self._page_ids(skip, limit, status, priority, before, due_after, due_before)
+            return [self._build(task_id - 1) for task_id in task_ids]
+
+    def list_projection(
+        self,
+        fields: Sequence[str],
+        skip: int = 0,
+        limit: int = 10,
+        status: Optional[TaskStatus] = None,
+        priority: Optional[str] = None,
+        before: Optional[SortKey] = None,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        with self._lock:
+            project = self._projector(fields)
+            task_ids = self._page_ids(skip, limit, status, priority, before, due_after, due_before)
+            return [project(task_id - 1) for task_id in task_ids]
+
+    def get_projection(self, task_id: int, fields: Sequence[str]) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            i = self._slot(task_id)
+            return self._projector(fields)(i) if i is not None else None
+
+    def count(
+        self,
+        status: Optional[TaskStatus] = None,
+        priority: Optional[str] = None,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None
+    ) -> int:
+        if due_after is not None or due_before is not None:
+            with self._lock:
+                return len(self._due_matches(due_after, due_before, status, priority))
+        # 索引长度即计数，O(1)
+        return len(self._indexes.get((status or None, priority or None), ()))
+
+    def _due_bounds(self, due_after: Optional[datetime], due_before: Optional[datetime]) -> Tuple[int, int]:
+        """截止日期范围 [due_after, due_before) 在截止日期索引中的区间"""
+        index = self._due_index
+        lo = index.key_position(to_us(due_after)) if due_after is not None else 0
+        hi = index.key_position(to_us(due_before)) if due_before is not None else len(index)
+        return lo, hi
+
+    @staticmethod
+    def _filter_codes(
+        statuses: Optional[Iterable[TaskStatus]],
+        priority: Optional[str]
+    ) -> Optional[Tuple[Optional[Set[int]], Optional[int]]]:
+        """筛选条件转换为 (状态编码集合, 优先级编码)，None 表示不限；优先级非法时返回 None"""
+        status_codes = {_STATUS_CODES[TaskStatus(status)] for status in statuses} if statuses else None
+        if not priority:
+            return status_codes, None
+        priority_code = _PRIORITY_CODES.get(priority)
+        return (status_codes, priority_code) if priority_code is not None else None
+
+    def _due_matches(
+        self,
+        due_after: Optional[datetime],
+        due_before: Optional[datetime],
+        status: Optional[TaskStatus],
+        priority: Optional[str]
+    ) -> List[int]:
+        """截止日期在范围内且符合筛选条件的任务 ID（按截止日期排序）"""
+        codes = self._filter_codes((status,) if status else None, priority)
+        if codes is None:
+            return []
+        lo, hi = self._due_bounds(due_after, due_before)
+        task_ids = self._due_index.ids(lo, hi)
+        status_codes, priority_code = codes
+        if status_codes is None and priority_code is None:
+            return list(task_ids)
+        return [task_id for task_id in task_ids if self._matches(task_id - 1, status_codes, priority_code)]
+
+    def _matches(self, i: int, status_codes: Optional[Set[int]], priority_code: Optional[int]) -> bool:
+        return (
+            (status_codes is None or self._statuses[i] in status_codes)
+            and (priority_code is None or self._priorities[i] == priority_code)
+        )
+
+    def list_due(
+        self,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None,
+        statuses: Optional[Sequence[TaskStatus]] = None,
+        priority: Optional[str] = None,
+        limit: int = 100,
+        after: Optional[SortKey] = None
+    ) -> List[Task]:
+        with self._lock:
+            codes = self._filter_codes(statuses, priority)
+            if codes is None:
+                return []
+            lo, hi = self._due_bounds(due_after, due_before)
+            if after:
+                lo = max(lo, self._due_index.position((to_us(after[0]), after[1]), right=True))
+
+            # 从区间起点顺序扫描，取满 limit 条即停止
+            tasks = []
+            for task_id in self._due_index.iter_ids(lo, hi):
+                if self._matches(task_id - 1, *codes):
+                    tasks.append(self._build(task_id - 1))
+                    if len(tasks) >= limit:
+                        break
+            return tasks
+
+    def aggregate(
+        self,
+        group_by: Sequence[str],
+        bucket: Optional[Tuple[str, str]] = None,
+        status: Optional[TaskStatus] = None,
+        priority: Optional[str] = None,
+        since: Optional[date] = None,
+        until: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        # 不分桶时直接取 (状态, 优先级) 索引的长度，分桶时遍历直方图的天数，均与任务数无关
+        codes = self._filter_codes((status,) if status else None, priority)
+        if codes is None:
+            return []
+        status_codes, priority_code = codes
+        by_status, by_priority = "status" in group_by, "priority" in group_by
+        # 参与统计的 (直方图下标, 状态编码, 优先级编码, 分组键)
+        combos = [
+            (s * len(_PRIORITIES) + p, s, p, (s if by_status else None, p if by_priority else None))
+            for s in range(len(_STATUSES)) for p in range(len(_PRIORITIES))
+            if (status_codes is None or s in status_codes) and (priority_code is None or p == priority_code)
+        ]
+        counts: Dict[Tuple[Any, ...], int] = defaultdict(int)
+
+        with self._lock:
+            if bucket is None:
+                for _, s, p, key in combos:
+                    count = len(self._indexes.get((_STATUSES[s], _PRIORITIES[p]), ()))
+                    if count:
+                        counts[(None, *key)] += count
+            else:
+                field, unit = bucket
+                epoch_day = _EPOCH.date()
+                first = (since - epoch_day).days if since is not None else None
+                last = (until - epoch_day).days if until is not None else None
+                for day, row in self._histograms[BUCKET_FIELDS.index(field)].items():
+                    if (first is not None and day < first) or (last is not None and day >= last):
+                        continue
+                    start = bucket_start(epoch_day + timedelta(days=day), unit)
+                    for combo, _, _, key in combos:
+                        count = row[combo]
+                        if count:
+                            counts[(start, *key)] += count
+
+        groups = []
+        for (start, s, p), count in counts.items():
+            group: Dict[str, Any] = {"count": count}
+            if by_status:
+                group["status"] = _STATUSES[s]
+            if by_priority:
+                group["priority"] = _PRIORITIES[p]
+            if bucket is not None:
+                group["bucket"] = start
+            groups.append(group)
+        return groups
+
+    @property
+    def epoch(self) -> str:
+        return self._epoch
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "slots": len(self._statuses),
+                "index_entries": sum(len(keys) for keys in self._indexes.values()),
+                "due_index_entries": len(self._due_index),
+                "due_heap_entries": len(self._due_heap),
+            }
+
+    def data_version(self) -> int:
+        return self._version
+
+    def count_overdue(self, now: datetime) -> int:
+        # 只弹出自上次调用以来到期的堆顶条目，均摊 O(1)
+        now_us = to_us(now)
+        with self._lock:
+            heap = self._due_heap
+            while heap and heap[0][0] < now_us:
+                due, task_id = heappop(heap)
+                i = self._slot(task_id)
+                # 跳过已删除、已完成或截止日期已修改的过期条目
+                if i is not None and self._statuses[i] != _COMPLETED and self._due[i] == due:
+                    self._overdue.add(task_id)
+            return len(self._overdue)
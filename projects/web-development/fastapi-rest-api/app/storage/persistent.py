@@ -0,0 +1,598 @@
+"""
+内存存储持久化
+预写日志（WAL）记录每次写入，后台线程批量 fsync（组提交）；
+定期把列数据写成二进制快照并清理旧日志，启动时加载快照并重放之后的日志
+"""
+
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from contextlib import contextmanager
+from datetime import timedelta, timezone
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from app.models.task import Task
+from app.storage.base import VersionConflictError
+from app.storage.memory import DELETED, NO_DUE, MemoryTaskStorage, from_us, intern_text
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows 没有 fcntl，不对数据目录加锁
+    fcntl = None
+
+# 日志记录：帧头 (负载长度, CRC32) + 负载
+_FRAME = struct.Struct("<II")
+# 行记录：类型, 序号, ID, 状态, 优先级, 截止, 创建, 更新, 版本, 截止日期时区偏移秒, 标题字节数, 描述字节数
+_ROW = struct.Struct("<BqqBBqqqqiii")
+# 删除记录：类型, 序号, ID
+_DELETE = struct.Struct("<Bqq")
+_OP_ROW = 1
+_OP_DELETE = 2
+_NO_OFFSET = -(2 ** 31)
+# 字符串长度为 -1 表示 None
+_NONE = -1
+
+# 快照：文件头 (魔数, 序号, 槽位数) + 若干 (长度, 字节) 段 + 全文 CRC32
+_SNAPSHOT_MAGIC = b"TASKSNP1"
+_SNAPSHOT_HEADER = struct.Struct("<8sQQ")
+_SECTION = struct.Struct("<Q")
+_CRC = struct.Struct("<I")
+
+SNAPSHOT_FILE = "snapshot.bin"
+LOCK_FILE = "LOCK"
+WAL_PREFIX = "wal-"
+WAL_SUFFIX = ".log"
+# 单个日志段的大小上限，超过后切换到新段
+WAL_SEGMENT_BYTES = 64 * 1024 * 1024
+
+_fdatasync = getattr(os, "fdatasync", os.fsync)
+
+
+def _fsync_dir(directory: str) -> None:
+    """fsync 目录，确保新建和重命名的文件在崩溃后可见（不支持的平台忽略）"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _lock_directory(directory: str) -> Optional[int]:
+    """
+    对数据目录加排他锁，返回持有锁的文件描述符（不支持的平台返回 None）
+
+    两个进程同时打开同一目录时各自在内存中维护一份数据并写各自的日志，
+    快照会互相覆盖、删除对方的日志，因此第二个进程直接报错而不是静默丢数据；
+    进程退出（包括崩溃）时操作系统自动释放锁
+    """
+    if fcntl is None:
+        return None
+    fd = os.open(os.path.join(directory, LOCK_FILE), os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        os.close(fd)
+        raise RuntimeError(
+            f"数据目录 {directory} 已被其他进程打开；持久化内存存储只能由一个进程使用，"
+            f"多个 worker 请改用 SQLite 或分片存储"
+        )
+    return fd
+
+
+def _encode_text(value: Optional[str]) -> bytes:
+    return value.encode("utf-8", "surrogatepass") if value is not None else b""
+
+
+def _decode_text(data: bytes, length: int) -> Optional[str]:
+    return bytes(data).decode("utf-8", "surrogatepass") if length != _NONE else None
+
+
+def _little_endian(values: array) -> array:
+    """快照中的数组统一为小端字节序"""
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def _load_array(typecode: str, data: memoryview) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder == "big":
+        values.byteswap()
+    return values
+
+
+class PersistentMemoryTaskStorage(MemoryTaskStorage):
+    """
+    带持久化的内存存储
+
+    读取与内存存储完全相同。每次写入在持有存储锁时把任务写入后的完整状态（或删除标记）
+    编码追加到内存缓冲区，只增加几微秒；后台线程每 fsync_interval 秒把缓冲区写入日志并 fsync，
+    一次 fsync 提交期间的全部写入，进程崩溃最多丢失最近一个间隔的写入。
+    sync_commit 为 True 时写入等待所在批次 fsync 完成后才返回，不丢数据，延迟为毫秒级。
+
+    日志记录带单调递增的序号，快照记录生成时的序号，重放时跳过快照已包含的记录；
+    日志累计超过 snapshot_wal_bytes 字节或距上次快照超过 snapshot_interval 秒时在后台写快照，
+    完成后删除已被快照覆盖的日志段。关闭时写入最终快照，下次启动只需加载快照
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        fsync_interval: float = 0.01,
+        sync_commit: bool = False,
+        snapshot_interval: float = 300.0,
+        snapshot_wal_bytes: int = 64 * 1024 * 1024
+    ):
+        super().__init__()
+        self._directory = directory
+        self._fsync_interval = fsync_interval
+        self._sync_commit = sync_commit
+        # 同步提交时写入要等待 fsync，读取仍只访问内存
+        self.blocking_io = sync_commit
+        self._snapshot_interval = snapshot_interval
+        self._snapshot_wal_bytes = snapshot_wal_bytes
+        # 最新记录序号，随写入在存储锁内递增
+        self._lsn = 0
+        # 待写入的日志缓冲区及其中最大的序号、已 fsync 的最大序号，由 _wal_cond 保护
+        self._wal_cond = threading.Condition()
+        self._pending = bytearray()
+        self._pending_lsn = 0
+        self._durable_lsn = 0
+        self._wal_error: Optional[BaseException] = None
+        # 以下只由刷盘线程访问
+        self._wal_file = None
+        self._segment_bytes = 0
+        self._wal_bytes = 0
+        self._last_snapshot = time.monotonic()
+        # 快照线程复制完数据后通知刷盘线程切换到新的日志段（首次写入时打开第一个段）
+        self._rotate = threading.Event()
+        self._rotate.set()
+        # 最近一次快照包含的最大序号
+        self._snapshot_lsn = 0
+        self._snapshotting = threading.Lock()
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        # deferred_sync() 内各线程写入的最大序号，退出上下文时等待
+        self._deferred = threading.local()
+        # 数据目录排他锁，open() 时获取，close() 时释放
+        self._lock_fd: Optional[int] = None
+
+    # ---- 写入 ----
+
+    def _check_open(self) -> None:
+        if self._flusher is None:
+            raise RuntimeError("持久化存储尚未打开，请先调用 open()")
+
+    def _encode_row(self, lsn: int, i: int) -> bytes:
+        task_id = i + 1
+        title, description = self._titles[i], self._descriptions[i]
+        title_bytes, description_bytes = _encode_text(title), _encode_text(description)
+        aware = self._due_aware.get(task_id)
+        payload = _ROW.pack(
+            _OP_ROW, lsn, task_id,
+            self._statuses[i], self._priorities[i],
+            self._due[i], self._created[i], self._updated[i], self._versions[i],
+            int(aware.utcoffset().total_seconds()) if aware is not None else _NO_OFFSET,
+            len(title_bytes) if title is not None else _NONE,
+            len(description_bytes) if description is not None else _NONE,
+        ) + title_bytes + description_bytes
+        return _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+
+    def _log(self, slots: Iterable[int] = (), deleted: Iterable[int] = ()) -> int:
+        """在存储锁内记录槽位的当前状态和被删除的任务 ID，返回最后一条记录的序号"""
+        records = bytearray()
+        for i in slots:
+            self._lsn += 1
+            records += self._encode_row(self._lsn, i)
+        for task_id in deleted:
+            self._lsn += 1
+            payload = _DELETE.pack(_OP_DELETE, self._lsn, task_id)
+            records += _FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+        with self._wal_cond:
+            if self._wal_error is not None:
+                raise RuntimeError(f"写入日志失败: {self._wal_error}")
+            self._pending += records
+            self._pending_lsn = self._lsn
+        return self._lsn
+
+    def _wait_durable(self, lsn: int) -> None:
+        """sync_commit 模式下等待序号 lsn 之前的记录 fsync 完成（deferred_sync() 内只记下序号）"""
+        if not self._sync_commit:
+            return
+        deferred = getattr(self._deferred, "lsn", None)
+        if deferred is not None:
+            self._deferred.lsn = max(deferred, lsn)
+            return
+        self._wake.set()
+        with self._wal_cond:
+            while self._durable_lsn < lsn:
+                if self._wal_error is not None:
+                    raise RuntimeError(f"写入日志失败: {self._wal_error}")
+                self._wal_cond.wait(1.0)
+
+    @contextmanager
+    def deferred_sync(self) -> Iterator[None]:
+        """上下文内的写入不等待 fsync，正常退出时一次等待其中最后一条记录；可嵌套"""
+        if not self._sync_commit or getattr(self._deferred, "lsn", None) is not None:
+            yield
+            return
+        self._deferred.lsn = 0
+        try:
+            yield
+            lsn = self._deferred.lsn
+        finally:
+            self._deferred.lsn = None
+        if lsn:
+            self._wait_durable(lsn)
+
+    def insert(self, data: Dict[str, Any]) -> Task:
+        self._check_open()
+        with self._lock:
+            task = super().insert(data)
+            lsn = self._log((task.id - 1,))
+        self._wait_durable(lsn)
+        return task
+
+    def insert_many(self, items: Sequence[Dict[str, Any]]) -> List[Task]:
+        self._check_open()
+        with self._lock:
+            tasks = super().insert_many(items)
+            lsn = self._log(task.id - 1 for task in tasks)
+        self._wait_durable(lsn)
+        return tasks
+
+    def update(
+        self,
+        task_id: int,
+        changes: Dict[str, Any],
+        expected_version: Optional[int] = None
+    ) -> Optional[Task]:
+        self._check_open()
+        with self._lock:
+            task = super().update(task_id, changes, expected_version)
+            if task is None:
+                return None
+            lsn = self._log((task_id - 1,))
+        self._wait_durable(lsn)
+        return task
+
+    def update_many(
+        self,
+        updates: Sequence[Tuple[int, Dict[str, Any], Optional[int]]]
+    ) -> List[Union[Task, None, VersionConflictError]]:
+        self._check_open()
+        with self._lock:
+            results = super().update_many(updates)
+            # 同一任务在批次内多次更新时只记录最终状态
+            slots = dict.fromkeys(result.id - 1 for result in results if isinstance(result, Task))
+            lsn = self._log(slots)
+        self._wait_durable(lsn)
+        return results
+
+    def delete(self, task_id: int) -> bool:
+        self._check_open()
+        with self._lock:
+            if not super().delete(task_id):
+                return False
+            lsn = self._log(deleted=(task_id,))
+        self._wait_durable(lsn)
+        return True
+
+    def delete_many(self, task_ids: Sequence[int]) -> List[bool]:
+        self._check_open()
+        with self._lock:
+            results = super().delete_many(task_ids)
+            lsn = self._log(deleted=[task_id for task_id, ok in zip(task_ids, results) if ok])
+        self._wait_durable(lsn)
+        return results
+
+    # ---- 刷盘 ----
+
+    def _segments(self) -> List[Tuple[int, str]]:
+        """日志段 (首条记录序号, 路径)，按序号升序"""
+        segments = []
+        for name in os.listdir(self._directory):
+            if name.startswith(WAL_PREFIX) and name.endswith(WAL_SUFFIX):
+                first = int(name[len(WAL_PREFIX):-len(WAL_SUFFIX)])
+                segments.append((first, os.path.join(self._directory, name)))
+        return sorted(segments)
+
+    def _open_segment(self, first_lsn: int) -> None:
+        # 先清除再切换：切换期间快照线程再次通知时，下次刷盘会再切换一次
+        self._rotate.clear()
+        if self._wal_file is not None:
+            self._wal_file.close()
+        path = os.path.join(self._directory, f"{WAL_PREFIX}{first_lsn:020d}{WAL_SUFFIX}")
+        self._wal_file = open(path, "ab")
+        _fsync_dir(self._directory)
+        self._segment_bytes = 0
+
+    def _flush(self) -> None:
+        """把缓冲区写入日志并 fsync，唤醒等待的写入方"""
+        with self._wal_cond:
+            data, self._pending = self._pending, bytearray()
+            lsn = self._pending_lsn
+            first_lsn = self._durable_lsn + 1
+        if not data:
+            return
+        try:
+            if self._rotate.is_set() or self._segment_bytes >= WAL_SEGMENT_BYTES:
+                self._open_segment(first_lsn)
+            self._wal_file.write(data)
+            self._wal_file.flush()
+            _fdatasync(self._wal_file.fileno())
+        except OSError as e:
+            with self._wal_cond:
+                self._wal_error = e
+                self._wal_cond.notify_all()
+            raise
+        self._segment_bytes += len(data)
+        self._wal_bytes += len(data)
+        with self._wal_cond:
+            self._durable_lsn = lsn
+            self._wal_cond.notify_all()
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            self._wake.wait(self._fsync_interval)
+            self._wake.clear()
+            self._flush()
+            if self._wal_bytes and (
+                self._wal_bytes >= self._snapshot_wal_bytes
+                or time.monotonic() - self._last_snapshot >= self._snapshot_interval
+            ) and self._snapshotting.acquire(blocking=False):
+                self._wal_bytes = 0
+                self._last_snapshot = time.monotonic()
+                threading.Thread(target=self._snapshot_in_background, name="wal-snapshot", daemon=True).start()
+        self._flush()
+
+    # ---- 快照 ----
+
+    def _snapshot_in_background(self) -> None:
+        try:
+            self._write_snapshot()
+        finally:
+            self._snapshotting.release()
+
+    def _write_snapshot(self) -> None:
+        """复制列数据（持锁只做内存复制），在锁外编码写入，再删除已被覆盖的日志段"""
+        with self._lock:
+            lsn = self._lsn
+            slots = len(self._statuses)
+            columns = [
+                self._statuses[:], self._priorities[:], self._due[:],
+                self._created[:], self._updated[:], self._versions[:],
+            ]
+            titles, descriptions = list(self._titles), list(self._descriptions)
+            aware = [
+                (task_id, int(due.utcoffset().total_seconds()))
+                for task_id, due in self._due_aware.items()
+            ]
+        # 之后的写入进入新的日志段，旧段可在下次快照后删除
+        self._rotate.set()
+
+        sections: List[bytes] = [_little_endian(column).tobytes() for column in columns]
+        for texts in (titles, descriptions):
+            lengths = array("q", [len(text) if text is not None else _NONE for text in texts])
+            sections.append(_little_endian(lengths).tobytes())
+            sections.append(_encode_text("".join(text for text in texts if text)))
+        sections.append(_little_endian(array("q", [task_id for task_id, _ in aware])).tobytes())
+        sections.append(_little_endian(array("q", [offset for _, offset in aware])).tobytes())
+
+        path = os.path.join(self._directory, SNAPSHOT_FILE)
+        temp = path + ".tmp"
+        crc = 0
+        with open(temp, "wb") as f:
+            for chunk in [_SNAPSHOT_HEADER.pack(_SNAPSHOT_MAGIC, lsn, slots)] + [
+                part for section in sections for part in (_SECTION.pack(len(section)), section)
+            ]:
+                f.write(chunk)
+                crc = zlib.crc32(chunk, crc)
+            f.write(_CRC.pack(crc))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, path)
+        _fsync_dir(self._directory)
+        self._snapshot_lsn = lsn
+
+        segments = self._segments()
+        for (_, segment), (next_first, _) in zip(segments, segments[1:]):
+            if next_first - 1 <= lsn:
+                os.remove(segment)
+
+    def _load_snapshot(self) -> int:
+        """加载快照到列数组，返回快照包含的最大序号（没有快照时为 0）"""
+        path = os.path.join(self._directory, SNAPSHOT_FILE)
+        if not os.path.exists(path):
+            return 0
+        with open(path, "rb") as f:
+            data = memoryview(f.read())
+        if len(data) < _SNAPSHOT_HEADER.size + _CRC.size or \
+                zlib.crc32(data[:-_CRC.size]) != _CRC.unpack_from(data, len(data) - _CRC.size)[0]:
+            raise RuntimeError(f"快照文件损坏: {path}")
+        magic, lsn, slots = _SNAPSHOT_HEADER.unpack_from(data, 0)
+        if magic != _SNAPSHOT_MAGIC:
+            raise RuntimeError(f"无法识别的快照格式: {path}")
+
+        position = _SNAPSHOT_HEADER.size
+        sections = []
+        while position < len(data) - _CRC.size:
+            (length,) = _SECTION.unpack_from(data, position)
+            position += _SECTION.size
+            sections.append(data[position:position + length])
+            position += length
+
+        (self._statuses, self._priorities, self._due, self._created, self._updated, self._versions) = (
+            _load_array(typecode, section) for typecode, section in zip("BBqqqq", sections)
+        )
+        self._titles = self._load_texts(sections[6], sections[7], intern=True)
+        self._descriptions = self._load_texts(sections[8], sections[9])
+        offsets = _load_array("q", sections[11])
+        for task_id, offset in zip(_load_array("q", sections[10]), offsets):
+            self._due_aware[task_id] = from_us(self._due[task_id - 1]).astimezone(
+                timezone(timedelta(seconds=offset))
+            )
+        if len(self._statuses) != slots:
+            raise RuntimeError(f"快照文件损坏: {path}")
+        return lsn
+
+    @staticmethod
+    def _load_texts(lengths: memoryview, blob: memoryview, intern: bool = False) -> List[Optional[str]]:
+        text = bytes(blob).decode("utf-8", "surrogatepass")
+        texts: List[Optional[str]] = []
+        append = texts.append
+        position = 0
+        for length in _load_array("q", lengths):
+            if length == _NONE:
+                append(None)
+                continue
+            value = text[position:position + length]
+            append(intern_text(value) if intern else value)
+            position += length
+        return texts
+
+    # ---- 重放 ----
+
+    def _apply_row(self, fields: Tuple[int, ...], title: Optional[str], description: Optional[str]) -> None:
+        _, _, task_id, status, priority, due, created, updated, version, offset, _, _ = fields
+        i = task_id - 1
+        while len(self._statuses) <= i:
+            self._titles.append(None)
+            self._descriptions.append(None)
+            self._statuses.append(DELETED)
+            self._priorities.append(0)
+            self._due.append(NO_DUE)
+            self._created.append(created)
+            self._updated.append(created)
+            self._versions.append(0)
+        self._titles[i] = intern_text(title)
+        self._descriptions[i] = description
+        self._statuses[i] = status
+        self._priorities[i] = priority
+        self._due[i] = due
+        self._created[i] = created
+        self._updated[i] = updated
+        self._versions[i] = version
+        if offset != _NO_OFFSET:
+            self._due_aware[task_id] = from_us(due).astimezone(timezone(timedelta(seconds=offset)))
+        else:
+            self._due_aware.pop(task_id, None)
+
+    def _apply_delete(self, task_id: int) -> None:
+        i = task_id - 1
+        if 0 <= i < len(self._statuses):
+            self._statuses[i] = DELETED
+            self._titles[i] = None
+            self._descriptions[i] = None
+            self._due_aware.pop(task_id, None)
+
+    def _replay(self, after: int) -> int:
+        """
+        按顺序重放各日志段中序号大于 after 的记录，返回最大序号
+
+        最后一段末尾不完整或校验失败的记录视为崩溃时未写完，截断丢弃；其他位置损坏时报错
+        """
+        lsn = after
+        segments = self._segments()
+        for index, (_, path) in enumerate(segments):
+            with open(path, "rb") as f:
+                data = memoryview(f.read())
+            position = 0
+            while position < len(data):
+                valid = position + _FRAME.size <= len(data)
+                if valid:
+                    length, crc = _FRAME.unpack_from(data, position)
+                    payload = data[position + _FRAME.size:position + _FRAME.size + length]
+                    valid = len(payload) == length and zlib.crc32(payload) == crc
+                if not valid:
+                    if index != len(segments) - 1:
+                        raise RuntimeError(f"日志损坏: {path} 偏移 {position}")
+                    with open(path, "r+b") as f:
+                        f.truncate(position)
+                    break
+
+                if payload[0] == _OP_ROW:
+                    fields = _ROW.unpack_from(payload)
+                    record_lsn = fields[1]
+                    if record_lsn > lsn:
+                        title_length, description_length = fields[10], fields[11]
+                        start = _ROW.size + max(title_length, 0)
+                        self._apply_row(
+                            fields,
+                            _decode_text(payload[_ROW.size:start], title_length),
+                            _decode_text(payload[start:start + max(description_length, 0)], description_length),
+                        )
+                else:
+                    _, record_lsn, task_id = _DELETE.unpack_from(payload)
+                    if record_lsn > lsn:
+                        self._apply_delete(task_id)
+                lsn = max(lsn, record_lsn)
+                position += _FRAME.size + length
+        return lsn
+
+    # ---- 生命周期 ----
+
+    def open(self) -> None:
+        """加载快照、重放日志、重建索引，然后启动刷盘线程"""
+        if self._flusher is not None:
+            return
+        os.makedirs(self._directory, exist_ok=True)
+        self._lock_fd = _lock_directory(self._directory)
+        try:
+            with self._lock:
+                self._snapshot_lsn = self._load_snapshot()
+                lsn = self._replay(self._snapshot_lsn)
+                self._rebuild_indexes()
+                self._lsn = self._pending_lsn = self._durable_lsn = lsn
+        except BaseException:
+            self._unlock_directory()
+            raise
+        self._flusher = threading.Thread(target=self._run, name="wal-flusher", daemon=True)
+        self._flusher.start()
+
+    def close(self) -> None:
+        """刷盘并写入最终快照"""
+        if self._flusher is None:
+            return
+        self._stop.set()
+        self._wake.set()
+        self._flusher.join()
+        with self._snapshotting:
+            if self._lsn > self._snapshot_lsn:
+                self._write_snapshot()
+            # 已没有后续写入，全部日志段都已包含在快照中
+            for _, segment in self._segments():
+                os.remove(segment)
+        if self._wal_file is not None:
+            self._wal_file.close()
+            self._wal_file = None
+        self._flusher = None
+        self._unlock_directory()
+
+    def _unlock_directory(self) -> None:
+        """关闭锁文件即释放数据目录锁"""
+        if self._lock_fd is not None:
+            os.close(self._lock_fd)
+            self._lock_fd = None
+
+    def stats(self) -> Dict[str, Any]:
+        stats = super().stats()
+        with self._wal_cond:
+            stats.update({
+                "wal_lsn": self._pending_lsn,
+                "wal_durable_lsn": self._durable_lsn,
+                "wal_pending_bytes": len(self._pending),
+                "snapshot_lsn": self._snapshot_lsn,
+            })
+        return stats
@@ -0,0 +1,263 @@
+"""
+分块有序索引
+有序 int64 数组拆成若干块，插入删除只移动所在块内的元素；按位置切片的结果与整个有序数组相同
+"""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from heapq import merge
+from itertools import accumulate, islice
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+# 每块的目标元素数：块越大插入删除移动的元素越多，块越小块数越多、位置换算越慢；
+# 块超过两倍时对半拆分，不足四分之一时与相邻块合并
+CHUNK_SIZE = 2048
+
+# 元素：不带键时为任务 ID，带键时为 (键, 任务 ID)
+Entry = Union[int, Tuple[int, int]]
+
+
+class SortedIndex:
+    """
+    分块有序索引
+
+    不带键时元素为任务 ID，带键时（keyed=True）元素为 (键, 任务 ID)，均按升序排列。
+    每块为一个 ID 数组（带键时另有一个并行的键数组），并单独记录每块的最后一个元素：
+    定位时先在各块最后元素中二分找到所在块，再在块内二分，
+    单次插入、删除为 O(log n + CHUNK_SIZE)，百万元素时仍是微秒级。
+    按位置访问（分页的 skip、切片）由各块起始位置换算，起始位置在修改后首次访问时重算
+
+    不是线程安全的，由存储的锁保护
+    """
+
+    __slots__ = ("_keyed", "_keys", "_ids", "_maxes", "_offsets", "_len")
+
+    def __init__(self, entries: Iterable[Entry] = (), keyed: bool = False):
+        """entries 必须已按升序排列"""
+        self._keyed = keyed
+        self._keys: List[array] = []
+        self._ids: List[array] = []
+        self._maxes: List[Entry] = []
+        self._offsets: Optional[List[int]] = [0]
+        self._len = 0
+        self._extend(entries)
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __iter__(self) -> Iterator[Entry]:
+        if self._keyed:
+            for keys, ids in zip(self._keys, self._ids):
+                yield from zip(keys, ids)
+        else:
+            for ids in self._ids:
+                yield from ids
+
+    # ---- 定位 ----
+
+    def _entry(self, c: int, j: int) -> Entry:
+        return (self._keys[c][j], self._ids[c][j]) if self._keyed else self._ids[c][j]
+
+    def _find(self, c: int, entry: Any, right: bool = False) -> int:
+        """元素在第 c 块内的插入位置"""
+        if not self._keyed:
+            return (bisect_right if right else bisect_left)(self._ids[c], entry)
+        key, task_id = entry
+        keys = self._keys[c]
+        lo = bisect_left(keys, key)
+        hi = bisect_right(keys, key, lo)
+        return (bisect_right if right else bisect_left)(self._ids[c], task_id, lo, hi)
+
+    def _starts(self) -> List[int]:
+        """各块在整个序列中的起始位置（末尾多一项为总长度）"""
+        if self._offsets is None:
+            self._offsets = list(accumulate(map(len, self._ids), initial=0))
+        return self._offsets
+
+    def position(self, entry: Entry, right: bool = False) -> int:
+        """第一个不小于 entry（right 为 True 时为大于 entry）的元素的位置"""
+        c = (bisect_right if right else bisect_left)(self._maxes, entry)
+        if c == len(self._maxes):
+            return self._len
+        return self._starts()[c] + self._find(c, entry, right)
+
+    def key_position(self, key: int) -> int:
+        """带键时第一个键不小于 key 的元素的位置"""
+        # (key,) 小于所有键为 key 的 (key, ID)
+        c = bisect_left(self._maxes, (key,))
+        if c == len(self._maxes):
+            return self._len
+        return self._starts()[c] + bisect_left(self._keys[c], key)
+
+    def _chunk_at(self, position: int) -> Tuple[int, int]:
+        """位置所在的 (块序号, 块内位置)"""
+        starts = self._starts()
+        c = bisect_right(starts, position) - 1
+        return c, position - starts[c]
+
+    def iter_ids(self, start: int = 0, stop: Optional[int] = None) -> Iterator[int]:
+        """按顺序遍历位置在 [start, stop) 内的任务 ID，只访问区间所在的块"""
+        stop = self._len if stop is None else min(stop, self._len)
+        if start >= stop:
+            return
+        c, j = self._chunk_at(start)
+        remaining = stop - start
+        while remaining > 0:
+            ids = self._ids[c]
+            taken = ids[j:j + remaining]
+            yield from taken
+            remaining -= len(taken)
+            c, j = c + 1, 0
+
+    def ids(self, start: int = 0, stop: Optional[int] = None) -> array:
+        """位置在 [start, stop) 内的任务 ID"""
+        stop = self._len if stop is None else min(stop, self._len)
+        result = array("q")
+        if start >= stop:
+            return result
+        c, j = self._chunk_at(start)
+        remaining = stop - start
+        while remaining > 0:
+            taken = self._ids[c][j:j + remaining]
+            result += taken
+            remaining -= len(taken)
+            c, j = c + 1, 0
+        return result
+
+    # ---- 修改 ----
+
+    def _extend(self, entries: Iterable[Entry]) -> None:
+        """在末尾追加一批有序且都大于现有元素的元素，先填满最后一块再新建块"""
+        iterator = iter(entries)
+        while True:
+            if self._ids and len(self._ids[-1]) < CHUNK_SIZE:
+                c = len(self._ids) - 1
+            else:
+                c = None
+            batch = list(islice(iterator, CHUNK_SIZE - (len(self._ids[c]) if c is not None else 0)))
+            if not batch:
+                return
+            if c is None:
+                self._ids.append(array("q"))
+                if self._keyed:
+                    self._keys.append(array("q"))
+                self._maxes.append(batch[-1])
+                c = len(self._ids) - 1
+            if self._keyed:
+                self._keys[c].extend(key for key, _ in batch)
+                self._ids[c].extend(task_id for _, task_id in batch)
+            else:
+                self._ids[c].extend(batch)
+            self._maxes[c] = batch[-1]
+            self._len += len(batch)
+            self._offsets = None
+
+    def _split(self, c: int) -> None:
+        """块过大时对半拆分"""
+        half = len(self._ids[c]) // 2
+        self._ids.insert(c + 1, self._ids[c][half:])
+        del self._ids[c][half:]
+        if self._keyed:
+            self._keys.insert(c + 1, self._keys[c][half:])
+            del self._keys[c][half:]
+        self._maxes.insert(c, self._entry(c, half - 1))
+
+    def _remove_chunk(self, c: int) -> None:
+        del self._ids[c], self._maxes[c]
+        if self._keyed:
+            del self._keys[c]
+
+    def _join(self, c: int) -> None:
+        """块过小时并入下一块（最后一块并入前一块），合并后过大再拆分"""
+        if len(self._ids) == 1:
+            return
+        if c == len(self._ids) - 1:
+            c -= 1
+        self._ids[c] += self._ids[c + 1]
+        if self._keyed:
+            self._keys[c] += self._keys[c + 1]
+        self._maxes[c] = self._maxes[c + 1]
+        self._remove_chunk(c + 1)
+        if len(self._ids[c]) > 2 * CHUNK_SIZE:
+            self._split(c)
+
+    def add(self, entry: Entry) -> None:
+        """插入一个元素"""
+        if not self._maxes or entry > self._maxes[-1]:
+            # 新任务 ID 总是最大，追加到最后一块
+            if not self._maxes or len(self._ids[-1]) >= CHUNK_SIZE:
+                self._extend((entry,))
+                return
+            if self._keyed:
+                self._keys[-1].append(entry[0])
+                self._ids[-1].append(entry[1])
+            else:
+                self._ids[-1].append(entry)
+            self._maxes[-1] = entry
+            self._len += 1
+            self._offsets = None
+            return
+        c = bisect_left(self._maxes, entry)
+        j = self._find(c, entry)
+        if self._keyed:
+            self._keys[c].insert(j, entry[0])
+            self._ids[c].insert(j, entry[1])
+        else:
+            self._ids[c].insert(j, entry)
+        self._len += 1
+        self._offsets = None
+        if len(self._ids[c]) > 2 * CHUNK_SIZE:
+            self._split(c)
+
+    def discard(self, entry: Entry) -> bool:
+        """删除一个元素，返回是否存在"""
+        c = bisect_left(self._maxes, entry)
+        if c == len(self._maxes):
+            return False
+        j = self._find(c, entry)
+        ids = self._ids[c]
+        if j == len(ids) or self._entry(c, j) != entry:
+            return False
+        del ids[j]
+        if self._keyed:
+            del self._keys[c][j]
+        self._len -= 1
+        self._offsets = None
+        if not ids:
+            self._remove_chunk(c)
+            return True
+        if j == len(ids):
+            self._maxes[c] = self._entry(c, j - 1)
+        if len(ids) < CHUNK_SIZE // 4:
+            self._join(c)
+        return True
+
+    def _rebuild(self, entries: Iterable[Entry]) -> None:
+        self._keys, self._ids, self._maxes = [], [], []
+        self._len = 0
+        self._offsets = None
+        self._extend(entries)
+
+    def add_many(self, entries: Sequence[Entry]) -> None:
+        """批量插入：都大于现有元素时直接追加；数量占比较大时一次归并重建，否则逐个插入"""
+        entries = sorted(entries)
+        if not entries:
+            return
+        if not self._maxes or entries[0] > self._maxes[-1]:
+            self._extend(entries)
+        elif len(entries) > self._len // 8:
+            self._rebuild(merge(list(self), entries))
+        else:
+            for entry in entries:
+                self.add(entry)
+
+    def discard_many(self, entries: Iterable[Entry]) -> None:
+        """批量删除：数量占比较大时一次过滤重建，否则逐个删除"""
+        dropped = set(entries)
+        if not dropped:
+            return
+        if len(dropped) > self._len // 8:
+            self._rebuild([entry for entry in self if entry not in dropped])
+        else:
+            for entry in dropped:
+                self.discard(entry)
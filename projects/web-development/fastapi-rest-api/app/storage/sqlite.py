@@ -0,0 +1,598 @@
+"""
+SQLite 存储后端
+WAL 模式 + 连接池，数据持久化到本地文件，无需外部数据库服务
+"""
+
+import itertools
+import queue
+import sqlite3
+from contextlib import contextmanager
+from datetime import date, datetime
+from enum import Enum
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+from app.models.task import Task, TaskChange, TaskPriority, TaskStatus
+from app.services.search import parse_query, tokenize
+from app.storage.base import TASK_FIELDS, TaskStorage, SortKey, VersionConflictError, to_local_naive
+
+_COLUMNS = ("id", "title", "description", "status", "priority", "due_date", "created_at", "updated_at", "version")
+_SELECT = f"SELECT {', '.join(_COLUMNS)} FROM tasks"
+
+# 变更记录中的任务快照（字段与 Task 模型一致）和日志淘汰语句，由下面的触发器使用
+_TASK_JSON = "json_object({})".format(", ".join(f"'{column}', NEW.{column}" for column in _COLUMNS))
+_PRUNE_CHANGES = (
+    "DELETE FROM task_changes WHERE seq <= (SELECT max(seq) FROM task_changes)"
+    " - (SELECT value FROM meta WHERE key = 'change_log_max_entries');"
+)
+
+_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS tasks (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    description TEXT,
+    status TEXT NOT NULL,
+    priority TEXT NOT NULL,
+    due_date TEXT,
+    due_at TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL,
+    version INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS ix_tasks_created ON tasks (created_at, id);
+CREATE INDEX IF NOT EXISTS ix_tasks_status ON tasks (status, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_tasks_priority ON tasks (priority, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_tasks_status_priority ON tasks (status, priority, created_at, id);
+CREATE INDEX IF NOT EXISTS ix_tasks_due ON tasks (due_at, status) WHERE due_at IS NOT NULL;
+CREATE INDEX IF NOT EXISTS ix_tasks_due_order ON tasks (due_at, id, status, priority) WHERE due_at IS NOT NULL;
+
+-- 全局数据版本由触发器维护，多个进程共享同一数据库时也保持一致
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value NOT NULL);
+INSERT OR IGNORE INTO meta VALUES ('epoch', lower(hex(randomblob(8))));
+INSERT OR IGNORE INTO meta VALUES ('version', 0);
+CREATE TRIGGER IF NOT EXISTS tasks_version_insert AFTER INSERT ON tasks
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'version'; END;
+CREATE TRIGGER IF NOT EXISTS tasks_version_update AFTER UPDATE ON tasks
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'version'; END;
+CREATE TRIGGER IF NOT EXISTS tasks_version_delete AFTER DELETE ON tasks
+BEGIN UPDATE meta SET value = value + 1 WHERE key = 'version'; END;
+
+-- 变更日志同样由触发器在写入的同一事务中记录：写事务串行提交，序号顺序即提交顺序，
+-- 所有进程共享同一份日志；只保留最近 change_log_max_entries 条
+CREATE TABLE IF NOT EXISTS task_changes (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    type TEXT NOT NULL,
+    task_id INTEGER NOT NULL,
+    task TEXT,
+    timestamp TEXT NOT NULL
+);
+INSERT OR IGNORE INTO meta VALUES ('change_log_max_entries', 10000);
+
+-- 全文搜索：保存 Python 切分后以空格连接的索引词（中文单字与二元组、小写单词），rowid 为任务 ID，
+-- 与任务写入在同一事务中更新，所有进程共享
+CREATE VIRTUAL TABLE IF NOT EXISTS tasks_fts USING fts5(
+    title, description, tokenize = 'unicode61 remove_diacritics 0'
+);
+CREATE TRIGGER IF NOT EXISTS tasks_change_insert AFTER INSERT ON tasks BEGIN
+    INSERT INTO task_changes (type, task_id, task, timestamp) VALUES ('created', NEW.id, {_TASK_JSON}, NEW.updated_at);
+    {_PRUNE_CHANGES}
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_change_update AFTER UPDATE ON tasks BEGIN
+    INSERT INTO task_changes (type, task_id, task, timestamp) VALUES ('updated', NEW.id, {_TASK_JSON}, NEW.updated_at);
+    {_PRUNE_CHANGES}
+END;
+CREATE TRIGGER IF NOT EXISTS tasks_change_delete AFTER DELETE ON tasks BEGIN
+    INSERT INTO task_changes (type, task_id, task, timestamp)
+    VALUES ('deleted', OLD.id, NULL, strftime('%Y-%m-%dT%H:%M:%f', 'now', 'localtime'));
+    {_PRUNE_CHANGES}
+END;
+"""
+
+# 分桶字段对应的列（截止日期按本地时间的 due_at 分桶）与各时间单位的分桶表达式
+_BUCKET_COLUMNS = {"created_at": "created_at", "updated_at": "updated_at", "due_date": "due_at"}
+_BUCKET_EXPRESSIONS = {
+    "day": "substr({0}, 1, 10)",
+    "week": "date(substr({0}, 1, 10), '-6 days', 'weekday 1')",
+    "month": "substr({0}, 1, 7) || '-01'",
+}
+
+# 全文索引的切分规则版本，与数据库中记录的不一致时（如切分规则变化、旧数据库）启动时重建索引
+_SEARCH_INDEX_VERSION = 1
+# 标题与描述的 BM25 列权重，标题命中排在描述命中之前
+_SEARCH_SQL = (
+    f"SELECT {', '.join(f't.{column}' for column in _COLUMNS)} FROM tasks_fts"
+    " JOIN tasks t ON t.id = tasks_fts.rowid WHERE tasks_fts MATCH ?"
+    " ORDER BY bm25(tasks_fts, 2.0, 1.0), t.id DESC LIMIT ? OFFSET ?"
+)
+
+# 内存数据库编号，保证每个实例使用独立的共享缓存库
+_memory_ids = itertools.count(1)
+
+
+def _dump_dt(dt: Optional[datetime]) -> Optional[str]:
+    """固定精度的 ISO 格式，保证字符串顺序与时间顺序一致"""
+    return dt.isoformat(timespec="microseconds") if dt is not None else None
+
+
+def _load_dt(value: Optional[str]) -> Optional[datetime]:
+    return datetime.fromisoformat(value) if value is not None else None
+
+
+def _row_to_task(row: Tuple) -> Task:
+    """数据库行转换为任务模型"""
+    task_id, title, description, status, priority, due_date, created_at, updated_at, version = row
+    return Task(
+        id=task_id,
+        title=title,
+        description=description,
+        status=status,
+        priority=priority,
+        due_date=_load_dt(due_date),
+        created_at=_load_dt(created_at),
+        updated_at=_load_dt(updated_at),
+        version=version,
+    )
+
+
+_DATETIME_COLUMNS = ("due_date", "created_at", "updated_at")
+
+
+def _select_columns(fields: Sequence[str]) -> str:
+    """投影的列名（字段名会拼入 SQL，只允许任务字段）"""
+    unknown = set(fields) - set(TASK_FIELDS)
+    if unknown:
+        raise ValueError(f"未知字段: {', '.join(sorted(unknown))}")
+    return ", ".join(fields)
+
+
+def _row_to_dict(fields: Sequence[str], row: Tuple) -> Dict[str, Any]:
+    """部分列的数据库行转换为 {字段: 值}"""
+    return {
+        field: _load_dt(value) if field in _DATETIME_COLUMNS else value
+        for field, value in zip(fields, row)
+    }
+
+
+def _search_text(text: Optional[str]) -> str:
+    """文本切分为以空格连接的索引词，与进程内索引使用相同的切分规则"""
+    return " ".join(tokenize(text))
+
+
+def _match_expression(query: str) -> Optional[str]:
+    """查询转换为 FTS5 MATCH 表达式（各词 AND，前缀词加 *），没有可搜索的词时返回 None"""
+    terms = [f'"{term}"*' if prefix else f'"{term}"' for term, prefix in parse_query(query)]
+    return " ".join(terms) if terms else None
+
+
+def _to_columns(data: Dict[str, Any]) -> Dict[str, Any]:
+    """任务字段转换为列值"""
+    columns = {}
+    for field, value in data.items():
+        if field == "due_date":
+            columns["due_date"] = _dump_dt(value)
+            columns["due_at"] = _dump_dt(to_local_naive(value))
+        elif isinstance(value, datetime):
+            columns[field] = _dump_dt(value)
+        elif isinstance(value, Enum):
+            columns[field] = value.value
+        else:
+            columns[field] = value
+    return columns
+
+
+class SQLiteConnectionPool:
+    """
+    线程安全的 SQLite 连接池
+
+    连接可跨线程使用，由接口层通过 run_in_threadpool 在线程池中并发使用；
+    查询会阻塞在磁盘 I/O 和锁等待上，不应在事件循环中直接调用
+    """
+
+    def __init__(self, database: str, size: int = 5, uri: bool = False, timeout: float = 30.0):
+        self._database = database
+        self._uri = uri
+        self._timeout = timeout
+        self._pool: "queue.Queue[sqlite3.Connection]" = queue.Queue(maxsize=size)
+        self._connections = [self._connect() for _ in range(size)]
+        for conn in self._connections:
+            self._pool.put(conn)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self._database,
+            uri=self._uri,
+            timeout=self._timeout,
+            check_same_thread=False,
+            isolation_level=None,  # 自动提交，需要时显式 BEGIN
+            cached_statements=256,  # 每个连接缓存预编译语句
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        """借出一个连接，用完自动归还"""
+        conn = self._pool.get(timeout=self._timeout)
+        try:
+            yield conn
+        finally:
+            self._pool.put(conn)
+
+    def close(self) -> None:
+        """关闭全部连接"""
+        for conn in self._connections:
+            conn.close()
+
+
+class SQLiteTaskStorage(TaskStorage):
+    """SQLite 存储，status、priority、created_at、due_date 均有索引"""
+
+    blocking_io = True
+    shared = True
+    supports_changes = True
+    supports_search = True
+
+    def __init__(self, path: str, pool_size: int = 5, change_log_max_entries: int = 10000):
+        if path == ":memory:":
+            # 内存库通过共享缓存让连接看到同一份数据；共享缓存的表级锁不支持忙等待，
+            # 因此只用一个连接，由连接池串行化访问
+            path = f"file:tasks_{next(_memory_ids)}?mode=memory&cache=shared"
+            self._pool = SQLiteConnectionPool(path, size=1, uri=True)
+        else:
+            self._pool = SQLiteConnectionPool(path, size=pool_size)
+
+        with self._pool.connection() as conn:
+            conn.executescript(_SCHEMA)
+            conn.execute(
+                "UPDATE meta SET value = ? WHERE key = 'change_log_max_entries'", (max(change_log_max_entries, 1),)
+            )
+            self._epoch = conn.execute("SELECT value FROM meta WHERE key = 'epoch'").fetchone()[0]
+        self._build_search_index()
+
+    def _build_search_index(self) -> None:
+        """全文索引的切分规则版本不是当前版本时（含首次升级的旧数据库）重建索引"""
+        with self._transaction() as conn:
+            row = conn.execute("SELECT value FROM meta WHERE key = 'search_index_version'").fetchone()
+            if row is not None and row[0] == _SEARCH_INDEX_VERSION:
+                return
+            conn.create_function("search_text", 1, _search_text, deterministic=True)
+            conn.execute("DELETE FROM tasks_fts")
+            conn.execute(
+                "INSERT INTO tasks_fts (rowid, title, description) "
+                "SELECT id, search_text(title), search_text(description) FROM tasks"
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO meta VALUES ('search_index_version', ?)", (_SEARCH_INDEX_VERSION,)
+            )
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        """在单个事务中执行多条写入，只提交（落盘）一次"""
+        with self._pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+            conn.execute("COMMIT")
+
+    @staticmethod
+    def _where(
+        status: Optional[TaskStatus],
+        priority: Optional[str],
+        before: Optional[SortKey] = None,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None,
+        statuses: Optional[Sequence[TaskStatus]] = None
+    ) -> Tuple[str, List[Any]]:
+        """构造 WHERE 子句，筛选组合有限，预编译语句可被连接缓存复用"""
+        conditions, params = [], []
+        if status:
+            conditions.append("status = ?")
+            params.append(TaskStatus(status).value)
+        if statuses:
+            conditions.append(f"status IN ({', '.join('?' for _ in statuses)})")
+            params.extend(TaskStatus(value).value for value in statuses)
+        if priority:
+            conditions.append("priority = ?")
+            params.append(str(getattr(priority, "value", priority)))
+        if before:
+            conditions.append("(created_at, id) < (?, ?)")
+            params.extend([_dump_dt(before[0]), before[1]])
+        if due_after is not None or due_before is not None:
+            # 显式写出 IS NOT NULL，让查询规划器选用部分索引 ix_tasks_due
+            conditions.append("due_at IS NOT NULL")
+        if due_after is not None:
+            conditions.append("due_at >= ?")
+            params.append(_dump_dt(to_local_naive(due_after)))
+        if due_before is not None:
+            conditions.append("due_at < ?")
+            params.append(_dump_dt(to_local_naive(due_before)))
+        where = f" WHERE {' AND '.join(conditions)}" if conditions else ""
+        return where, params
+
+    @staticmethod
+    def _index(conn: sqlite3.Connection, task: Task) -> None:
+        """更新任务的全文索引，须在写入任务的同一事务中调用"""
+        conn.execute(
+            "INSERT OR REPLACE INTO tasks_fts (rowid, title, description) VALUES (?, ?, ?)",
+            (task.id, _search_text(task.title), _search_text(task.description))
+        )
+
+    @classmethod
+    def _insert(cls, conn: sqlite3.Connection, data: Dict[str, Any]) -> Task:
+        columns = _to_columns(data)
+        placeholders = ", ".join("?" for _ in columns)
+        sql = f"INSERT INTO tasks ({', '.join(columns)}) VALUES ({placeholders}) RETURNING {', '.join(_COLUMNS)}"
+        task = _row_to_task(conn.execute(sql, tuple(columns.values())).fetchone())
+        cls._index(conn, task)
+        return task
+
+    @classmethod
+    def _update(
+        cls,
+        conn: sqlite3.Connection,
+        task_id: int,
+        changes: Dict[str, Any],
+        expected_version: Optional[int]
+    ) -> Optional[Task]:
+        columns = _to_columns(changes)
+        assignments = "".join(f"{name} = ?, " for name in columns)
+        sql = f"UPDATE tasks SET {assignments}version = version + 1 WHERE id = ?"
+        params = [*columns.values(), task_id]
+        if expected_version is not None:
+            # 版本比较放在 WHERE 中，多个进程并发更新时也是原子的
+            sql += " AND version = ?"
+            params.append(expected_version)
+        row = conn.execute(f"{sql} RETURNING {', '.join(_COLUMNS)}", params).fetchone()
+        if row:
+            task = _row_to_task(row)
+            if "title" in changes or "description" in changes:
+                cls._index(conn, task)
+            return task
+
+        if expected_version is not None:
+            current = conn.execute("SELECT version FROM tasks WHERE id = ?", (task_id,)).fetchone()
+            if current:
+                raise VersionConflictError(task_id, expected_version, current[0])
+        return None
+
+    def insert(self, data: Dict[str, Any]) -> Task:
+        with self._transaction() as conn:
+            return self._insert(conn, data)
+
+    def insert_many(self, items: Sequence[Dict[str, Any]]) -> List[Task]:
+        with self._transaction() as conn:
+            return [self._insert(conn, data) for data in items]
+
+    def get(self, task_id: int) -> Optional[Task]:
+        with self._pool.connection() as conn:
+            row = conn.execute(f"{_SELECT} WHERE id = ?", (task_id,)).fetchone()
+        return _row_to_task(row) if row else None
+
+    def get_version(self, task_id: int) -> Optional[int]:
+        with self._pool.connection() as conn:
+            row = conn.execute("SELECT version FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return row[0] if row else None
+
+    def update(
+        self,
+        task_id: int,
+        changes: Dict[str, Any],
+        expected_version: Optional[int] = None
+    ) -> Optional[Task]:
+        with self._transaction() as conn:
+            return self._update(conn, task_id, changes, expected_version)
+
+    def update_many(
+        self,
+        updates: Sequence[Tuple[int, Dict[str, Any], Optional[int]]]
+    ) -> List[Union[Task, None, VersionConflictError]]:
+        results: List[Union[Task, None, VersionConflictError]] = []
+        with self._transaction() as conn:
+            for task_id, changes, expected_version in updates:
+                try:
+                    results.append(self._update(conn, task_id, changes, expected_version))
+                except VersionConflictError as e:
+                    results.append(e)
+        return results
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, task_id: int) -> bool:
+        if conn.execute("DELETE FROM tasks WHERE id = ?", (task_id,)).rowcount == 0:
+            return False
+        conn.execute("DELETE FROM tasks_fts WHERE rowid = ?", (task_id,))
+        return True
+
+    def delete(self, task_id: int) -> bool:
+        with self._transaction() as conn:
+            return self._delete(conn, task_id)
+
+    def delete_many(self, task_ids: Sequence[int]) -> List[bool]:
+        with self._transaction() as conn:
+            return [self._delete(conn, task_id) for task_id in task_ids]
+
+    def list(
+        self,
+        skip: int = 0,
+        limit: int = 10,
+        status: Optional[TaskStatus] = None,
+        priority: Optional[str] = None,
+        before: Optional[SortKey] = None,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None
+    ) -> List[Task]:
+        where, params = self._where(status, priority, before, due_after, due_before)
+        sql = f"{_SELECT}{where} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?"
+        with self._pool.connection() as conn:
+            rows = conn.execute(sql, (*params, limit, skip)).fetchall()
+        return [_row_to_task(row) for row in rows]
+
+    def list_projection(
+        self,
+        fields: Sequence[str],
+        skip: int = 0,
+        limit: int = 10,
+        status: Optional[TaskStatus] = None,
+        priority: Optional[str] = None,
+        before: Optional[SortKey] = None,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None
+    ) -> List[Dict[str, Any]]:
+        where, params = self._where(status, priority, before, due_after, due_before)
+        sql = f"SELECT {_select_columns(fields)} FROM tasks{where} ORDER BY created_at DESC, id DESC LIMIT ? OFFSET ?"
+        with self._pool.connection() as conn:
+            rows = conn.execute(sql, (*params, limit, skip)).fetchall()
+        return [_row_to_dict(fields, row) for row in rows]
+
+    def get_projection(self, task_id: int, fields: Sequence[str]) -> Optional[Dict[str, Any]]:
+        with self._pool.connection() as conn:
+            row = conn.execute(f"SELECT {_select_columns(fields)} FROM tasks WHERE id = ?", (task_id,)).fetchone()
+        return _row_to_dict(fields, row) if row else None
+
+    def count(
+        self,
+        status: Optional[TaskStatus] = None,
+        priority: Optional[str] = None,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None
+    ) -> int:
+        where, params = self._where(status, priority, None, due_after, due_before)
+        with self._pool.connection() as conn:
+            return conn.execute(f"SELECT COUNT(*) FROM tasks{where}", params).fetchone()[0]
+
+    def aggregate(
+        self,
+        group_by: Sequence[str],
+        bucket: Optional[Tuple[str, str]] = None,
+        status: Optional[TaskStatus] = None,
+        priority: Optional[str] = None,
+        since: Optional[date] = None,
+        until: Optional[date] = None
+    ) -> List[Dict[str, Any]]:
+        # 数据库可能被多个进程共享，计数无法在单个进程内维护，由带索引的 GROUP BY 计算
+        where, params = self._where(status, priority)
+        columns = [field for field in ("status", "priority") if field in group_by]
+        if bucket is not None:
+            column = _BUCKET_COLUMNS[bucket[0]]
+            conditions = [f"{column} IS NOT NULL"]
+            if since is not None:
+                conditions.append(f"{column} >= ?")
+                params.append(since.isoformat())
+            if until is not None:
+                conditions.append(f"{column} < ?")
+                params.append(until.isoformat())
+            where += (" AND " if where else " WHERE ") + " AND ".join(conditions)
+            columns.append(_BUCKET_EXPRESSIONS[bucket[1]].format(column))
+        select = ", ".join([*columns, "COUNT(*)"])
+        group = f" GROUP BY {', '.join(columns)}" if columns else ""
+        with self._pool.connection() as conn:
+            rows = conn.execute(f"SELECT {select} FROM tasks{where}{group}", params).fetchall()
+
+        groups = []
+        for row in rows:
+            if not row[-1]:
+                continue
+            values = iter(row)
+            group: Dict[str, Any] = {}
+            if "status" in group_by:
+                group["status"] = TaskStatus(next(values))
+            if "priority" in group_by:
+                group["priority"] = TaskPriority(next(values))
+            if bucket is not None:
+                group["bucket"] = date.fromisoformat(next(values))
+            group["count"] = next(values)
+            groups.append(group)
+        return groups
+
+    def list_due(
+        self,
+        due_after: Optional[datetime] = None,
+        due_before: Optional[datetime] = None,
+        statuses: Optional[Sequence[TaskStatus]] = None,
+        priority: Optional[str] = None,
+        limit: int = 100,
+        after: Optional[SortKey] = None
+    ) -> List[Task]:
+        where, params = self._where(None, priority, None, due_after, due_before, statuses)
+        where += " AND due_at IS NOT NULL" if where else " WHERE due_at IS NOT NULL"
+        if after:
+            where += " AND (due_at, id) > (?, ?)"
+            params.extend([_dump_dt(to_local_naive(after[0])), after[1]])
+        # 固定按截止日期索引顺序扫描：无需排序，取满 limit 条即停止
+        sql = f"{_SELECT} INDEXED BY ix_tasks_due_order{where} ORDER BY due_at, id LIMIT ?"
+        with self._pool.connection() as conn:
+            rows = conn.execute(sql, (*params, limit)).fetchall()
+        return [_row_to_task(row) for row in rows]
+
+    @property
+    def epoch(self) -> str:
+        return self._epoch
+
+    def data_version(self) -> int:
+        with self._pool.connection() as conn:
+            return conn.execute("SELECT value FROM meta WHERE key = 'version'").fetchone()[0]
+
+    def count_overdue(self, now: datetime) -> int:
+        sql = "SELECT COUNT(*) FROM tasks WHERE due_at < ? AND status != ?"
+        with self._pool.connection() as conn:
+            return conn.execute(sql, (_dump_dt(now), TaskStatus.COMPLETED.value)).fetchone()[0]
+
+    def search(self, query: str, skip: int = 0, limit: int = 10) -> Tuple[int, List[Task]]:
+        """FTS5 全文搜索，按 BM25 排序，得分相同时新任务在前；多个进程共享同一份索引"""
+        expression = _match_expression(query)
+        if expression is None:
+            return 0, []
+        with self._pool.connection() as conn:
+            total = conn.execute("SELECT COUNT(*) FROM tasks_fts WHERE tasks_fts MATCH ?", (expression,)).fetchone()[0]
+            rows = conn.execute(_SEARCH_SQL, (expression, limit, skip)).fetchall() if total > skip else []
+        return total, [_row_to_task(row) for row in rows]
+
+    @staticmethod
+    def _last_change_seq(conn: sqlite3.Connection) -> int:
+        # AUTOINCREMENT 的最大序号记录在 sqlite_sequence 中，日志被淘汰后也不会回退
+        row = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'task_changes'").fetchone()
+        return row[0] if row else 0
+
+    def last_change_seq(self) -> int:
+        with self._pool.connection() as conn:
+            return self._last_change_seq(conn)
+
+    def changes_since(self, seq: int, limit: int = 1000) -> Optional[List[TaskChange]]:
+        with self._pool.connection() as conn:
+            # 范围检查与读取在同一个读事务中，读取期间其他进程的写入不会淘汰这些记录
+            conn.execute("BEGIN")
+            try:
+                last = self._last_change_seq(conn)
+                first = conn.execute("SELECT min(seq) FROM task_changes").fetchone()[0]
+                if seq > last or seq < 0 or seq < (first if first is not None else last + 1) - 1:
+                    return None
+                rows = conn.execute(
+                    "SELECT seq, type, task_id, task, timestamp FROM task_changes WHERE seq > ? ORDER BY seq LIMIT ?",
+                    (seq, limit)
+                ).fetchall()
+            finally:
+                conn.execute("COMMIT")
+        return [
+            TaskChange(
+                seq=change_seq,
+                type=change_type,
+                task_id=task_id,
+                task=Task.model_validate_json(task) if task is not None else None,
+                timestamp=_load_dt(timestamp)
+            )
+            for change_seq, change_type, task_id, task, timestamp in rows
+        ]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._pool.connection() as conn:
+            page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+            page_size = conn.execute("PRAGMA page_size").fetchone()[0]
+            free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        return {
+            "database_bytes": page_count * page_size,
+            "free_bytes": free_pages * page_size,
+        }
+
+    def close(self) -> None:
+        self._pool.close()
@@ -0,0 +1,83 @@
+"""
+JSON 序列化基准测试
+比较不同编码方式和响应类处理 100 条任务的 TaskList 页面的吞吐量
+
+运行：python benchmarks/bench_json.py
+"""
+
+import asyncio
+import json
+import sys
+import time
+import warnings
+from pathlib import Path
+from typing import Callable
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+import httpx
+from fastapi import FastAPI
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.api.v1.api import api_router
+from app.core.responses import FastJSONResponse, dumps
+from app.models.task import TaskCreate, TaskList
+from app.services.task_service import task_service
+
+PAGE_SIZE = 100
+ROUNDS = 500
+
+
+def bench(name: str, fn: Callable[[], bytes], rounds: int = ROUNDS) -> None:
+    """重复执行并打印单次耗时和吞吐量"""
+    fn()  # 预热
+    start = time.perf_counter()
+    for _ in range(rounds):
+        fn()
+    elapsed = (time.perf_counter() - start) / rounds
+    print(f"  {name:<36} {elapsed * 1e6:>8.0f} µs/页 {1 / elapsed:>8.0f} 页/秒")
+
+
+async def bench_endpoint(response_class, rounds: int = ROUNDS) -> None:
+    """通过 ASGI 进程内调用 GET /tasks，测量端到端吞吐量"""
+    app = FastAPI(default_response_class=response_class)
+    app.include_router(api_router, prefix="/api/v1")
+    transport = httpx.ASGITransport(app=app)
+    url = f"/api/v1/tasks/tasks?page_size={PAGE_SIZE}"
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        await client.get(url)
+        start = time.perf_counter()
+        for _ in range(rounds):
+            await client.get(url)
+        elapsed = (time.perf_counter() - start) / rounds
+    print(f"  {response_class.__name__:<36} {elapsed * 1e6:>8.0f} µs/请求 {1 / elapsed:>8.0f} 请求/秒")
+
+
+def main():
+    """主函数"""
+    task_service.create_tasks([
+        TaskCreate(title=f"任务 {i}", description="撰写第三季度项目总结报告" * 5, priority="high")
+        for i in range(PAGE_SIZE * 10)
+    ])
+    page = TaskList(
+        items=task_service.get_tasks(limit=PAGE_SIZE),
+        total=PAGE_SIZE * 10,
+        page=1,
+        page_size=PAGE_SIZE,
+        pages=10
+    )
+
+    print(f"序列化 {PAGE_SIZE} 条任务的 TaskList：")
+    bench("json.dumps(jsonable_encoder(...))", lambda: json.dumps(jsonable_encoder(page), ensure_ascii=False).encode())
+    bench("TaskList.model_dump_json()", lambda: page.model_dump_json().encode())
+    bench("dumps(TaskList.model_dump())", lambda: dumps(page.model_dump()))
+
+    print(f"\nGET /tasks?page_size={PAGE_SIZE} 端到端：")
+    asyncio.run(bench_endpoint(JSONResponse))
+    asyncio.run(bench_endpoint(FastJSONResponse))
+
+
+if __name__ == "__main__":
+    main()
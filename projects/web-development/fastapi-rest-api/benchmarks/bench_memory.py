@@ -0,0 +1,89 @@
+"""
+内存占用基准测试
+比较列式内存存储与按任务保存 Task 模型的字典在 N 条任务下的内存占用和写入耗时
+
+运行：python benchmarks/bench_memory.py [--size 1000000] [--skip-baseline]
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Callable, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+from app.models.task import Task, TaskCreate, TaskPriority, TaskStatus
+from app.storage.memory import MemoryTaskStorage
+
+BATCH_SIZE = 10000
+STATUSES = list(TaskStatus)
+PRIORITIES = list(TaskPriority)
+
+
+def make_items(n: int) -> List[dict]:
+    """生成任务数据：标题少量重复，半数带描述和截止日期"""
+    now = datetime.now()
+    return [
+        TaskCreate(
+            title=f"任务 {i % 1000}",
+            description=None if i % 2 else "撰写第三季度项目总结报告",
+            status=STATUSES[i % len(STATUSES)],
+            priority=PRIORITIES[i % len(PRIORITIES)],
+            due_date=None if i % 2 else now + timedelta(days=i % 30),
+        ).model_dump() | {"created_at": now, "updated_at": now}
+        for i in range(n)
+    ]
+
+
+def load_compact(items: List[dict]) -> MemoryTaskStorage:
+    """列式内存存储，分批写入"""
+    storage = MemoryTaskStorage()
+    for i in range(0, len(items), BATCH_SIZE):
+        storage.insert_many(items[i:i + BATCH_SIZE])
+    return storage
+
+
+def load_models(items: List[dict]) -> Dict[int, Task]:
+    """基线：以任务 ID 为键保存 Task 模型"""
+    return {i: Task(id=i, **data) for i, data in enumerate(items, start=1)}
+
+
+def measure(name: str, load: Callable[[List[dict]], object], items: List[dict]) -> object:
+    """打印每条任务的内存占用和写入耗时"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    store = load(items)
+    elapsed = time.perf_counter() - start
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    n = len(items)
+    print(f"  {name:<24} {current / n:>8.0f} 字节/任务 {current / 2 ** 20:>8.1f} MB {elapsed:>7.2f} 秒")
+    return store
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="内存存储占用基准测试")
+    parser.add_argument("--size", type=int, default=1_000_000, help="任务数，默认 1000000")
+    parser.add_argument("--skip-baseline", action="store_true", help="不测量 Dict[int, Task] 基线")
+    args = parser.parse_args()
+    n = args.size
+    items = make_items(n)
+
+    # 输入数据在测量开始前已分配，只统计存储自身新增的内存
+    print(f"{n} 条任务：")
+    storage = measure("MemoryTaskStorage", load_compact, items)
+    page = storage.list(limit=100, status=TaskStatus.PENDING)
+    assert len(page) == 100 and storage.count() == n
+    del storage
+    if not args.skip_baseline:
+        measure("Dict[int, Task]", load_models, items)
+
+
+if __name__ == "__main__":
+    main()
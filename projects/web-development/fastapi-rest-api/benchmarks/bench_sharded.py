@@ -0,0 +1,149 @@
+"""
+分片存储吞吐基准测试
+比较单进程内存存储与 N 个分片进程在相同读写混合负载下的总吞吐
+
+每个分片数启动 N 个分片进程和 N 个客户端进程（相当于 N 个 uvicorn worker），
+客户端同时开始、各自循环执行负载，吞吐为全部客户端完成的操作数之和除以测量时长。
+线性扩展需要至少 2N 个空闲核（客户端和分片各占一个），核数不足时结果主要反映进程间调用的开销。
+
+运行：python benchmarks/bench_sharded.py [--shards 1,2,4] [--tasks 100000] [--duration 5]
+"""
+
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Optional
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+from app.models.task import TaskPriority, TaskStatus
+from app.storage.base import TaskStorage
+from app.storage.memory import MemoryTaskStorage
+from app.storage.sharded import ShardedTaskStorage, start_shards, stop_shards
+
+BATCH_SIZE = 10000
+STATUSES = list(TaskStatus)
+PRIORITIES = list(TaskPriority)
+
+# 负载组合：(操作, 权重)
+WORKLOAD = (
+    ("get", 70),
+    ("update", 20),
+    ("insert", 5),
+    ("list", 5),
+)
+
+
+def make_item(i: int, now: datetime) -> dict:
+    return {
+        "title": f"任务 {i % 1000}",
+        "description": None if i % 2 else "撰写第三季度项目总结报告",
+        "status": STATUSES[i % len(STATUSES)],
+        "priority": PRIORITIES[i % len(PRIORITIES)],
+        "due_date": None,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+def seed(storage: TaskStorage, tasks: int) -> None:
+    now = datetime.now()
+    for start in range(0, tasks, BATCH_SIZE):
+        storage.insert_many([make_item(i, now) for i in range(start, min(start + BATCH_SIZE, tasks))])
+
+
+def run_workload(storage: TaskStorage, tasks: int, start_at: float, duration: float, seed_value: int) -> int:
+    """在 start_at 时刻开始执行负载 duration 秒，返回完成的操作数"""
+    rng = random.Random(seed_value)
+    ops = rng.choices([op for op, _ in WORKLOAD], weights=[weight for _, weight in WORKLOAD], k=100000)
+    task_ids = [rng.randint(1, tasks) for _ in range(len(ops))]
+    time.sleep(max(0.0, start_at - time.time()))
+    deadline = time.perf_counter() + duration
+    done = 0
+    while True:
+        for op, task_id in zip(ops, task_ids):
+            if op == "get":
+                storage.get(task_id)
+            elif op == "update":
+                storage.update(task_id, {"status": STATUSES[done % len(STATUSES)], "updated_at": datetime.now()})
+            elif op == "insert":
+                storage.insert(make_item(done, datetime.now()))
+            else:
+                storage.list(limit=20)
+            done += 1
+            if done % 64 == 0 and time.perf_counter() >= deadline:
+                return done
+
+
+def sharded_client(directory: str, tasks: int, start_at: float, duration: float, seed_value: int) -> int:
+    """客户端进程：连接分片并执行负载"""
+    storage = ShardedTaskStorage(directory, pool_size=1)
+    try:
+        return run_workload(storage, tasks, start_at, duration, seed_value)
+    finally:
+        storage.close()
+
+
+def bench_single(tasks: int, duration: float, seed_value: int) -> float:
+    """基线：单进程内存存储（即一个 TaskService 独占一个核）"""
+    storage = MemoryTaskStorage()
+    seed(storage, tasks)
+    return run_workload(storage, tasks, time.time(), duration, seed_value) / duration
+
+
+def bench_sharded(shards: int, clients: int, tasks: int, duration: float, seed_value: int) -> float:
+    with tempfile.TemporaryDirectory() as workdir:
+        directory = os.path.join(workdir, "shards")
+        processes = start_shards(directory, shards)
+        try:
+            storage = ShardedTaskStorage(directory)
+            seed(storage, tasks)
+            storage.close()
+            start_at = time.time() + 1.0
+            with ProcessPoolExecutor(max_workers=clients, mp_context=get_context("spawn")) as executor:
+                futures = [
+                    executor.submit(sharded_client, directory, tasks, start_at, duration, seed_value + index)
+                    for index in range(clients)
+                ]
+                return sum(future.result() for future in futures) / duration
+        finally:
+            stop_shards(processes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="分片存储吞吐基准测试")
+    parser.add_argument("--shards", default="1,2,4", help="分片数，逗号分隔")
+    parser.add_argument("--clients", type=int, help="客户端进程数，默认与分片数相同")
+    parser.add_argument("--tasks", type=int, default=100000, help="预置任务数")
+    parser.add_argument("--duration", type=float, default=5.0, help="每组的测量秒数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子")
+    args = parser.parse_args()
+
+    cores = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count()
+    print(f"CPU 核数: {cores}，任务数: {args.tasks}，负载: " + ", ".join(f"{op} {w}%" for op, w in WORKLOAD))
+    single = bench_single(args.tasks, args.duration, args.seed)
+    print(f"{'配置':<24}{'ops/s':>12}{'相对 1 分片':>14}")
+    print(f"{'单进程内存存储':<24}{single:>12,.0f}{'-':>14}")
+
+    base: Optional[float] = None
+    for shards in (int(value) for value in args.shards.split(",")):
+        clients = args.clients or shards
+        throughput = bench_sharded(shards, clients, args.tasks, args.duration, args.seed)
+        base = base or throughput
+        label = f"{shards} 分片 × {clients} 客户端"
+        print(f"{label:<24}{throughput:>12,.0f}{throughput / base:>13.2f}x")
+        if cores is not None and shards + clients > cores:
+            print(f"  （需要 {shards + clients} 个核，当前只有 {cores} 个，结果受核数限制）")
+
+
+if __name__ == "__main__":
+    main()
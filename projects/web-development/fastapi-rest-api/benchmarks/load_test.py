@@ -0,0 +1,364 @@
+"""
+负载测试
+在不同数据规模下以并发混合读写负载驱动任务 API，按操作统计 p50/p95/p99 延迟和吞吐量
+
+两种传输方式：
+- asgi：进程内通过 httpx.ASGITransport 调用，不含网络和服务器开销，适合对比代码改动
+- uvicorn：启动独立的 uvicorn 进程，经本机 TCP 调用，接近真实部署
+
+每个数据规模使用全新的进程（asgi 为子进程，uvicorn 为新的服务器进程），互不影响。
+结果保存为 JSON（默认 benchmarks/results/<提交号>.json），可用 --compare 与之前的结果对比
+
+运行：
+    python benchmarks/load_test.py
+    python benchmarks/load_test.py --sizes 1000,10000 --transport asgi --duration 5
+    python benchmarks/load_test.py --compare benchmarks/results/<旧提交号>.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+warnings.filterwarnings("ignore", category=DeprecationWarning)
+
+import httpx
+
+API = "/api/v1/tasks/tasks"
+SEED_BATCH_SIZE = 5000
+STATUSES = ["pending", "in_progress", "completed", "cancelled"]
+PRIORITIES = ["low", "medium", "high", "urgent"]
+WORDS = ["季度", "报告", "评审", "部署", "会议", "预算", "招聘", "迁移", "测试", "文档",
+         "release", "review", "deploy", "budget", "report", "migration", "design", "audit"]
+
+# 混合负载：操作 -> 权重（读约 75%，写约 25%）
+WORKLOAD: Dict[str, int] = {
+    "get_task": 30,
+    "list_page": 12,
+    "list_filtered": 8,
+    "list_due": 5,
+    "upcoming": 5,
+    "search": 10,
+    "stats": 5,
+    "create": 15,
+    "update": 10,
+}
+
+
+def make_task(rng: random.Random, now: datetime) -> Dict[str, Any]:
+    """生成一条任务：标题和描述取自固定词表，便于搜索命中；约 60% 带截止日期"""
+    task = {
+        "title": " ".join(rng.sample(WORDS, 3)),
+        "description": " ".join(rng.choices(WORDS, k=8)),
+        "status": rng.choice(STATUSES),
+        "priority": rng.choice(PRIORITIES),
+    }
+    if rng.random() < 0.6:
+        task["due_date"] = (now + timedelta(hours=rng.uniform(-720, 720))).isoformat()
+    return task
+
+
+async def seed(client: httpx.AsyncClient, size: int, seed_value: int) -> float:
+    """通过批量接口写入 size 条任务，返回耗时"""
+    rng = random.Random(seed_value)
+    now = datetime.now()
+    start = time.perf_counter()
+    for offset in range(0, size, SEED_BATCH_SIZE):
+        batch = [make_task(rng, now) for _ in range(min(SEED_BATCH_SIZE, size - offset))]
+        response = await client.post(f"{API}:batch", json=batch)
+        response.raise_for_status()
+    return time.perf_counter() - start
+
+
+def build_request(op: str, rng: random.Random, size: int) -> Tuple[str, str, Optional[dict]]:
+    """按操作类型生成 (方法, URL, 请求体)，任务 ID 在初始数据范围内均匀选取"""
+    if op == "get_task":
+        return "GET", f"{API}/{rng.randint(1, size)}", None
+    if op == "list_page":
+        return "GET", f"{API}?page={rng.randint(1, 5)}&page_size=20", None
+    if op == "list_filtered":
+        return "GET", f"{API}?status={rng.choice(STATUSES)}&priority={rng.choice(PRIORITIES)}&page_size=20", None
+    if op == "list_due":
+        start = datetime.now() + timedelta(days=rng.randint(-30, 29))
+        params = f"due_after={start.isoformat()}&due_before={(start + timedelta(days=1)).isoformat()}"
+        return "GET", f"{API}?{params}&page_size=20", None
+    if op == "upcoming":
+        return "GET", f"{API}/upcoming?limit=50", None
+    if op == "search":
+        query = " ".join(rng.sample(WORDS, rng.choice((1, 2))))
+        return "GET", f"{API}/search?q={query}&page_size=20", None
+    if op == "stats":
+        return "GET", f"{API}/stats", None
+    if op == "create":
+        return "POST", API, make_task(rng, datetime.now())
+    if op == "update":
+        body = {"status": rng.choice(STATUSES), "priority": rng.choice(PRIORITIES)}
+        return "PUT", f"{API}/{rng.randint(1, size)}", body
+    raise ValueError(f"未知操作: {op}")
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    size: int,
+    duration: float,
+    concurrency: int,
+    seed_value: int,
+) -> Tuple[Dict[str, List[float]], Dict[str, int], float]:
+    """
+    concurrency 个协程在 duration 秒内循环发送请求（闭环：收到响应后再发下一个）
+
+    返回 (操作 -> 延迟列表, 操作 -> 错误数, 实际耗时)
+    """
+    ops = list(WORKLOAD)
+    weights = [WORKLOAD[op] for op in ops]
+    latencies: Dict[str, List[float]] = {op: [] for op in ops}
+    errors: Dict[str, int] = {op: 0 for op in ops}
+    start = time.perf_counter()
+    deadline = start + duration
+
+    async def worker(index: int) -> None:
+        rng = random.Random(seed_value * 1000 + index)
+        while time.perf_counter() < deadline:
+            op = rng.choices(ops, weights)[0]
+            method, url, body = build_request(op, rng, size)
+            began = time.perf_counter()
+            try:
+                response = await client.request(method, url, json=body)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies[op].append(time.perf_counter() - began)
+            if failed:
+                errors[op] += 1
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return latencies, errors, time.perf_counter() - start
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """最近秩百分位数"""
+    if not sorted_values:
+        return 0.0
+    rank = max(int(round(q / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def summarize(
+    transport: str,
+    size: int,
+    latencies: Dict[str, List[float]],
+    errors: Dict[str, int],
+    elapsed: float,
+) -> List[Dict[str, Any]]:
+    """按操作汇总，另加一行 all 表示全部请求"""
+    rows = []
+    groups = list(latencies.items()) + [("all", [v for values in latencies.values() for v in values])]
+    for op, values in groups:
+        values = sorted(values)
+        rows.append({
+            "transport": transport,
+            "size": size,
+            "op": op,
+            "requests": len(values),
+            "errors": sum(errors.values()) if op == "all" else errors[op],
+            "rps": round(len(values) / elapsed, 1),
+            "mean_ms": round(sum(values) / len(values) * 1000, 3) if values else 0.0,
+            "p50_ms": round(percentile(values, 50) * 1000, 3),
+            "p95_ms": round(percentile(values, 95) * 1000, 3),
+            "p99_ms": round(percentile(values, 99) * 1000, 3),
+        })
+    return rows
+
+
+async def run_against(client: httpx.AsyncClient, transport: str, size: int, options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """写入数据、预热、正式测量"""
+    seconds = await seed(client, size, options["seed"])
+    print(f"  [{transport}] 写入 {size} 条任务耗时 {seconds:.1f}s", flush=True)
+    await drive(client, size, options["warmup"], options["concurrency"], options["seed"] + 1)
+    latencies, errors, elapsed = await drive(
+        client, size, options["duration"], options["concurrency"], options["seed"] + 2
+    )
+    return summarize(transport, size, latencies, errors, elapsed)
+
+
+def storage_env(options: Dict[str, Any], workdir: str) -> Dict[str, str]:
+    """被测服务的环境变量：SQLite 每次使用新的数据库文件"""
+    if options["storage"] == "sqlite":
+        return {"DATABASE_URL": f"sqlite:///{os.path.join(workdir, 'tasks.db')}"}
+    return {"DATABASE_URL": "memory://"}
+
+
+def run_asgi(size: int, options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """在全新子进程中进程内测量（由 ProcessPoolExecutor 调用）"""
+    with tempfile.TemporaryDirectory() as workdir:
+        os.environ.update(storage_env(options, workdir))
+        warnings.filterwarnings("ignore", category=DeprecationWarning)
+        from app.main import app
+        from app.services.task_service import task_service
+
+        async def main() -> List[Dict[str, Any]]:
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=600) as client:
+                return await run_against(client, "asgi", size, options)
+
+        try:
+            return asyncio.run(main())
+        finally:
+            task_service.close()
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def run_uvicorn(size: int, options: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """启动独立的 uvicorn 进程（单 worker），经本机 TCP 测量"""
+    with tempfile.TemporaryDirectory() as workdir:
+        port = free_port()
+        env = {**os.environ, **storage_env(options, workdir)}
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1",
+             "--port", str(port), "--log-level", "warning", "--no-access-log"],
+            cwd=ROOT, env=env
+        )
+        try:
+            base_url = f"http://127.0.0.1:{port}"
+            for _ in range(200):
+                try:
+                    if httpx.get(f"{base_url}/health").status_code == 200:
+                        break
+                except httpx.HTTPError:
+                    time.sleep(0.05)
+            else:
+                raise RuntimeError("uvicorn 未能启动")
+
+            async def main() -> List[Dict[str, Any]]:
+                limits = httpx.Limits(max_connections=options["concurrency"])
+                async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=600) as client:
+                    return await run_against(client, "uvicorn", size, options)
+
+            return asyncio.run(main())
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_rows(rows: List[Dict[str, Any]]) -> None:
+    print(f"  {'传输':<8} {'规模':>8} {'操作':<14} {'请求数':>7} {'错误':>5} {'RPS':>8} "
+          f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for row in rows:
+        print(f"  {row['transport']:<8} {row['size']:>8} {row['op']:<14} {row['requests']:>7} {row['errors']:>5} "
+              f"{row['rps']:>8.1f} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f}")
+
+
+def compare(baseline_path: Path, rows: List[Dict[str, Any]], threshold: float) -> int:
+    """与基线对比 p50/p99 和 RPS，返回超过阈值的回归项数"""
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    old = {(r["transport"], r["size"], r["op"]): r for r in baseline["results"]}
+    print(f"\n与基线 {baseline_path}（提交 {baseline['meta']['commit']}）对比，阈值 {threshold:.0%}：")
+    print(f"  {'传输':<8} {'规模':>8} {'操作':<14} {'p50':>9} {'p99':>9} {'RPS':>9}")
+    regressions = 0
+    for row in rows:
+        before = old.get((row["transport"], row["size"], row["op"]))
+        if before is None:
+            continue
+        changes = {
+            key: (row[key] - before[key]) / before[key] if before[key] else 0.0
+            for key in ("p50_ms", "p99_ms", "rps")
+        }
+        regressed = changes["p50_ms"] > threshold or changes["p99_ms"] > threshold or changes["rps"] < -threshold
+        regressions += regressed
+        print(f"  {row['transport']:<8} {row['size']:>8} {row['op']:<14} {changes['p50_ms']:>+9.1%} "
+              f"{changes['p99_ms']:>+9.1%} {changes['rps']:>+9.1%}{'  ← 回归' if regressed else ''}")
+    return regressions
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description="任务 API 负载测试")
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000", help="数据规模，逗号分隔")
+    parser.add_argument("--transport", choices=["asgi", "uvicorn", "both"], default="both")
+    parser.add_argument("--storage", choices=["memory", "sqlite"], default="memory")
+    parser.add_argument("--duration", type=float, default=10.0, help="每个规模的测量秒数")
+    parser.add_argument("--warmup", type=float, default=2.0, help="测量前的预热秒数")
+    parser.add_argument("--concurrency", type=int, default=16, help="并发客户端数")
+    parser.add_argument("--seed", type=int, default=42, help="随机种子，相同种子生成相同的数据和请求序列")
+    parser.add_argument("--output", type=Path, help="结果 JSON 路径，默认 benchmarks/results/<提交号>.json")
+    parser.add_argument("--compare", type=Path, help="对比的基线 JSON")
+    parser.add_argument("--threshold", type=float, default=0.1, help="判定回归的相对变化，默认 0.1（10%%）")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    transports = ["asgi", "uvicorn"] if args.transport == "both" else [args.transport]
+    options = {
+        "storage": args.storage,
+        "duration": args.duration,
+        "warmup": args.warmup,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+    }
+
+    rows: List[Dict[str, Any]] = []
+    for size in sizes:
+        print(f"规模 {size}：", flush=True)
+        for transport in transports:
+            if transport == "asgi":
+                with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as executor:
+                    result = executor.submit(run_asgi, size, options).result()
+            else:
+                result = run_uvicorn(size, options)
+            print_rows(result)
+            rows += result
+
+    commit = git_commit()
+    output = args.output or ROOT / "benchmarks" / "results" / f"{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "meta": {
+            "commit": commit,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "options": options,
+            "workload": WORKLOAD,
+        },
+        "results": rows,
+    }, ensure_ascii=False, indent=2), encoding="utf-8")
+    print(f"\n结果已保存到 {output}")
+
+    if args.compare:
+        regressions = compare(args.compare, rows, args.threshold)
+        if regressions:
+            print(f"\n{regressions} 项超过阈值")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1 @@
+# 测试
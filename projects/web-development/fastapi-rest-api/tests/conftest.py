@@ -0,0 +1,34 @@
+"""
+测试公共夹具
+"""
+
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+
+API = "/api/v1/tasks"
+
+
+@pytest.fixture(scope="session")
+def client():
+    """进程内调用应用的客户端（使用默认的内存存储）"""
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def service(request, client, tmp_path, monkeypatch):
+    """把接口层使用的服务替换为空的独立实例，内存存储和 SQLite 存储各运行一次"""
+    from app.api.v1.endpoints import tasks as endpoints
+    from app.services.task_service import TaskService
+    from app.storage.memory import MemoryTaskStorage
+    from app.storage.sqlite import SQLiteTaskStorage
+
+    if request.param == "memory":
+        storage = MemoryTaskStorage()
+    else:
+        storage = SQLiteTaskStorage(str(tmp_path / "tasks.db"))
+    task_service = TaskService(storage)
+    monkeypatch.setattr(endpoints, "task_service", task_service)
+    yield task_service
+    task_service.close()
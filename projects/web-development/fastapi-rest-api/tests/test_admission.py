@@ -0,0 +1,91 @@
+"""
+准入控制与限流
+"""
+
+import asyncio
+import httpx
+from app.core.admission import (
+    AdmissionController, AdmissionMiddleware, ConcurrencyLimiter, TokenBucketLimiter, route_class
+)
+
+
+def test_route_class():
+    assert route_class("GET", "/api/v1/tasks/tasks/1") == "read"
+    assert route_class("POST", "/api/v1/tasks/tasks") == "write"
+    assert route_class("GET", "/api/v1/tasks/tasks/search") == "search"
+    assert route_class("GET", "/api/v1/tasks/tasks/export") == "export"
+
+
+def test_concurrency_limiter_fifo_queue_and_rejections():
+    async def scenario():
+        limiter = ConcurrencyLimiter(limit=1, queue_size=2, timeout=0.2)
+        assert await limiter.acquire() is None
+        order = []
+
+        async def wait(name):
+            reason = await limiter.acquire()
+            order.append((name, reason))
+            if reason is None:
+                limiter.release()
+
+        first = asyncio.create_task(wait("first"))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(wait("second"))
+        await asyncio.sleep(0)
+        # 队列已满，立即拒绝
+        assert await limiter.acquire() == "queue_full"
+        limiter.release()
+        await asyncio.gather(first, second)
+        assert order == [("first", None), ("second", None)]
+        assert limiter.active == 0
+
+        # 持有许可不释放，排队者超时
+        assert await limiter.acquire() is None
+        assert await limiter.acquire() == "timeout"
+        stats = limiter.stats()
+        assert stats["rejected"] == 1 and stats["timed_out"] == 1 and stats["waiting"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_token_bucket():
+    limiter = TokenBucketLimiter(rate=1.0, burst=2)
+    assert limiter.acquire("a") == 0 and limiter.acquire("a") == 0
+    wait = limiter.acquire("a")
+    assert 0 < wait <= 1.0
+    # 其他客户端不受影响
+    assert limiter.acquire("b") == 0
+
+
+def _slow_app(delay: float):
+    async def app(scope, receive, send):
+        await asyncio.sleep(delay)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+    return app
+
+
+def test_middleware_sheds_with_503_and_rate_limits_with_429():
+    async def scenario():
+        controller = AdmissionController({"read": 1}, queue_size=0, queue_timeout=1.0)
+        app = AdmissionMiddleware(_slow_app(0.1), controller, prefix="/api")
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as client:
+            responses = await asyncio.gather(client.get("/api/a"), client.get("/api/b"))
+            statuses = sorted(response.status_code for response in responses)
+            assert statuses == [200, 503]
+            rejected = next(response for response in responses if response.status_code == 503)
+            assert rejected.headers["retry-after"] == "1"
+            assert rejected.json()["error"]["code"] == 503
+            # prefix 之外的请求不受限制
+            outside = await asyncio.gather(client.get("/x"), client.get("/y"))
+            assert [response.status_code for response in outside] == [200, 200]
+
+        controller = AdmissionController({}, rate=0.5, burst=1, key_header="X-Client")
+        app = AdmissionMiddleware(_slow_app(0), controller, prefix="/api")
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as client:
+            assert (await client.get("/api/a", headers={"X-Client": "a"})).status_code == 200
+            limited = await client.get("/api/a", headers={"X-Client": "a"})
+            assert limited.status_code == 429 and int(limited.headers["retry-after"]) >= 1
+            assert (await client.get("/api/a", headers={"X-Client": "b"})).status_code == 200
+
+    asyncio.run(scenario())
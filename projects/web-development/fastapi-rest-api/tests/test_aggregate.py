@@ -0,0 +1,87 @@
+"""
+分组聚合：按状态/优先级分组、按天/周/月分桶，计数随写入维护
+"""
+
+from tests.conftest import API
+
+TASKS = [
+    ("A", "2030-05-30T09:00:00", "high", "pending"),
+    ("B", "2030-05-31T09:00:00", "low", "completed"),
+    ("C", "2030-06-01T09:00:00", "high", "pending"),
+    ("D", "2030-06-03T10:00:00", "high", "completed"),
+    ("E", "2030-06-03T15:00:00", "low", "pending"),
+    ("F", None, "low", "pending"),
+]
+
+
+def _aggregate(client, **params):
+    response = client.get(f"{API}/tasks/aggregate", params=params)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _seed(client):
+    ids = {}
+    for title, due, priority, status in TASKS:
+        body = {"title": title, "priority": priority, "status": status}
+        if due:
+            body["due_date"] = due
+        ids[title] = client.post(f"{API}/tasks", json=body).json()["id"]
+    return ids
+
+
+def test_group_by_status_and_priority(client, service):
+    ids = _seed(client)
+    result = _aggregate(client, group_by="status")
+    assert result["total"] == 6 and "bucket" not in result
+    assert result["groups"] == [{"status": "pending", "count": 4}, {"status": "completed", "count": 2}]
+
+    result = _aggregate(client, group_by="priority,status", priority="high")
+    assert result["group_by"] == ["status", "priority"]
+    assert result["groups"] == [
+        {"status": "pending", "priority": "high", "count": 2},
+        {"status": "completed", "priority": "high", "count": 1},
+    ]
+    assert _aggregate(client)["groups"] == [{"count": 6}]
+
+    client.post(f"{API}/tasks/{ids['A']}/complete")
+    client.delete(f"{API}/tasks/{ids['F']}")
+    assert _aggregate(client, group_by="status")["groups"] == [
+        {"status": "pending", "count": 2}, {"status": "completed", "count": 3}
+    ]
+
+
+def test_due_date_buckets(client, service):
+    _seed(client)
+    day = _aggregate(client, bucket="due_date:day")
+    assert day["bucket"] == "due_date:day" and day["total"] == 5
+    assert [(g["bucket"], g["count"]) for g in day["groups"]] == [
+        ("2030-05-30", 1), ("2030-05-31", 1), ("2030-06-01", 1), ("2030-06-03", 2)
+    ]
+    # 周从周一开始
+    week = _aggregate(client, bucket="due_date:week")
+    assert [(g["bucket"], g["count"]) for g in week["groups"]] == [("2030-05-27", 3), ("2030-06-03", 2)]
+    month = _aggregate(client, bucket="due_date:month", group_by="status", status="pending")
+    assert [(g["bucket"], g["status"], g["count"]) for g in month["groups"]] == [
+        ("2030-05-01", "pending", 1), ("2030-06-01", "pending", 2)
+    ]
+
+    window = _aggregate(client, bucket="due_date", since="2030-05-31", until="2030-06-03")
+    assert [(g["bucket"], g["count"]) for g in window["groups"]] == [("2030-05-31", 1), ("2030-06-01", 1)]
+
+
+def test_due_date_change_moves_bucket(client, service):
+    ids = _seed(client)
+    client.put(f"{API}/tasks/{ids['A']}", json={"due_date": "2030-06-03T08:00:00"})
+    day = _aggregate(client, bucket="due_date:day", since="2030-05-30", until="2030-05-31")
+    assert day["groups"] == [] and day["total"] == 0
+    assert _aggregate(client, bucket="due_date:day", since="2030-06-03")["groups"] == [
+        {"bucket": "2030-06-03", "count": 3}
+    ]
+
+
+def test_invalid_parameters_are_400(client, service):
+    assert client.get(f"{API}/tasks/aggregate", params={"group_by": "title"}).status_code == 400
+    assert client.get(f"{API}/tasks/aggregate", params={"bucket": "due_date:year"}).status_code == 400
+    assert client.get(f"{API}/tasks/aggregate", params={"bucket": "title:day"}).status_code == 400
+    assert client.get(f"{API}/tasks/aggregate", params={"since": "2030-01-01"}).status_code == 400
@@ -0,0 +1,39 @@
+"""
+批量接口：JSON 数组与 NDJSON、逐条错误、条数上限
+"""
+
+from app.api.v1.endpoints import tasks as endpoints
+from app.core.config import settings
+from tests.conftest import API
+
+
+def test_json_and_ndjson_report_per_item_errors(client):
+    body = [{"title": "批量 1"}, {"title": ""}, {"title": "批量 3", "priority": "high"}]
+    result = client.post(f"{API}/tasks:batch", json=body).json()
+    assert (result["succeeded"], result["failed"]) == (2, 1)
+    assert "error" in result["results"][1] and result["results"][2]["id"]
+
+    ndjson = b'{"title": "ndjson 1"}\n\n{"priority": "high"}\n'
+    response = client.post(f"{API}/tasks:batch", content=ndjson, headers={"Content-Type": "application/x-ndjson"})
+    result = response.json()
+    assert (result["succeeded"], result["failed"]) == (1, 1)
+
+
+def test_invalid_and_empty_bodies(client):
+    assert client.post(f"{API}/tasks:batch", content=b"{", headers={"Content-Type": "application/json"}).status_code == 400
+    assert client.post(f"{API}/tasks:batch", json={"title": "x"}).status_code == 400
+    assert client.post(f"{API}/tasks:batch", json=[]).status_code == 400
+
+
+def test_oversized_batch_is_rejected_before_validation(client, monkeypatch):
+    class Unreachable:
+        def __getattr__(self, name):
+            raise AssertionError("超出上限时不应校验")
+
+    monkeypatch.setattr(settings, "MAX_BATCH_SIZE", 3)
+    monkeypatch.setattr(endpoints, "_BATCH_ADAPTERS", {model: Unreachable() for model in endpoints._BATCH_ADAPTERS})
+    body = [{"title": f"超限 {i}"} for i in range(4)]
+    assert client.post(f"{API}/tasks:batch", json=body).status_code == 413
+    ndjson = b"\n".join(b'{"title": "x"}' for _ in range(4))
+    response = client.post(f"{API}/tasks:batch", content=ndjson, headers={"Content-Type": "application/x-ndjson"})
+    assert response.status_code == 413
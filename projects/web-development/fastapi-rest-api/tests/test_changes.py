@@ -0,0 +1,123 @@
+"""
+变更日志：写入顺序、SQLite 共享日志、不支持时的拒绝
+"""
+
+import asyncio
+import threading
+import time
+from app.api.v1.endpoints import tasks as endpoints
+from app.models.task import ChangeType, TaskCreate, TaskUpdate
+from app.services.task_service import TaskService
+from app.storage.memory import MemoryTaskStorage
+from app.storage.persistent import PersistentMemoryTaskStorage
+from app.storage.sqlite import SQLiteTaskStorage
+from tests.conftest import API
+
+
+class YieldingStorage(MemoryTaskStorage):
+    """写入完成后让出线程，放大写入与记录变更之间的竞争窗口"""
+
+    def update(self, *args, **kwargs):
+        task = super().update(*args, **kwargs)
+        time.sleep(0.0001)
+        return task
+
+
+def test_concurrent_updates_are_logged_in_write_order():
+    service = TaskService(YieldingStorage())
+    task = service.create_task(TaskCreate(title="并发更新"))
+
+    def worker(n):
+        for i in range(50):
+            service.update_task(task.id, TaskUpdate(title=f"{n}-{i}"))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    changes = service.get_changes(0, 10000)
+    versions = [change.task.version for change in changes if change.type == ChangeType.UPDATED]
+    assert versions == list(range(2, 202))
+
+
+def test_sync_commit_waits_outside_the_write_lock(tmp_path):
+    storage = PersistentMemoryTaskStorage(str(tmp_path), sync_commit=True, fsync_interval=0.5)
+    storage.open()
+    service = TaskService(storage)
+    waits = []
+    wait_durable = storage._wait_durable
+
+    def record(lsn):
+        if getattr(storage._deferred, "lsn", None) is None:
+            waits.append(service._write_lock.locked())
+        wait_durable(lsn)
+
+    storage._wait_durable = record
+    task = service.create_task(TaskCreate(title="同步提交"))
+    service.update_tasks([(task.id, TaskUpdate(title="同步提交（已修改）"))])
+    service.delete_task(task.id)
+    # 每次写入等待一次落盘，等待时不持有服务层的写锁；返回时已 fsync
+    assert waits == [False, False, False]
+    assert storage.stats()["wal_durable_lsn"] == storage.stats()["wal_lsn"] == 3
+    assert [c.type for c in service.get_changes(0)] == [ChangeType.CREATED, ChangeType.UPDATED, ChangeType.DELETED]
+    storage.close()
+
+
+def test_sqlite_log_is_shared_between_workers(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    first = TaskService(SQLiteTaskStorage(path, change_log_max_entries=5))
+    second = TaskService(SQLiteTaskStorage(path, change_log_max_entries=5))
+    task = first.create_task(TaskCreate(title="共享日志"))
+    second.update_task(task.id, TaskUpdate(title="共享日志（已修改）"))
+    first.delete_task(task.id)
+
+    assert first.change_epoch == second.change_epoch
+    assert first.get_last_change_seq() == second.get_last_change_seq() == 3
+    changes = second.get_changes(0)
+    assert [(c.seq, c.type, c.task_id) for c in changes] == [
+        (1, ChangeType.CREATED, task.id), (2, ChangeType.UPDATED, task.id), (3, ChangeType.DELETED, task.id)
+    ]
+    assert changes[1].task.title == "共享日志（已修改）" and changes[1].task.version == 2
+    assert second.get_changes(2) == changes[2:] and second.get_changes(4) is None
+
+    # 只保留最近 5 条，更早的序号需要全量同步
+    first.create_tasks([TaskCreate(title=f"批量 {i}") for i in range(4)])
+    assert first.get_changes(1) is None
+    assert [c.seq for c in first.get_changes(2)] == [3, 4, 5, 6, 7]
+
+    # 重新打开后序号延续
+    first.close()
+    reopened = TaskService(SQLiteTaskStorage(path))
+    assert reopened.get_last_change_seq() == 7 and reopened.change_epoch == second.change_epoch
+    reopened.close()
+    second.close()
+
+
+def test_sqlite_wait_sees_writes_from_other_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr("app.core.config.settings.CHANGE_POLL_INTERVAL", 0.05)
+    path = str(tmp_path / "tasks.db")
+    reader = TaskService(SQLiteTaskStorage(path))
+    writer = TaskService(SQLiteTaskStorage(path))
+
+    async def scenario():
+        waiting = asyncio.ensure_future(reader.wait_for_changes(0, 5.0))
+        await asyncio.sleep(0.1)
+        writer.create_task(TaskCreate(title="其他 worker"))
+        return await waiting, await reader.wait_for_changes(1, 0.1)
+
+    assert asyncio.run(scenario()) == (True, False)
+    reader.close()
+    writer.close()
+
+
+def test_shared_storage_without_log_rejects_change_sync(client, monkeypatch):
+    class SharedStorage(MemoryTaskStorage):
+        shared = True
+
+    service = TaskService(SharedStorage())
+    monkeypatch.setattr(endpoints, "task_service", service)
+    service.create_task(TaskCreate(title="无共享日志"))
+    assert not service.supports_changes
+    assert client.get(f"{API}/tasks/changes").status_code == 501
+    assert client.get(f"{API}/tasks/changes/stream").status_code == 501
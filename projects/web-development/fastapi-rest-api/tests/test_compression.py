@@ -0,0 +1,93 @@
+"""
+响应压缩：Accept-Encoding 协商、大小阈值、流式压缩和预压缩缓存
+"""
+
+import gzip
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+from app.core.compression import SUPPORTED_ENCODINGS, CompressionMiddleware, negotiate
+from tests.conftest import API
+
+
+@pytest.mark.parametrize("header, expected", [
+    (None, None),
+    ("", None),
+    ("gzip", "gzip"),
+    ("GZIP;q=0.5, identity", "gzip"),
+    ("gzip;q=0", None),
+    ("gzip;q=abc", None),
+    ("deflate, identity", None),
+    ("*", SUPPORTED_ENCODINGS[0]),
+    ("*;q=0.2, gzip;q=0", "br" if "br" in SUPPORTED_ENCODINGS else None),
+])
+def test_negotiate(header, expected):
+    assert negotiate(header) == expected
+
+
+def test_br_preferred_on_equal_quality():
+    expected = "br" if "br" in SUPPORTED_ENCODINGS else "gzip"
+    assert negotiate("gzip, br") == expected
+    assert negotiate("gzip;q=1.0, br;q=0.5") == "gzip"
+
+
+@pytest.fixture
+def small_app():
+    app = FastAPI()
+
+    @app.get("/text")
+    def text(size: int):
+        return PlainTextResponse("x" * size)
+
+    @app.get("/stream")
+    def stream():
+        return StreamingResponse((f"行 {i}\n".encode() for i in range(100)), media_type="application/x-ndjson")
+
+    @app.get("/binary")
+    def binary():
+        return StreamingResponse(iter([b"\0" * 2000]), media_type="application/octet-stream")
+
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+    with TestClient(app) as test_client:
+        yield test_client
+
+
+def test_size_threshold_and_vary(small_app):
+    small = small_app.get("/text", params={"size": 499}, headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers and small.headers["vary"] == "Accept-Encoding"
+
+    large = small_app.get("/text", params={"size": 5000}, headers={"Accept-Encoding": "gzip"})
+    assert large.headers["content-encoding"] == "gzip"
+    assert int(large.headers["content-length"]) < 5000
+    assert large.text == "x" * 5000
+
+    plain = small_app.get("/text", params={"size": 5000}, headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in plain.headers and plain.headers["vary"] == "Accept-Encoding"
+
+
+def test_streaming_and_incompressible_types(small_app):
+    response = small_app.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip" and "content-length" not in response.headers
+    assert response.text.splitlines() == [f"行 {i}" for i in range(100)]
+
+    binary = small_app.get("/binary", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in binary.headers and "vary" not in binary.headers
+
+
+def test_task_detail_uses_precompressed_cache(client, service):
+    task = client.post(f"{API}/tasks", json={"title": "压缩", "description": "很长的描述" * 100}).json()
+    plain = client.get(f"{API}/tasks/{task['id']}", headers={"Accept-Encoding": "identity"})
+    compressed = client.get(f"{API}/tasks/{task['id']}", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["content-encoding"] == "gzip" and "Accept-Encoding" in compressed.headers["vary"]
+    assert compressed.content == plain.content
+
+    # 同一版本只压缩一次，之后直接返回缓存的压缩字节
+    first = service.get_task_json(task["id"], "gzip")
+    assert service.get_task_json(task["id"], "gzip")[1] is first[1]
+    assert gzip.decompress(first[1]) == plain.content and first[2] == "gzip"
+    client.put(f"{API}/tasks/{task['id']}", json={"title": "压缩（已修改）"})
+    assert gzip.decompress(service.get_task_json(task["id"], "gzip")[1]) != plain.content
+
+    small = client.post(f"{API}/tasks", json={"title": "短"}).json()
+    assert "content-encoding" not in client.get(f"{API}/tasks/{small['id']}", headers={"Accept-Encoding": "gzip"}).headers
@@ -0,0 +1,30 @@
+"""
+列表总数：与分页无关，随筛选条件和写入变化
+"""
+
+from tests.conftest import API
+
+
+def test_total_counts_beyond_one_page(client, service):
+    body = [{"title": f"计数 {i}", "priority": "high" if i % 3 == 0 else "low"} for i in range(25)]
+    client.post(f"{API}/tasks:batch", json=body)
+
+    page = client.get(f"{API}/tasks", params={"page_size": 10}).json()
+    assert (page["total"], page["pages"], len(page["items"])) == (25, 3, 10)
+    last = client.get(f"{API}/tasks", params={"page_size": 10, "page": 3}).json()
+    assert (last["total"], len(last["items"])) == (25, 5)
+
+    high = client.get(f"{API}/tasks", params={"priority": "high", "page_size": 2}).json()
+    assert (high["total"], high["pages"]) == (9, 5)
+    assert client.get(f"{API}/tasks", params={"priority": "high", "status": "completed"}).json()["total"] == 0
+    assert client.get(f"{API}/tasks", params={"priority": "unknown"}).json()["total"] == 0
+
+
+def test_total_follows_writes(client, service):
+    ids = [client.post(f"{API}/tasks", json={"title": f"写入 {i}"}).json()["id"] for i in range(12)]
+    client.put(f"{API}/tasks/{ids[0]}", json={"status": "completed"})
+    client.delete(f"{API}/tasks/{ids[1]}")
+    assert client.get(f"{API}/tasks").json()["total"] == 11
+    assert client.get(f"{API}/tasks", params={"status": "pending"}).json()["total"] == 10
+    assert client.get(f"{API}/tasks", params={"status": "completed"}).json()["total"] == 1
+    assert service.count_tasks() == 11
@@ -0,0 +1,80 @@
+"""
+截止日期：范围筛选、即将到期任务流的排序与游标分页
+"""
+
+from datetime import datetime, timedelta
+from tests.conftest import API
+
+BASE = datetime(2030, 6, 1, 9, 0)
+
+
+def _at(hours: float) -> str:
+    return (BASE + timedelta(hours=hours)).isoformat()
+
+
+def _create(client, title, hours=None, **fields):
+    body = {"title": title, **fields}
+    if hours is not None:
+        body["due_date"] = _at(hours)
+    return client.post(f"{API}/tasks", json=body).json()["id"]
+
+
+def test_due_range_filter_is_half_open(client, service):
+    for hours in (0, 1, 2, 3):
+        _create(client, f"第 {hours} 小时", hours)
+    _create(client, "无截止日期")
+
+    page = client.get(f"{API}/tasks", params={"due_after": _at(1), "due_before": _at(3)}).json()
+    assert page["total"] == 2
+    assert {item["title"] for item in page["items"]} == {"第 1 小时", "第 2 小时"}
+    assert client.get(f"{API}/tasks", params={"due_after": _at(2)}).json()["total"] == 2
+    assert client.get(f"{API}/tasks", params={"due_before": _at(0)}).json()["total"] == 0
+    assert client.get(f"{API}/tasks", params={"due_after": _at(0), "priority": "high"}).json()["total"] == 0
+
+
+def test_upcoming_orders_by_due_date_and_skips_finished(client, service):
+    late = _create(client, "较晚", 5)
+    early = _create(client, "较早", 1)
+    done = _create(client, "已完成", 2)
+    started = _create(client, "进行中", 3)
+    _create(client, "窗口外", 30)
+    client.post(f"{API}/tasks/{done}/complete")
+    client.post(f"{API}/tasks/{started}/start")
+
+    feed = client.get(f"{API}/tasks/upcoming", params={"due_after": _at(0)}).json()
+    assert [item["id"] for item in feed["items"]] == [early, started, late]
+    assert feed["next_cursor"] is None
+
+    completed = client.get(f"{API}/tasks/upcoming", params={"due_after": _at(0), "status": "completed"}).json()
+    assert [item["id"] for item in completed["items"]] == [done]
+
+    # 修改截止日期后在索引中移动到新位置
+    client.put(f"{API}/tasks/{late}", json={"due_date": _at(0.5)})
+    feed = client.get(f"{API}/tasks/upcoming", params={"due_after": _at(0)}).json()
+    assert [item["id"] for item in feed["items"]] == [late, early, started]
+
+
+def test_upcoming_cursor_pages_through_equal_due_dates(client, service):
+    ids = [_create(client, f"同一时间 {i}", 1) for i in range(5)] + [_create(client, "稍后", 2)]
+
+    seen, cursor = [], None
+    while True:
+        params = {"due_after": _at(0), "limit": 2}
+        if cursor:
+            params["cursor"] = cursor
+        feed = client.get(f"{API}/tasks/upcoming", params=params).json()
+        seen += [item["id"] for item in feed["items"]]
+        cursor = feed["next_cursor"]
+        if cursor is None:
+            break
+    assert seen == ids
+    assert client.get(f"{API}/tasks/upcoming", params={"cursor": "不是游标"}).status_code == 400
+
+
+def test_upcoming_defaults_to_next_24_hours(client, service):
+    now = datetime.now()
+    soon = client.post(f"{API}/tasks", json={"title": "一小时后", "due_date": (now + timedelta(hours=1)).isoformat()}).json()
+    client.post(f"{API}/tasks", json={"title": "两天后", "due_date": (now + timedelta(days=2)).isoformat()})
+    client.post(f"{API}/tasks", json={"title": "已过期", "due_date": (now - timedelta(hours=1)).isoformat()})
+    feed = client.get(f"{API}/tasks/upcoming").json()
+    assert [item["id"] for item in feed["items"]] == [soon["id"]]
@@ -0,0 +1,68 @@
+"""
+ETag / If-None-Match 条件请求
+"""
+
+from tests.conftest import API
+
+
+def test_task_etag_304_until_updated(client):
+    task = client.post(f"{API}/tasks", json={"title": "条件请求"}).json()
+    response = client.get(f"{API}/tasks/{task['id']}")
+    etag = response.headers["etag"]
+    assert response.status_code == 200 and etag.startswith('W/"')
+
+    response = client.get(f"{API}/tasks/{task['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag and response.content == b""
+
+    client.put(f"{API}/tasks/{task['id']}", json={"title": "条件请求（已修改）"})
+    response = client.get(f"{API}/tasks/{task['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["title"] == "条件请求（已修改）"
+
+
+def test_task_etag_weak_comparison_and_lists(client):
+    task = client.post(f"{API}/tasks", json={"title": "弱比较"}).json()
+    etag = client.get(f"{API}/tasks/{task['id']}").headers["etag"]
+    strong = etag.removeprefix("W/")
+    response = client.get(f"{API}/tasks/{task['id']}", headers={"If-None-Match": f'"other", {strong}'})
+    assert response.status_code == 304
+    assert client.get(f"{API}/tasks/{task['id']}", headers={"If-None-Match": "*"}).status_code == 304
+
+
+def test_projection_etag_matches_full_etag(client):
+    task = client.post(f"{API}/tasks", json={"title": "投影"}).json()
+    etag = client.get(f"{API}/tasks/{task['id']}").headers["etag"]
+    response = client.get(f"{API}/tasks/{task['id']}?fields=title", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_list_etag_changes_on_any_write(client):
+    response = client.get(f"{API}/tasks")
+    etag = response.headers["etag"]
+    assert client.get(f"{API}/tasks", headers={"If-None-Match": etag}).status_code == 304
+
+    client.post(f"{API}/tasks", json={"title": "列表变化"})
+    response = client.get(f"{API}/tasks", headers={"If-None-Match": etag})
+    assert response.status_code == 200 and response.headers["etag"] != etag
+
+
+def test_missing_task_is_404(client):
+    assert client.get(f"{API}/tasks/999999999", headers={"If-None-Match": "*"}).status_code == 404
+
+
+def test_not_modified_skips_body_lookup(client, monkeypatch):
+    from app.api.v1.endpoints import tasks as endpoints
+
+    task = client.post(f"{API}/tasks", json={"title": "只比较版本号"}).json()
+    etag = client.get(f"{API}/tasks/{task['id']}").headers["etag"]
+
+    def fail(*args, **kwargs):
+        raise AssertionError("304 不应读取响应体")
+
+    monkeypatch.setattr(endpoints.task_service, "get_task_json", fail)
+    response = client.get(f"{API}/tasks/{task['id']}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    response = client.get(f"{API}/tasks/999999", headers={"If-None-Match": etag})
+    assert response.status_code == 404
@@ -0,0 +1,60 @@
+"""
+流式导出：分批读取、完整且有序，支持筛选和 CSV
+"""
+
+import csv
+import io
+import json
+import pytest
+from app.core.config import settings
+from app.services.export import EXPORT_FIELDS, parquet_available
+from tests.conftest import API
+
+
+def test_ndjson_export_spans_batches_in_order(client, service, monkeypatch):
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 3)
+    body = [{"title": f"导出 {i}", "status": "completed" if i % 2 else "pending"} for i in range(10)]
+    client.post(f"{API}/tasks:batch", json=body)
+
+    response = client.get(f"{API}/tasks/export")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert 'filename="tasks.ndjson"' in response.headers["content-disposition"]
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["title"] for row in rows] == [f"导出 {i}" for i in range(9, -1, -1)]
+
+    response = client.get(f"{API}/tasks/export", params={"status": "completed"})
+    assert [json.loads(line)["title"] for line in response.text.splitlines()] == [f"导出 {i}" for i in (9, 7, 5, 3, 1)]
+
+
+def test_csv_export_has_header_and_plain_values(client, service):
+    client.post(f"{API}/tasks", json={"title": "逗号, 和 \"引号\"", "priority": "high"})
+    client.post(f"{API}/tasks", json={"title": "第二行", "due_date": "2030-01-02T03:04:05"})
+    response = client.get(f"{API}/tasks/export", params={"format": "csv"})
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.reader(io.StringIO(response.text)))
+    assert rows[0] == list(EXPORT_FIELDS)
+    assert [row[1] for row in rows[1:]] == ["第二行", "逗号, 和 \"引号\""]
+    assert rows[1][5] == "2030-01-02T03:04:05" and rows[2][4] == "high" and rows[2][5] == ""
+
+
+def test_empty_export(client, service):
+    assert client.get(f"{API}/tasks/export").content == b""
+
+
+@pytest.mark.skipif(parquet_available(), reason="已安装 pyarrow")
+def test_parquet_requires_pyarrow(client, service):
+    assert client.get(f"{API}/tasks/export", params={"format": "parquet"}).status_code == 400
+
+
+@pytest.mark.skipif(not parquet_available(), reason="未安装 pyarrow")
+def test_parquet_export_round_trip(client, service, monkeypatch):
+    import pyarrow.parquet as pq
+
+    monkeypatch.setattr(settings, "EXPORT_BATCH_SIZE", 2)
+    for i in range(5):
+        client.post(f"{API}/tasks", json={"title": f"列式 {i}"})
+    response = client.get(f"{API}/tasks/export", params={"format": "parquet"})
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.column_names == list(EXPORT_FIELDS)
+    assert table.column("title").to_pylist() == [f"列式 {i}" for i in range(4, -1, -1)]
@@ -0,0 +1,186 @@
+"""
+幂等键：重放、冲突与并发去重
+"""
+
+import asyncio
+import httpx
+from app.core.admission import AdmissionController
+from app.core.idempotency import IdempotencyCache, IdempotencyMiddleware
+
+
+class CountingApp:
+    """记录调用次数的 ASGI 应用，可按顺序返回预设的状态码"""
+
+    def __init__(self, statuses=(201,), delay: float = 0.0, routed: bool = True):
+        self.calls = 0
+        self.statuses = list(statuses)
+        self.delay = delay
+        self.routed = routed
+
+    async def __call__(self, scope, receive, send):
+        message = await receive()
+        self.calls += 1
+        if self.routed:
+            # 模拟路由匹配，真实应用中由 Starlette 路由写入
+            scope["route"] = self
+        status = self.statuses[min(self.calls, len(self.statuses)) - 1]
+        await asyncio.sleep(self.delay)
+        await send({"type": "http.response.start", "status": status, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": message["body"] + f"#{self.calls}".encode()})
+
+
+def run(app, requests):
+    async def scenario():
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://t") as client:
+            return await requests(client)
+    return asyncio.run(scenario())
+
+
+def post(client, key=None, body=b"{}", path="/api/tasks"):
+    headers = {"Idempotency-Key": key} if key is not None else {}
+    return client.post(path, content=body, headers=headers)
+
+
+def test_replay_returns_stored_bytes():
+    inner = CountingApp()
+    cache = IdempotencyCache()
+    app = IdempotencyMiddleware(inner, cache, prefix="/api")
+
+    async def requests(client):
+        return [await post(client, "k"), await post(client, "k")]
+
+    first, second = run(app, requests)
+    assert inner.calls == 1
+    assert first.status_code == second.status_code == 201
+    assert first.content == second.content == b"{}#1"
+    assert "idempotent-replayed" not in first.headers
+    assert second.headers["idempotent-replayed"] == "true"
+    assert cache.stats()["replayed"] == 1
+
+
+def test_key_scope_and_requests_without_key():
+    inner = CountingApp()
+    app = IdempotencyMiddleware(inner, IdempotencyCache(), prefix="/api")
+
+    async def requests(client):
+        await post(client, "k", path="/api/a")
+        await post(client, "k", path="/api/b")
+        await post(client)
+        await post(client)
+        await client.post("/other", content=b"{}", headers={"Idempotency-Key": "k"})
+        await client.post("/other", content=b"{}", headers={"Idempotency-Key": "k"})
+
+    run(app, requests)
+    assert inner.calls == 6
+
+
+def test_conflicting_body_and_invalid_key():
+    inner = CountingApp()
+    app = IdempotencyMiddleware(inner, IdempotencyCache(), prefix="/api")
+
+    async def requests(client):
+        await post(client, "k", b'{"title": "a"}')
+        return await post(client, "k", b'{"title": "b"}'), await post(client, "x" * 256)
+
+    conflict, invalid = run(app, requests)
+    assert conflict.status_code == 422 and invalid.status_code == 400
+    assert conflict.json()["error"]["code"] == 422
+    assert inner.calls == 1
+
+
+def test_concurrent_duplicates_execute_once():
+    inner = CountingApp(delay=0.05)
+    cache = IdempotencyCache()
+    app = IdempotencyMiddleware(inner, cache, prefix="/api")
+
+    async def requests(client):
+        return await asyncio.gather(*[post(client, "k") for _ in range(8)])
+
+    responses = run(app, requests)
+    assert inner.calls == 1
+    assert {response.content for response in responses} == {b"{}#1"}
+    assert sum(response.headers.get("idempotent-replayed") == "true" for response in responses) == 7
+    assert not cache.inflight
+
+
+def test_keys_are_scoped_per_client():
+    inner = CountingApp()
+    cache = IdempotencyCache()
+    by_address = IdempotencyMiddleware(inner, cache, prefix="/api")
+
+    async def from_address(address):
+        transport = httpx.ASGITransport(app=by_address, client=(address, 1234))
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+            return await post(client, "k")
+
+    async def requests():
+        return [await from_address(address) for address in ("10.0.0.1", "10.0.0.2", "10.0.0.1")]
+
+    first, other, retried = asyncio.run(requests())
+    # 另一个客户端用了相同的键：重新执行，不会取到第一个客户端的响应
+    assert inner.calls == 2
+    assert other.content == b"{}#2" and "idempotent-replayed" not in other.headers
+    assert retried.content == first.content == b"{}#1" and retried.headers["idempotent-replayed"] == "true"
+
+    # 与限流使用同一客户端标识：按网关设置的请求头区分
+    inner = CountingApp()
+    controller = AdmissionController({}, key_header="X-Client-Id")
+    app = IdempotencyMiddleware(inner, IdempotencyCache(), prefix="/api", client_key=controller.client_key)
+
+    async def by_header(client):
+        for client_id in ("a", "b", "a"):
+            await client.post("/api/tasks", content=b"{}", headers={"Idempotency-Key": "k", "X-Client-Id": client_id})
+
+    run(app, by_header)
+    assert inner.calls == 2
+
+
+def test_server_errors_are_not_stored():
+    inner = CountingApp(statuses=(500, 201), delay=0.02)
+    app = IdempotencyMiddleware(inner, IdempotencyCache(), prefix="/api")
+
+    async def requests(client):
+        return await asyncio.gather(*[post(client, "k") for _ in range(4)])
+
+    responses = run(app, requests)
+    # 首次 5xx 不缓存，等待者之一重新执行，其余得到重新执行的结果
+    assert inner.calls == 2
+    assert sorted(response.status_code for response in responses) == [201, 201, 201, 500]
+
+
+def test_throttled_and_unrouted_responses_are_not_stored():
+    throttled = CountingApp(statuses=(429, 201))
+    unrouted = CountingApp(statuses=(404,), routed=False)
+    handler = CountingApp()
+    admitted = []
+
+    async def admission(scope, receive, send):
+        # 第一次被准入控制拒绝，未到达路由
+        if not admitted:
+            admitted.append(True)
+            await send({"type": "http.response.start", "status": 503, "headers": []})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        await handler(scope, receive, send)
+
+    cases = ((throttled, [429, 201, 201]), (admission, [503, 201, 201]), (unrouted, [404, 404, 404]))
+    for inner, expected in cases:
+        app = IdempotencyMiddleware(inner, IdempotencyCache(), prefix="/api")
+
+        async def requests(client):
+            return [(await post(client, "k")).status_code for _ in range(3)]
+
+        assert run(app, requests) == expected
+    assert throttled.calls == handler.calls + 1 == 2
+    assert unrouted.calls == 3
+
+
+def test_ttl_and_size_bounds():
+    cache = IdempotencyCache(ttl=60, max_entries=2)
+    for key in "abc":
+        cache.put(("c", "/p", key), b"f", 201, [], b"body")
+    assert cache.get(("c", "/p", "a")) is None and cache.get(("c", "/p", "c")) is not None
+
+    expired = IdempotencyCache(ttl=0)
+    expired.put(("c", "/p", "a"), b"f", 201, [], b"body")
+    assert expired.get(("c", "/p", "a")) is None
@@ -0,0 +1,66 @@
+"""
+请求指标：延迟分桶、Prometheus 文本格式、按路由模板聚合
+"""
+
+import re
+from app.core.metrics import LATENCY_BUCKETS, PROMETHEUS_CONTENT_TYPE, MetricsRegistry, render_gauges
+from tests.conftest import API
+
+
+def _sample(text: str, name: str, **labels) -> float:
+    """从 Prometheus 文本中取出一个样本值"""
+    label_text = ",".join(f'{key}="{value}"' for key, value in labels.items())
+    pattern = "^" + re.escape(f"{name}{{{label_text}}}" if labels else name) + r" (\S+)$"
+    match = re.search(pattern, text, re.MULTILINE)
+    assert match, f"缺少样本 {name} {labels}"
+    return float(match.group(1))
+
+
+def test_histogram_buckets_are_cumulative():
+    registry = MetricsRegistry()
+    for seconds in (0.00005, 0.0015, 0.0015, 0.25, 30.0):
+        registry.observe("GET", "/items", 200, seconds)
+    registry.observe("GET", "/items", 404, 0.001)
+    text = registry.render()
+
+    labels = {"method": "GET", "route": "/items"}
+    assert _sample(text, "http_requests_total", **labels, status="200") == 5
+    assert _sample(text, "http_requests_total", **labels, status="404") == 1
+    assert _sample(text, "http_request_duration_seconds_bucket", **labels, le="0.0001") == 1
+    assert _sample(text, "http_request_duration_seconds_bucket", **labels, le="0.001") == 2
+    assert _sample(text, "http_request_duration_seconds_bucket", **labels, le="0.002") == 4
+    assert _sample(text, "http_request_duration_seconds_bucket", **labels, le="0.3") == 5
+    assert _sample(text, "http_request_duration_seconds_bucket", **labels, le="10") == 5
+    assert _sample(text, "http_request_duration_seconds_bucket", **labels, le="+Inf") == 6
+    assert _sample(text, "http_request_duration_seconds_count", **labels) == 6
+    assert abs(_sample(text, "http_request_duration_seconds_sum", **labels) - 30.25405) < 1e-5
+    assert list(LATENCY_BUCKETS) == sorted(LATENCY_BUCKETS)
+
+
+def test_render_gauges_flattens_numbers():
+    text = render_gauges("app", {"cache": {"hits": 3, "ratio": 0.5, "name": "lru", "enabled": True}, "size": 7})
+    assert text.splitlines() == [
+        "# TYPE app_cache_hits gauge", "app_cache_hits 3",
+        "# TYPE app_cache_ratio gauge", "app_cache_ratio 0.5",
+        "# TYPE app_size gauge", "app_size 7",
+    ]
+    assert render_gauges("app", {}) == ""
+
+
+def test_metrics_endpoint_groups_by_route_template(client):
+    before = client.get("/metrics")
+    assert before.headers["content-type"] == PROMETHEUS_CONTENT_TYPE
+    route = f"{API}/tasks/{{task_id}}"
+    labels = {"method": "GET", "route": route, "status": "404"}
+    count = _sample(before.text, "http_requests_total", **labels) if route in before.text else 0
+
+    client.get(f"{API}/tasks/987654321")
+    client.get(f"{API}/tasks/987654322")
+    client.get("/no-such-path")
+    text = client.get("/metrics").text
+    assert _sample(text, "http_requests_total", **labels) == count + 2
+    assert _sample(text, "http_requests_total", method="GET", route="<unmatched>", status="404") >= 1
+    assert "987654321" not in text
+    # 服务状态以 gauge 输出
+    assert _sample(text, "taskapi_tasks_total") >= 0
+    assert _sample(text, "http_requests_in_flight") == 1
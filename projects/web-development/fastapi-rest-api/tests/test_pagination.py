@@ -0,0 +1,41 @@
+"""
+游标分页：并发插入时不重复、不遗漏，非法游标返回 400
+"""
+
+from datetime import datetime
+from app.core.pagination import decode_cursor, encode_cursor
+from tests.conftest import API
+
+
+def test_cursor_pages_are_stable_under_concurrent_inserts(client, service):
+    ids = [client.post(f"{API}/tasks", json={"title": f"游标 {i}"}).json()["id"] for i in range(7)]
+
+    seen = []
+    page = client.get(f"{API}/tasks", params={"page_size": 3}).json()
+    seen += [item["id"] for item in page["items"]]
+    while page["next_cursor"]:
+        # 翻页之间插入的新任务排在最前面，不影响后续页
+        client.post(f"{API}/tasks", json={"title": "翻页期间插入"})
+        page = client.get(f"{API}/tasks", params={"page_size": 3, "cursor": page["next_cursor"]}).json()
+        seen += [item["id"] for item in page["items"]]
+
+    assert seen == ids[::-1]
+
+
+def test_cursor_respects_filters(client, service):
+    for i in range(5):
+        client.post(f"{API}/tasks", json={"title": f"筛选 {i}", "priority": "high" if i % 2 else "low"})
+    first = client.get(f"{API}/tasks", params={"page_size": 1, "priority": "high"}).json()
+    second = client.get(f"{API}/tasks", params={"page_size": 1, "priority": "high", "cursor": first["next_cursor"]}).json()
+    assert [item["title"] for item in first["items"] + second["items"]] == ["筛选 3", "筛选 1"]
+    assert second["next_cursor"] is None
+
+
+def test_invalid_cursor_is_400(client, service):
+    assert client.get(f"{API}/tasks", params={"cursor": "不是游标"}).status_code == 400
+    assert client.get(f"{API}/tasks", params={"cursor": "bm90LWEtY3Vyc29y"}).status_code == 400
+
+
+def test_cursor_round_trip():
+    created_at = datetime(2024, 5, 1, 12, 30, 15, 123456)
+    assert decode_cursor(encode_cursor(created_at, 42)) == (created_at, 42)
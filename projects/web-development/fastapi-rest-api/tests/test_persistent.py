@@ -0,0 +1,140 @@
+"""
+内存存储持久化：预写日志崩溃恢复与快照
+"""
+
+import os
+import subprocess
+import sys
+import threading
+import pytest
+from datetime import datetime, timedelta
+from app.models.task import TaskStatus
+from app.storage.persistent import WAL_PREFIX, PersistentMemoryTaskStorage
+
+
+def item(title: str, offset: int = 0) -> dict:
+    now = datetime(2024, 1, 1) + timedelta(seconds=offset)
+    return {"title": title, "description": None, "status": TaskStatus.PENDING, "due_date": None,
+            "created_at": now, "updated_at": now}
+
+
+def crash(storage: PersistentMemoryTaskStorage) -> None:
+    """模拟进程崩溃：停止刷盘线程，不写最终快照、不清理日志"""
+    storage._stop.set()
+    storage._wake.set()
+    storage._flusher.join()
+    storage._wal_file.close()
+    # 进程退出时操作系统释放数据目录锁
+    storage._unlock_directory()
+
+
+def reopen(directory) -> PersistentMemoryTaskStorage:
+    storage = PersistentMemoryTaskStorage(str(directory), sync_commit=True)
+    storage.open()
+    return storage
+
+
+def snapshot_of(storage: PersistentMemoryTaskStorage):
+    return [task.model_dump() for task in storage.list(limit=1000)]
+
+
+def test_wal_replay_after_crash(tmp_path):
+    storage = reopen(tmp_path)
+    first, second, third = storage.insert_many([item("一", 0), item("二", 1), item("三", 2)])
+    storage.update(second.id, {"status": TaskStatus.COMPLETED, "updated_at": datetime(2024, 1, 2)})
+    storage.delete(third.id)
+    expected = snapshot_of(storage)
+    crash(storage)
+
+    recovered = reopen(tmp_path)
+    assert snapshot_of(recovered) == expected
+    assert recovered.get_version(second.id) == 2 and recovered.get(third.id) is None
+    # ID 不复用，新任务排在已删除任务之后
+    assert recovered.insert(item("四", 3)).id == third.id + 1
+    recovered.close()
+
+
+def test_torn_tail_is_truncated(tmp_path):
+    storage = reopen(tmp_path)
+    storage.insert(item("完整"))
+    crash(storage)
+    segment = max(name for name in os.listdir(tmp_path) if name.startswith(WAL_PREFIX))
+    with open(tmp_path / segment, "ab") as f:
+        f.write(b"\x40\x00\x00\x00partial")
+
+    recovered = reopen(tmp_path)
+    assert [task.title for task in recovered.list()] == ["完整"]
+    recovered.insert(item("之后", 1))
+    crash(recovered)
+    recovered = reopen(tmp_path)
+    assert [task.title for task in recovered.list()] == ["之后", "完整"]
+    recovered.close()
+
+
+def test_snapshot_plus_wal(tmp_path):
+    storage = reopen(tmp_path)
+    storage.insert_many([item(f"任务 {i}", i) for i in range(100)])
+    storage._write_snapshot()
+    storage.update(50, {"title": "快照之后修改", "updated_at": datetime(2024, 2, 1)})
+    storage.delete(1)
+    expected = snapshot_of(storage)
+    crash(storage)
+
+    recovered = reopen(tmp_path)
+    assert snapshot_of(recovered) == expected
+    assert recovered.count() == 99
+    recovered.close()
+    # 正常关闭后只剩快照
+    assert not [name for name in os.listdir(tmp_path) if name.startswith(WAL_PREFIX)]
+    recovered = reopen(tmp_path)
+    assert snapshot_of(recovered) == expected
+    recovered.close()
+
+
+def test_snapshot_thread_rotates_wal_segment(tmp_path):
+    def segments():
+        return sorted(name for name in os.listdir(tmp_path) if name.startswith(WAL_PREFIX))
+
+    storage = reopen(tmp_path)
+    storage.insert_many([item(f"任务 {i}", i) for i in range(10)])
+    assert len(segments()) == 1
+    # 快照在后台线程中写入，通知刷盘线程下次写入切换到新的日志段
+    snapshot = threading.Thread(target=storage._write_snapshot)
+    snapshot.start()
+    snapshot.join()
+    storage.insert(item("快照之后", 10))
+    assert len(segments()) == 2
+    # 下一次快照覆盖第一个段的全部记录，第一个段被删除
+    storage._write_snapshot()
+    assert len(segments()) == 1
+    storage.close()
+
+
+def test_directory_is_locked_while_open(tmp_path):
+    storage = reopen(tmp_path)
+    storage.insert(item("独占"))
+    second = PersistentMemoryTaskStorage(str(tmp_path))
+    with pytest.raises(RuntimeError, match="已被其他进程打开"):
+        second.open()
+    # 打开失败不影响持有锁的实例
+    assert storage.count() == 1
+    storage.close()
+
+    second.open()
+    assert second.count() == 1
+    second.close()
+
+
+def test_lock_is_released_when_process_dies(tmp_path):
+    # 子进程打开后不关闭直接退出，锁随进程释放
+    code = (
+        "import os, sys\n"
+        "from app.storage.persistent import PersistentMemoryTaskStorage\n"
+        "storage = PersistentMemoryTaskStorage(sys.argv[1])\n"
+        "storage.open()\n"
+        "os._exit(0)\n"
+    )
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    subprocess.run([sys.executable, "-c", code, str(tmp_path)], cwd=root, check=True)
+    storage = reopen(tmp_path)
+    storage.close()
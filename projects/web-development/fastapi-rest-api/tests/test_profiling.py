@@ -0,0 +1,91 @@
+"""
+性能分析：管理密钥校验、采样结果、单请求分析中间件
+"""
+
+import threading
+import time
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.core.config import DEFAULT_SECRET_KEY, settings
+from app.core.profiling import ProfileStore, RequestProfilingMiddleware, SamplingProfiler, render_collapsed
+
+ADMIN = "/api/v1/admin"
+SECRET = "test-secret"
+
+
+def test_profile_endpoint_access(client, monkeypatch):
+    # 未开启时端点不存在
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", False)
+    assert client.post(f"{ADMIN}/profile", params={"seconds": 0.01}).status_code == 404
+
+    # 开启但仍使用默认密钥时拒绝，避免以公开的默认值访问
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(settings, "SECRET_KEY", DEFAULT_SECRET_KEY)
+    response = client.post(f"{ADMIN}/profile", params={"seconds": 0.01}, headers={"X-Admin-Token": DEFAULT_SECRET_KEY})
+    assert response.status_code == 403
+
+    monkeypatch.setattr(settings, "SECRET_KEY", SECRET)
+    assert client.post(f"{ADMIN}/profile", params={"seconds": 0.01}).status_code == 401
+    assert client.post(f"{ADMIN}/profile", params={"seconds": 0.01}, headers={"X-Admin-Token": "wrong"}).status_code == 401
+    assert client.get(f"{ADMIN}/profile/unknown", headers={"X-Admin-Token": SECRET}).status_code == 404
+
+    too_long = settings.PROFILING_MAX_SECONDS + 1
+    assert client.post(f"{ADMIN}/profile", params={"seconds": too_long}, headers={"X-Admin-Token": SECRET}).status_code == 400
+    response = client.post(f"{ADMIN}/profile", params={"seconds": 0.05, "interval_ms": 1}, headers={"X-Admin-Token": SECRET})
+    assert response.status_code == 200 and response.headers["content-type"].startswith("text/plain")
+
+
+def test_only_one_profiler_runs_at_a_time(client, monkeypatch):
+    monkeypatch.setattr(settings, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(settings, "SECRET_KEY", SECRET)
+    running = SamplingProfiler.try_start()
+    try:
+        assert SamplingProfiler.try_start() is None
+        response = client.post(f"{ADMIN}/profile", params={"seconds": 0.01}, headers={"X-Admin-Token": SECRET})
+        assert response.status_code == 409
+    finally:
+        running.stop()
+    assert client.post(f"{ADMIN}/profile", params={"seconds": 0.01}, headers={"X-Admin-Token": SECRET}).status_code == 200
+
+
+def _busy_loop(stop: threading.Event) -> None:
+    while not stop.is_set():
+        sum(range(1000))
+
+
+def test_sampler_collects_collapsed_stacks():
+    stop = threading.Event()
+    worker = threading.Thread(target=_busy_loop, args=(stop,), name="busy-worker")
+    worker.start()
+    profiler = SamplingProfiler.try_start(0.001)
+    time.sleep(0.1)
+    samples = profiler.stop()
+    stop.set()
+    worker.join()
+
+    stacks = [stack for stack in samples if stack.startswith("busy-worker;")]
+    assert stacks and any("_busy_loop (test_profiling.py:" in stack for stack in stacks)
+    for line in render_collapsed(samples).splitlines():
+        stack, _, count = line.rpartition(" ")
+        assert stack and int(count) > 0
+
+
+def test_request_profiling_middleware():
+    app = FastAPI()
+
+    @app.get("/slow")
+    def slow():
+        time.sleep(0.05)
+        return {"ok": True}
+
+    store = ProfileStore(max_entries=1)
+    app.add_middleware(RequestProfilingMiddleware, secret_key=SECRET, store=store)
+    with TestClient(app) as test_client:
+        assert "x-profile-id" not in test_client.get("/slow").headers
+        assert "x-profile-id" not in test_client.get("/slow", headers={"X-Profile": "wrong"}).headers
+
+        first = test_client.get("/slow", headers={"X-Profile": SECRET}).headers["x-profile-id"]
+        assert "slow (test_profiling.py:" in store.get(first)
+        second = test_client.get("/slow", headers={"X-Profile": SECRET}).headers["x-profile-id"]
+        # 只保留最近 max_entries 条
+        assert store.get(first) is None and store.get(second) is not None
@@ -0,0 +1,46 @@
+"""
+字段投影：列表和详情只返回指定字段，总是包含 id，未知字段返回 400
+"""
+
+from tests.conftest import API
+
+
+def test_list_projection(client, service):
+    for i in range(3):
+        client.post(f"{API}/tasks", json={"title": f"投影 {i}", "priority": "high", "due_date": "2030-01-01T00:00:00"})
+
+    page = client.get(f"{API}/tasks", params={"fields": "title, status", "page_size": 2}).json()
+    assert [set(item) for item in page["items"]] == [{"id", "title", "status"}] * 2
+    assert [item["title"] for item in page["items"]] == ["投影 2", "投影 1"]
+    assert (page["total"], page["pages"]) == (3, 2)
+
+    # 游标分页内部需要 created_at，但不返回未请求的字段
+    rest = client.get(f"{API}/tasks", params={"fields": "title", "page_size": 2, "cursor": page["next_cursor"]}).json()
+    assert rest["items"] == [{"id": rest["items"][0]["id"], "title": "投影 0"}] and rest["next_cursor"] is None
+
+    full = client.get(f"{API}/tasks", params={"fields": "due_date,created_at,priority", "page_size": 1}).json()["items"][0]
+    assert set(full) == {"id", "priority", "due_date", "created_at"}
+    assert full["priority"] == "high" and full["due_date"] == "2030-01-01T00:00:00"
+
+
+def test_detail_projection(client, service):
+    task = client.post(f"{API}/tasks", json={"title": "详情投影", "description": "描述"}).json()
+    response = client.get(f"{API}/tasks/{task['id']}", params={"fields": "description"})
+    assert response.json() == {"id": task["id"], "description": "描述"}
+    assert response.headers["etag"] == client.get(f"{API}/tasks/{task['id']}").headers["etag"]
+    assert client.get(f"{API}/tasks/{task['id']}", params={"fields": "version"}).json() == {"id": task["id"], "version": 1}
+    assert client.get(f"{API}/tasks/999999", params={"fields": "title"}).status_code == 404
+
+
+def test_unknown_field_is_400(client, service):
+    response = client.get(f"{API}/tasks", params={"fields": "title,secret"})
+    assert response.status_code == 400 and "secret" in response.json()["error"]["message"]
+    assert client.get(f"{API}/tasks/1", params={"fields": "secret"}).status_code == 400
+
+
+def test_empty_fields_returns_full_tasks(client, service):
+    task = client.post(f"{API}/tasks", json={"title": "空投影", "description": "描述"}).json()
+    for fields in ("", " ", ",", " , "):
+        items = client.get(f"{API}/tasks", params={"fields": fields}).json()["items"]
+        assert items == [task]
+        assert client.get(f"{API}/tasks/{task['id']}", params={"fields": fields}).json() == task
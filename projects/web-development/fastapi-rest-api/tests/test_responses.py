@@ -0,0 +1,60 @@
+"""
+快速 JSON 响应：datetime、枚举、中文和 Pydantic 模型的编码，orjson 与标准库结果一致
+"""
+
+import json
+from datetime import date, datetime, timezone
+import pytest
+from app.core import responses
+from app.core.responses import FastJSONResponse, dumps, get_response_class
+from app.models.task import Task, TaskPriority, TaskStatus
+from tests.conftest import API
+
+CONTENT = {
+    "title": "写周报",
+    "status": TaskStatus.IN_PROGRESS,
+    "priority": TaskPriority.HIGH,
+    "due_date": datetime(2024, 5, 1, 9, 30, 0, 250000),
+    "aware": datetime(2024, 5, 1, 9, 30, tzinfo=timezone.utc),
+    "day": date(2024, 5, 1),
+    "count": 3,
+    "tags": None,
+}
+EXPECTED = {
+    "title": "写周报",
+    "status": "in_progress",
+    "priority": "high",
+    "due_date": "2024-05-01T09:30:00.250000",
+    "aware": "2024-05-01T09:30:00+00:00",
+    "day": "2024-05-01",
+    "count": 3,
+    "tags": None,
+}
+
+
+@pytest.mark.parametrize("use_orjson", [True, False])
+def test_dumps_types_and_fallback(monkeypatch, use_orjson):
+    if use_orjson:
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(responses, "orjson", None)
+    body = dumps(CONTENT)
+    assert json.loads(body) == EXPECTED
+    # 中文不转义，没有多余空白
+    assert "写周报".encode() in body and b": " not in body
+
+    task = Task(id=1, title="模型", created_at=datetime(2024, 1, 1), updated_at=datetime(2024, 1, 1))
+    assert json.loads(dumps({"items": [task]}))["items"][0] == json.loads(task.model_dump_json())
+    with pytest.raises(TypeError):
+        dumps({"value": object()})
+
+
+def test_response_class_selection(client):
+    assert get_response_class("fast") is FastJSONResponse
+    with pytest.raises(ValueError):
+        get_response_class("unknown")
+
+    created = client.post(f"{API}/tasks", json={"title": "响应类", "due_date": "2030-01-01T08:00:00"})
+    assert created.headers["content-type"] == "application/json"
+    assert "响应类".encode() in created.content
+    assert created.json()["due_date"] == "2030-01-01T08:00:00"
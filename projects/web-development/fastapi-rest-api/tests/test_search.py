@@ -0,0 +1,89 @@
+"""
+全文搜索索引（中文二元组、英文单词、BM25 排序）
+"""
+
+from datetime import datetime
+from app.models.task import Task, TaskPriority, TaskStatus
+from app.services.search import SearchIndex, parse_query, tokenize
+
+
+def make_task(task_id: int, title: str, description: str = None, version: int = 1) -> Task:
+    now = datetime.now()
+    return Task(
+        id=task_id, title=title, description=description, status=TaskStatus.PENDING,
+        priority=TaskPriority.MEDIUM, due_date=None, created_at=now, updated_at=now, version=version
+    )
+
+
+def search_ids(index: SearchIndex, query: str):
+    return [task_id for task_id, _ in index.search(query, 0, 100)[1]]
+
+
+def test_tokenize_cjk_bigrams_and_words():
+    assert tokenize("修复登录 Bug") == ["修复", "复登", "登录", "修", "复", "登", "录", "bug"]
+    assert parse_query("好") == [("好", False)]
+    assert parse_query("deploy* 登录") == [("deploy", True), ("登录", False)]
+
+
+def test_cjk_phrase_matches_substring():
+    index = SearchIndex()
+    index.add(make_task(1, "修复登录问题"))
+    index.add(make_task(2, "登出页面"))
+    assert search_ids(index, "登录") == [1]
+    assert sorted(search_ids(index, "登")) == [1, 2]
+
+
+def test_single_cjk_character_matches_any_position():
+    index = SearchIndex()
+    index.add(make_task(1, "你好"))
+    index.add(make_task(2, "修复登录"))
+    index.add(make_task(3, "好"))
+    assert search_ids(index, "你") == [1]
+    assert sorted(search_ids(index, "好")) == [1, 3]
+    assert search_ids(index, "录") == [2]
+    # 多字查询仍按二元组匹配，不因单字命中而放宽
+    assert search_ids(index, "好登") == []
+
+
+def test_and_semantics_prefix_and_title_boost():
+    index = SearchIndex()
+    index.add(make_task(1, "部署 服务", "deployment checklist"))
+    index.add(make_task(2, "周报", "部署 deploy 服务"))
+    index.add(make_task(3, "部署"))
+    assert sorted(search_ids(index, "部署 deploy*")) == [1, 2]
+    assert search_ids(index, "部署 服务")[0] == 1
+
+
+def test_update_and_remove():
+    index = SearchIndex()
+    index.add(make_task(1, "旧标题"))
+    index.add(make_task(1, "新标题", version=2))
+    # 乱序到达的旧版本被忽略
+    index.add(make_task(1, "旧标题", version=1))
+    assert search_ids(index, "旧标") == []
+    assert search_ids(index, "新标") == [1]
+    index.remove(1)
+    assert search_ids(index, "新标") == []
+
+
+def test_search_endpoint(client):
+    from tests.conftest import API
+    created = client.post(f"{API}/tasks", json={"title": "季度评审会议纪要"}).json()
+    response = client.get(f"{API}/tasks/search", params={"q": "评审"})
+    assert response.status_code == 200
+    assert created["id"] in [item["id"] for item in response.json()["items"]]
+
+
+def test_service_falls_back_when_backend_search_returns_none():
+    from app.services.task_service import TaskService
+    from app.storage.memory import MemoryTaskStorage
+    from app.models.task import TaskCreate
+
+    class NoSearchStorage(MemoryTaskStorage):
+        # 声明支持搜索但沿用基类的默认实现（返回 None）
+        supports_search = True
+
+    service = TaskService(NoSearchStorage())
+    task = service.create_task(TaskCreate(title="回退索引"))
+    total, tasks = service.search_tasks("回退")
+    assert total == 1 and tasks[0].id == task.id
@@ -0,0 +1,150 @@
+"""
+分片存储：按 ID 路由、跨分片归并与游标分页
+"""
+
+import random
+from datetime import datetime, timedelta
+import pytest
+from app.models.task import TaskPriority, TaskStatus
+from app.services.task_service import TaskService
+from app.storage.base import VersionConflictError
+from app.storage.memory import MemoryTaskStorage
+from app.storage.sharded import ShardedTaskStorage, start_shards, stop_shards
+
+STATUSES = list(TaskStatus)
+PRIORITIES = list(TaskPriority)
+START = datetime(2024, 1, 1)
+
+
+def item(i: int) -> dict:
+    created = START + timedelta(seconds=i // 2)
+    return {
+        "title": f"任务 {i}",
+        "description": "部署 检查" if i % 3 == 0 else None,
+        "status": STATUSES[i % len(STATUSES)],
+        "priority": PRIORITIES[i % len(PRIORITIES)],
+        "due_date": START + timedelta(days=i % 5) if i % 2 else None,
+        "created_at": created,
+        "updated_at": created,
+    }
+
+
+@pytest.fixture
+def shard_dir(tmp_path):
+    directory = str(tmp_path / "shards")
+    processes = start_shards(directory, 3)
+    yield directory
+    stop_shards(processes)
+
+
+@pytest.fixture
+def storage(shard_dir):
+    storage = ShardedTaskStorage(shard_dir)
+    yield storage
+    storage.close()
+
+
+def page_ids(storage, page_size: int, **filters):
+    """按游标翻页读取全部任务 ID"""
+    ids, before = [], None
+    while True:
+        page = storage.list(limit=page_size, before=before, **filters)
+        ids.extend(task.id for task in page)
+        if len(page) < page_size:
+            return ids
+        before = (page[-1].created_at, page[-1].id)
+
+
+def test_routes_by_id_and_merges_like_single_store(storage):
+    reference = MemoryTaskStorage()
+    items = [item(i) for i in range(40)]
+    assert [task.id for task in storage.insert_many(items)] == [task.id for task in reference.insert_many(items)]
+
+    for query in ({}, {"status": TaskStatus.PENDING}, {"priority": "high"}, {"skip": 5, "limit": 7}):
+        assert [t.id for t in storage.list(**query)] == [t.id for t in reference.list(**query)]
+        counted = {key: value for key, value in query.items() if key in ("status", "priority")}
+        assert storage.count(**counted) == reference.count(**counted)
+    assert page_ids(storage, 6) == [task.id for task in reference.list(limit=100)]
+    projected = storage.list_projection(["title"], limit=3)
+    assert projected == reference.list_projection(["title"], limit=3)
+
+    due = dict(due_after=START, due_before=START + timedelta(days=3), limit=5)
+    first = storage.list_due(**due)
+    assert [t.id for t in first] == [t.id for t in reference.list_due(**due)]
+    after = (first[-1].due_date, first[-1].id)
+    assert [t.id for t in storage.list_due(after=after, **due)] == [
+        t.id for t in reference.list_due(after=after, **due)
+    ]
+
+    rows = storage.aggregate(["status"])
+    assert sorted((row["status"], row["count"]) for row in rows) == sorted(
+        (row["status"], row["count"]) for row in reference.aggregate(["status"])
+    )
+
+
+def test_writes_and_version_conflicts_cross_process(storage):
+    tasks = storage.insert_many([item(i) for i in range(6)])
+    updated = storage.update(tasks[4].id, {"title": "已修改"}, expected_version=1)
+    assert updated.title == "已修改" and updated.version == 2
+    assert storage.get(tasks[4].id).title == "已修改"
+    with pytest.raises(VersionConflictError) as conflict:
+        storage.update(tasks[4].id, {"title": "冲突"}, expected_version=1)
+    assert conflict.value.task_id == tasks[4].id and conflict.value.actual == 2
+
+    results = storage.update_many([(tasks[0].id, {"title": "批量"}, None), (tasks[4].id, {}, 1), (999, {}, None)])
+    assert results[0].title == "批量" and isinstance(results[1], VersionConflictError) and results[2] is None
+    assert storage.delete_many([tasks[1].id, tasks[1].id, 0]) == [True, False, False]
+    assert storage.get(tasks[1].id) is None and storage.count() == 5
+
+
+def test_search_merges_shards(storage):
+    storage.insert_many([item(i) for i in range(12)])
+    total, tasks = storage.search("部署", 0, 10)
+    assert total == 4 and sorted(task.id for task in tasks) == [1, 4, 7, 10]
+    total, tasks = storage.search("部署", 2, 10)
+    assert total == 4 and len(tasks) == 2
+
+
+def test_cursor_paging_with_interleaved_clients(tmp_path):
+    """多个客户端各自轮流分配分片时，全局 ID 与创建时间顺序不一致，游标分页仍不丢不重"""
+    directory = str(tmp_path / "shards")
+    processes = start_shards(directory, 2)
+    clients = [ShardedTaskStorage(directory), ShardedTaskStorage(directory)]
+    try:
+        created = []
+        for i in range(5):
+            created.append(clients[i % 2].insert(item(2 * i)).id)
+        assert created == [1, 3, 2, 4, 5]
+
+        expected = [task.id for task in clients[0].list(limit=100)]
+        assert expected == [5, 4, 2, 3, 1]
+        for page_size in (1, 2, 3, 4):
+            assert page_ids(clients[0], page_size) == expected
+        projected = clients[1].list_projection(["id"], limit=3, before=(START + timedelta(seconds=2), 2))
+        assert [row["id"] for row in projected] == [3, 1]
+
+        # 导出按同样的游标分批读取
+        service = TaskService(clients[1])
+        assert [task.id for batch in service.iter_task_batches(batch_size=2) for task in batch] == expected
+    finally:
+        for client in clients:
+            client.close()
+        stop_shards(processes)
+
+
+def test_cursor_paging_random_interleaving(storage, shard_dir):
+    other = ShardedTaskStorage(shard_dir)
+    try:
+        rng = random.Random(7)
+        for i in range(60):
+            rng.choice((storage, other)).insert(item(i))
+        expected = [task.id for task in storage.list(limit=1000)]
+        # 两个客户端各自轮转分片，ID 不连续
+        assert len(set(expected)) == 60
+        for page_size in (1, 7, 13):
+            assert page_ids(other, page_size) == expected
+            assert page_ids(storage, page_size, status=TaskStatus.PENDING) == [
+                task.id for task in storage.list(limit=1000, status=TaskStatus.PENDING)
+            ]
+    finally:
+        other.close()
@@ -0,0 +1,72 @@
+"""
+分块有序索引：随机插入删除后与有序列表一致，块的拆分与合并不影响位置和切片
+"""
+
+import random
+from bisect import bisect_left, bisect_right
+import pytest
+from app.storage import sorted_index
+from app.storage.sorted_index import SortedIndex
+
+
+@pytest.fixture(autouse=True)
+def small_chunks(monkeypatch):
+    # 小块让少量元素就能触发拆分与合并
+    monkeypatch.setattr(sorted_index, "CHUNK_SIZE", 8)
+
+
+def check(index: SortedIndex, expected: list, keyed: bool) -> None:
+    assert len(index) == len(expected) and list(index) == expected
+    ids = [entry[1] for entry in expected] if keyed else expected
+    assert list(index.ids()) == ids and list(index.iter_ids()) == ids
+    for start, stop in ((0, 5), (3, 17), (len(ids) - 4, len(ids) + 10), (9, 9)):
+        start = max(start, 0)
+        assert list(index.ids(start, stop)) == ids[start:stop]
+        assert list(index.iter_ids(start, stop)) == ids[start:stop]
+
+
+@pytest.mark.parametrize("keyed", [False, True])
+def test_matches_sorted_list(keyed):
+    rng = random.Random(7)
+
+    def entry():
+        task_id = rng.randrange(1, 300)
+        return (rng.randrange(5), task_id) if keyed else task_id
+
+    index, expected = SortedIndex(keyed=keyed), []
+    for step in range(3000):
+        value = entry()
+        if rng.random() < 0.55:
+            if value not in expected:
+                index.add(value)
+                expected.insert(bisect_left(expected, value), value)
+        else:
+            assert index.discard(value) == (value in expected)
+            if value in expected:
+                expected.remove(value)
+        if step % 100 == 0:
+            check(index, expected, keyed)
+            probe = entry()
+            assert index.position(probe) == bisect_left(expected, probe)
+            assert index.position(probe, right=True) == bisect_right(expected, probe)
+            if keyed:
+                assert index.key_position(probe[0]) == bisect_left(expected, (probe[0],))
+    check(index, expected, keyed)
+
+
+def test_bulk_add_and_discard():
+    index = SortedIndex(range(1, 101))
+    index.add_many([150, 120, 101])
+    index.add_many([5, 50])
+    expected = sorted([*range(1, 101), 101, 120, 150, 5, 50])
+    assert list(index) == expected
+    # 占比较大的批量改为整体重建
+    index.add_many(list(range(200, 300)))
+    index.discard_many(range(1, 60))
+    expected = [value for value in [*expected, *range(200, 300)] if value >= 60]
+    assert list(index) == expected
+    index.discard_many([500])
+    index.discard_many(list(index))
+    assert len(index) == 0 and list(index.ids()) == [] and index.position(10) == 0
+    index.add(3)
+    assert list(index) == [3]
@@ -0,0 +1,92 @@
+"""
+SQLite 后端：经接口层访问时在线程池中执行、FTS5 全文搜索
+"""
+
+import asyncio
+import pytest
+from app.api.v1.endpoints import tasks as endpoints
+from app.models.task import TaskCreate, TaskUpdate
+from app.services.task_service import TaskService
+from app.storage.sqlite import SQLiteTaskStorage
+from tests.conftest import API
+
+
+@pytest.fixture
+def sqlite_service(client, tmp_path, monkeypatch):
+    """把接口层使用的服务替换为 SQLite 存储"""
+    service = TaskService(SQLiteTaskStorage(str(tmp_path / "tasks.db")))
+    monkeypatch.setattr(endpoints, "task_service", service)
+    yield service
+    service.close()
+
+
+def test_blocking_storage_runs_off_the_event_loop(client, sqlite_service, monkeypatch):
+    on_loop = []
+    get_task_json = sqlite_service.get_task_json
+
+    def record(*args, **kwargs):
+        try:
+            asyncio.get_running_loop()
+            on_loop.append(True)
+        except RuntimeError:
+            on_loop.append(False)
+        return get_task_json(*args, **kwargs)
+
+    monkeypatch.setattr(sqlite_service, "get_task_json", record)
+    assert sqlite_service.blocking_io
+    task = client.post(f"{API}/tasks", json={"title": "线程池"}).json()
+    response = client.get(f"{API}/tasks/{task['id']}")
+    assert response.status_code == 200 and response.json()["title"] == "线程池"
+    assert client.get(f"{API}/tasks").json()["total"] == 1
+    # 工作线程中没有运行中的事件循环
+    assert on_loop == [False]
+
+
+def test_export_streams_from_the_threadpool(client, sqlite_service):
+    for i in range(5):
+        client.post(f"{API}/tasks", json={"title": f"导出 {i}"})
+    response = client.get(f"{API}/tasks/export", params={"format": "ndjson"})
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == 5
+
+
+def test_fts_search_matches_in_process_semantics(tmp_path):
+    storage = SQLiteTaskStorage(str(tmp_path / "tasks.db"))
+    service = TaskService(storage)
+    login = service.create_task(TaskCreate(title="修复登录问题", description="deployment checklist"))
+    hello = service.create_task(TaskCreate(title="周报", description="你好 登录"))
+    service.create_task(TaskCreate(title="登出页面"))
+
+    def ids(query):
+        return [task.id for task in service.search_tasks(query, limit=100)[1]]
+
+    assert ids("登录") == [login.id, hello.id]
+    assert ids("好") == [hello.id] and ids("录") == [login.id, hello.id]
+    assert ids("登录 deploy*") == [login.id] and ids("deploy") == []
+    assert ids("!!!") == []
+
+    service.update_task(login.id, TaskUpdate(title="修复注册问题"))
+    assert ids("登录") == [hello.id]
+    service.delete_task(hello.id)
+    assert ids("登录") == []
+    total, tasks = service.search_tasks("问题")
+    assert total == 1 and tasks[0].title == "修复注册问题"
+    storage.close()
+
+
+def test_fts_index_is_shared_and_rebuilt_for_old_databases(tmp_path):
+    path = str(tmp_path / "tasks.db")
+    first = SQLiteTaskStorage(path)
+    second = SQLiteTaskStorage(path)
+    task = TaskService(first).create_task(TaskCreate(title="共享索引"))
+    assert [t.id for t in TaskService(second).search_tasks("索引")[1]] == [task.id]
+
+    # 模拟没有全文索引的旧数据库：清空索引并删除版本记录，重新打开时补建
+    with first._pool.connection() as conn:
+        conn.execute("DELETE FROM tasks_fts")
+        conn.execute("DELETE FROM meta WHERE key = 'search_index_version'")
+    first.close()
+    second.close()
+    reopened = SQLiteTaskStorage(path)
+    assert reopened.search("共享")[0] == 1
+    reopened.close()
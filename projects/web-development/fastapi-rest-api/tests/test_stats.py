@@ -0,0 +1,46 @@
+"""
+任务统计：计数随写入增量维护，逾期数随状态和截止日期变化
+"""
+
+from datetime import datetime, timedelta
+from tests.conftest import API
+
+
+def _stats(client):
+    return client.get(f"{API}/tasks/stats").json()
+
+
+def test_counts_follow_status_changes(client, service):
+    ids = [client.post(f"{API}/tasks", json={"title": f"统计 {i}"}).json()["id"] for i in range(4)]
+    client.post(f"{API}/tasks/{ids[0]}/start")
+    client.post(f"{API}/tasks/{ids[1]}/complete")
+    client.put(f"{API}/tasks/{ids[2]}", json={"status": "cancelled"})
+    assert _stats(client) == {
+        "total": 4, "pending": 1, "in_progress": 1, "completed": 1, "cancelled": 1, "overdue": 0
+    }
+
+    client.delete(f"{API}/tasks/{ids[1]}")
+    client.post(f"{API}/tasks:batchDelete", json={"ids": [ids[0], ids[3]]})
+    assert _stats(client) == {
+        "total": 1, "pending": 0, "in_progress": 0, "completed": 0, "cancelled": 1, "overdue": 0
+    }
+
+
+def test_overdue_follows_status_and_due_date(client, service):
+    past = (datetime.now() - timedelta(days=1)).isoformat()
+    future = (datetime.now() + timedelta(days=1)).isoformat()
+    first = client.post(f"{API}/tasks", json={"title": "已逾期", "due_date": past}).json()["id"]
+    second = client.post(f"{API}/tasks", json={"title": "未逾期", "due_date": future}).json()["id"]
+    client.post(f"{API}/tasks", json={"title": "无截止日期"})
+    assert _stats(client)["overdue"] == 1
+
+    # 进行中的任务仍计入逾期，完成或取消后不再计入
+    client.post(f"{API}/tasks/{first}/start")
+    assert _stats(client)["overdue"] == 1
+    client.post(f"{API}/tasks/{first}/complete")
+    assert _stats(client)["overdue"] == 0
+
+    client.put(f"{API}/tasks/{second}", json={"due_date": past})
+    assert _stats(client)["overdue"] == 1
+    client.put(f"{API}/tasks/{second}", json={"due_date": future})
+    assert _stats(client)["overdue"] == 0